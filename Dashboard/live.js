@@ -0,0 +1,53 @@
+// live.js — feed en vivo del dashboard (dashboard_server.py).
+// Carga /snapshot una vez (con ETag) y aplica los deltas que llegan por SSE.
+// index.html puede definir window.renderOperaciones(operaciones) para redibujar.
+(function () {
+  let version = 0;
+  let etag = null;
+  const porId = new Map();
+  window.operaciones = [];
+
+  function render() {
+    window.operaciones = Array.from(porId.values());
+    if (typeof window.renderOperaciones === "function") {
+      window.renderOperaciones(window.operaciones);
+    }
+  }
+
+  async function cargarSnapshot() {
+    const headers = etag ? { "If-None-Match": etag } : {};
+    const r = await fetch("/snapshot", { headers });
+    if (r.status === 304) return;
+    etag = r.headers.get("ETag");
+    const data = await r.json();
+    porId.clear();
+    for (const op of data.operaciones) porId.set(op.id, op);
+    version = data.version;
+    render();
+  }
+
+  function aplicar(delta) {
+    if (delta.v <= version) return; // ya incluido en el snapshot
+    version = delta.v;
+    if (delta.tipo === "baja") {
+      porId.delete(delta.id);
+      render();
+      return;
+    }
+    const previa = porId.get(delta.id) || { id: delta.id };
+    for (const [k, v] of Object.entries(delta.cambios)) {
+      if (v === null) delete previa[k];
+      else previa[k] = v;
+    }
+    porId.set(delta.id, previa);
+    render();
+  }
+
+  cargarSnapshot().then(function () {
+    const es = new EventSource("/eventos");
+    es.addEventListener("reset", cargarSnapshot);
+    es.addEventListener("nueva", (e) => aplicar(JSON.parse(e.data)));
+    es.addEventListener("cambio", (e) => aplicar(JSON.parse(e.data)));
+    es.addEventListener("baja", (e) => aplicar(JSON.parse(e.data)));
+  });
+})();
@@ -8,17 +8,25 @@ import json
 import os
 import time
 import math
+import threading
 import traceback
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 import requests
 import pandas as pd
 import numpy as np
 from dotenv import load_dotenv
 load_dotenv()
-resumen_histeresis = []  # Acumulador global de señales por ciclo
 
+import diario_senales as DS
+import escaneo_distribuido as DIST
+import estado_caliente
+import gobernador_peso as GP
+import grabacion as GR
+import multi_timeframe as MTF
+import patrones_velas as PV
+import planificador as PLAN
 
 # === Antiflood (usa tu módulo local) ===
 try:
@@ -26,6 +34,9 @@ try:
 except Exception:
     AF = None
 
+resumen_histeresis = []  # Acumulador global de señales por ciclo
+DETENER = threading.Event()  # el supervisor lo activa al apagar: el ciclo en curso corta en el próximo símbolo
+
 # ========================
 # Utilidades de configuración y símbolos
 # ========================
@@ -36,7 +47,7 @@ def _load_json(path: str) -> dict:
 
 def _cargar_config_seguro() -> Dict[str, Any]:
     try:
-        cfg = _load_json("config.json")
+        cfg = GR.SESION.capturar("archivo", "config.json", lambda: _load_json("config.json"))
         print("[CFG] Config cargada desde config.json", flush=True)
         return cfg
     except Exception as e:
@@ -58,7 +69,8 @@ def _leer_filtered() -> Tuple[List[str], str]:
         return None, None
 
 def _obtener_simbolos_y_origen(cfg: Dict[str, Any]) -> Tuple[List[str], str]:
-    s, origen = _leer_filtered()
+    # La vigencia de simbolos_filtrados.json depende de la hora: se graba el resultado
+    s, origen = GR.SESION.capturar("simbolos", "filtered", _leer_filtered)
     if s:
         return s, origen
     fallback = cfg.get("simbolos") or []
@@ -66,10 +78,13 @@ def _obtener_simbolos_y_origen(cfg: Dict[str, Any]) -> Tuple[List[str], str]:
         fallback = []
     return list(fallback), "config"
 
-def _espera_siguiente_ciclo(inicio_ts: float, cfg: Dict[str, Any]) -> None:
+def _segundos_hasta_siguiente_ciclo(inicio_ts: float, cfg: Dict[str, Any]) -> int:
     freq = int(cfg.get("frecuencia_segundos", 60))
     dur = max(0, time.time() - inicio_ts)
-    wait = max(1, freq - int(dur))
+    return max(1, freq - int(dur))
+
+def _espera_siguiente_ciclo(inicio_ts: float, cfg: Dict[str, Any]) -> None:
+    wait = _segundos_hasta_siguiente_ciclo(inicio_ts, cfg)
     print(f"⏳ Esperando {wait}s para próximo ciclo…", flush=True)
     time.sleep(wait)
 
@@ -77,12 +92,10 @@ def _espera_siguiente_ciclo(inicio_ts: float, cfg: Dict[str, Any]) -> None:
 # Datos de mercado (Binance REST público)
 # ========================
 
-BINANCE_API = "https://api.binance.com"
-
 def _klines(symbol: str, interval: str, limit: int = 200) -> pd.DataFrame:
-    url = f"{BINANCE_API}/api/v3/klines"
+    # Pasa por el gobernador de peso: el escaneo cede ante órdenes y precios de posiciones
     params = {"symbol": symbol, "interval": interval, "limit": limit}
-    r = requests.get(url, params=params, timeout=15)
+    r = GP.GOBERNADOR.get("/api/v3/klines", params, prioridad=GP.PRIORIDAD_ESCANEO, timeout=15)
     r.raise_for_status()
     data = r.json()
     cols = ["open_time","open","high","low","close","volume","close_time","qav","trades","taker_base","taker_quote","ignore"]
@@ -93,6 +106,22 @@ def _klines(symbol: str, interval: str, limit: int = 200) -> pd.DataFrame:
     df["close_time"] = pd.to_datetime(df["close_time"], unit="ms", utc=True)
     return df[["open_time","open","high","low","close","volume","close_time"]]
 
+def _velas_simbolo(simbolo: str, intervalo: str, cfg: Dict[str, Any]) -> pd.DataFrame:
+    # Buffer incremental de velas: tras el primer ciclo (o un arranque en caliente) sólo
+    # se piden las velas que faltan. Con multi-timeframe además alimenta los timeframes.
+    mcfg = MTF.config_mtf(cfg)
+    ahora = pd.Timestamp(GR.SESION.ahora(f"velas:{simbolo}"), unit="s", tz="UTC")
+    if not mcfg["activo"]:
+        mcfg = dict(mcfg, timeframes=[], max_velas_base=mcfg["velas_analisis"])
+    limit = MTF.AGREGADOR.velas_a_pedir(simbolo, intervalo, int(ahora.value // 1_000_000), mcfg)
+    df = _klines(simbolo, intervalo, limit=limit)
+    if df is not None and not df.empty:
+        df = MTF.AGREGADOR.ingerir(simbolo, df, intervalo, ahora, mcfg)
+    if df is not None and not df.empty and PLAN.config_planificador(cfg)["alineado_a_velas"]:
+        # Alineado al cierre: se analiza sólo sobre velas cerradas
+        df = df[df["close_time"] <= ahora].reset_index(drop=True)
+    return df
+
 # ========================
 # Indicadores técnicos (sin TA-Lib)
 # ========================
@@ -147,6 +176,7 @@ def _analisis_tecnico(df: pd.DataFrame, cfg: Dict[str, Any]) -> Dict[str, Any]:
     ema_l = int(ind.get("ema_long_period", 50))
     atr_p = int(ind.get("atr_period", 14))
     vr_p = int(ind.get("volume_relative_period", 20))
+    patron_ventana = max(1, int(ind.get("patron_ventana", 3)))
 
     close = df["close"]
     high = df["high"]
@@ -161,6 +191,7 @@ def _analisis_tecnico(df: pd.DataFrame, cfg: Dict[str, Any]) -> Dict[str, Any]:
     atr_val = _atr(high, low, close, atr_p).iloc[-1]
     atr_pct = float(atr_val / (close.iloc[-1] + 1e-12)) * 100.0
     vol_rel = _volume_relative(vol, vr_p).iloc[-1]
+    patron = PV.patron_mas_fuerte(df, patron_ventana)
 
     confluencias = 0
     if rsi_val > 50: confluencias += 1
@@ -181,7 +212,8 @@ def _analisis_tecnico(df: pd.DataFrame, cfg: Dict[str, Any]) -> Dict[str, Any]:
         "atr_pct": round(atr_pct, 2),
         "volumen_rel": float(vol_rel),
         "fuerza": fuerza,
-        "patron": "Ninguno"
+        "patron": patron["patron"],
+        "patron_direccion": patron["direccion"]
     }
 
 def _ia_simulada(simbolo: str, at: Dict[str, Any], cfg: Dict[str, Any]) -> Dict[str, Any]:
@@ -220,14 +252,15 @@ def _ia_simulada(simbolo: str, at: Dict[str, Any], cfg: Dict[str, Any]) -> Dict[
 
 def _ia_real_groq(simbolo: str, at: Dict[str, Any], cfg: Dict[str, Any]) -> Dict[str, Any]:
     api_key = os.getenv("GROQ_API_KEY", "")
-    if not api_key:
+    if not GR.SESION.capturar("entorno", "GROQ_API_KEY", lambda: bool(api_key)):  # nunca se graba la clave
         print("🤖 GROQ_API_KEY no configurada. Usando IA simulada.", flush=True)
         return _ia_simulada(simbolo, at, cfg)
     try:
         prompt = (
             f"Analiza {simbolo} con estos datos: "
             f"precio={at['precio_actual']}, rsi={at['rsi']:.2f}, macd={at['macd']:.5f}, "
-            f"atr_pct={at['atr_pct']:.2f}, vol_rel={at['volumen_rel']:.2f}, fuerza={at['fuerza']}. "
+            f"atr_pct={at['atr_pct']:.2f}, vol_rel={at['volumen_rel']:.2f}, fuerza={at['fuerza']}, "
+            f"patron_velas={at.get('patron', 'Ninguno')}. "
             f"Devuelve JSON con veredicto('Sí'|'No'), confiabilidad(0-100), rango[float,float], sl, tp, trailing(%) y mensaje."
         )
         url = "https://api.groq.com/openai/v1/chat/completions"
@@ -237,7 +270,8 @@ def _ia_real_groq(simbolo: str, at: Dict[str, Any], cfg: Dict[str, Any]) -> Dict
             "messages": [{"role": "user", "content": prompt}],
             "temperature": 0.2
         }
-        r = requests.post(url, headers=headers, json=body, timeout=30)
+        r = GR.SESION.capturar_respuesta(
+            "groq", simbolo, lambda: requests.post(url, headers=headers, json=body, timeout=30))
         if r.status_code != 200:
             print(f"🤖 IA real falló ({r.status_code}). Usando simulada.", flush=True)
             return _ia_simulada(simbolo, at, cfg)
@@ -259,7 +293,7 @@ def _ia_real_groq(simbolo: str, at: Dict[str, Any], cfg: Dict[str, Any]) -> Dict
             conf_raw = float(parsed["confiabilidad"])
             if conf_raw == int(conf_raw):
                 import random
-                ruido = random.uniform(-0.4, 0.4)
+                ruido = GR.SESION.capturar("aleatorio", f"groq:{simbolo}", lambda: random.uniform(-0.4, 0.4))
                 nuevo_valor = round(conf_raw + ruido, 2)
                 parsed["confiabilidad"] = nuevo_valor
                 print(f"🎯 Confianza IA redonda detectada: {conf_raw:.2f} → Modificada a: {nuevo_valor:.2f}", flush=True)
@@ -336,8 +370,15 @@ def _construir_payload(simbolo: str, at: Dict[str, Any], ia: Dict[str, Any], ove
     if atr_pct < 0.15:
         penalizacion += pesos.get("atr_bajo", 0)
 
-    if patron == "Ninguno":
+    # Un patrón sin dirección (Doji) no compensa la falta de patrón
+    if patron == "Ninguno" or at.get("patron_direccion", 0) == 0:
         penalizacion += pesos.get("sin_patron", 0)
+    elif at.get("patron_direccion", 0) < 0:
+        penalizacion += pesos.get("patron_bajista", 0)
+
+    confluencia_mtf = at.get("confluencia_mtf")
+    if confluencia_mtf is not None:
+        penalizacion += round(pesos.get("mtf_desalineado", 0) * (1.0 - confluencia_mtf), 2)
 
     confianza -= penalizacion
     confianza = max(0, round(confianza, 2))
@@ -355,6 +396,7 @@ def _construir_payload(simbolo: str, at: Dict[str, Any], ia: Dict[str, Any], ove
         "rsi": round(at["rsi"], 2),
         "macd": round(at["macd"], 5),
         "fuerza": at["fuerza"],
+        "patron": patron,
         "fuerza_por_conf": fuerza_por_conf,
         "confiabilidad": min(confianza, 100),
         "rango": ia.get("rango"),
@@ -368,8 +410,12 @@ def _construir_payload(simbolo: str, at: Dict[str, Any], ia: Dict[str, Any], ove
         "modo_simulacion": os.getenv("USE_FAKE_IA", "true").lower() == "true",
         "volumen_rel": round(at["volumen_rel"], 2),
         "atr_pct": round(at["atr_pct"], 2),
-        "monto_usdt": float(cfg.get("monto_inversion_usdt", 5.0))
+        "monto_usdt": float(cfg.get("monto_inversion_usdt", 5.0)),
+        "penalizacion": penalizacion
     }
+    if confluencia_mtf is not None:
+        payload["confluencia_mtf"] = confluencia_mtf
+        payload["timeframes_mtf"] = at.get("timeframes_mtf")
     return payload
 
 
@@ -410,142 +456,276 @@ def _enviar_por_telegram(simbolo: str, payload: Dict[str, Any]) -> None:
 # Procesamiento de un símbolo (E2E)
 # ========================
 
-def _procesar_un_simbolo(simbolo: str, cfg: Dict[str, Any]) -> None:
-    try:
-        print(f"🔍 Analizando {simbolo}…", flush=True)
-        intervalo = cfg.get("intervalo", "1m")
-        df = _klines(simbolo, intervalo, limit=200)
-        if df is None or df.empty:
-            print(f"❌ {simbolo}: sin datos de velas", flush=True)
-            return
-
-        at = _analisis_tecnico(df, cfg)
-        print(f"📊 {simbolo} AT: {at}", flush=True)
-
-        # IA: real o simulada
-        use_fake = os.getenv("USE_FAKE_IA", "true").lower() == "true"
-        ia = _ia_simulada(simbolo, at, cfg) if use_fake else _ia_real_groq(simbolo, at, cfg)
-        print(f"🤖 {simbolo} IA: veredicto={ia.get('veredicto')} conf={float(ia.get('confiabilidad')):.1f}%", flush=True)
-
-        ia_final, override_aplicado, alto_riesgo = _aplicar_override(simbolo, at, ia, cfg)
-
-        # Filtro final por fuerza mínima
-        fuerza_min = str(cfg.get("fuerza_minima", "Débil"))
-        histeresis = float(cfg.get("histeresis_confianza", 0))
-
-        conf = float(ia_final.get("confiabilidad", 0))
-        conf_fuerte = float(cfg.get("min_confiabilidad_fuerte", 70))
-        conf_media = float(cfg.get("min_confiabilidad_media", 50))
-
-        # Clasificación ajustada por histeresis
-        fuerza_por_conf = "Débil"
-        if conf >= conf_media - histeresis:
-            fuerza_por_conf = "Media"
-        if conf >= conf_fuerte - histeresis:
-            fuerza_por_conf = "Fuerte"
-
-        niveles = {"Débil": 1, "Media": 2, "Fuerte": 3}
-        if niveles.get(fuerza_por_conf, 1) < niveles.get(fuerza_min, 1):
-            print(f"ℹ️  {simbolo}: Señal descartada por fuerza mínima ({fuerza_por_conf} < {fuerza_min}).", flush=True)
-            return
-        print(f"[DEBUG] Confianza final bruta: {conf}")
-        resumen_histeresis.append(
-        f"🔍 {simbolo}: Conf={conf:.2f} → Fuerza='{fuerza_por_conf}' → ❌ DESCARTADA"
-        )
+def _evaluar_simbolo(simbolo: str, cfg: Dict[str, Any], fila: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # Velas → AT → IA/override → fuerza mínima → veredicto. Devuelve el candidato a señal,
+    # o None si se descartó (el motivo queda en `fila`). En modo distribuido corre en los workers.
+    intervalo = fila["intervalo"]
+    df = _velas_simbolo(simbolo, intervalo, cfg)
+    if df is None or df.empty:
+        print(f"❌ {simbolo}: sin datos de velas", flush=True)
+        fila["decision"] = DS.SIN_DATOS
+        return None
+
+    vela_ms = None
+    if PLAN.config_planificador(cfg)["alineado_a_velas"]:
+        vela_ms = int(df["open_time"].iloc[-1].value // 1_000_000)
+        if not PLAN.PLANIFICADOR.es_vela_nueva(simbolo, vela_ms):
+            print(f"⏭️  {simbolo}: sin vela cerrada nueva. Se omite.", flush=True)
+            fila["decision"] = DS.SIN_VELA_NUEVA
+            return None
+
+    candidato = _evaluar_vela(simbolo, df, cfg, fila)
+    if vela_ms is not None:
+        # Sólo tras un análisis completo: si falló (IA, red…) el próximo ciclo reintenta la vela
+        PLAN.PLANIFICADOR.marcar_analizada(simbolo, vela_ms)
+    return candidato
+
+def _evaluar_vela(simbolo: str, df: pd.DataFrame, cfg: Dict[str, Any], fila: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    at = _analisis_tecnico(df, cfg)
+    if MTF.config_mtf(cfg)["activo"]:
+        at.update(MTF.AGREGADOR.confluencia(simbolo, at, cfg, _analisis_tecnico))
+    fila["at"] = at
+    print(f"📊 {simbolo} AT: {at}", flush=True)
+
+    # IA: real o simulada
+    use_fake = GR.SESION.capturar("entorno", "USE_FAKE_IA", lambda: os.getenv("USE_FAKE_IA", "true").lower() == "true")
+    ia = _ia_simulada(simbolo, at, cfg) if use_fake else _ia_real_groq(simbolo, at, cfg)
+    print(f"🤖 {simbolo} IA: veredicto={ia.get('veredicto')} conf={float(ia.get('confiabilidad')):.1f}%", flush=True)
+
+    ia_final, override_aplicado, alto_riesgo = _aplicar_override(simbolo, at, ia, cfg)
+    fila.update(ia=ia, override=override_aplicado, alto_riesgo=alto_riesgo)
+
+    # Filtro final por fuerza mínima
+    fuerza_min = str(cfg.get("fuerza_minima", "Débil"))
+    histeresis = float(cfg.get("histeresis_confianza", 0))
+
+    conf = float(ia_final.get("confiabilidad", 0))
+    conf_fuerte = float(cfg.get("min_confiabilidad_fuerte", 70))
+    conf_media = float(cfg.get("min_confiabilidad_media", 50))
+
+    # Clasificación ajustada por histeresis
+    fuerza_por_conf = "Débil"
+    if conf >= conf_media - histeresis:
+        fuerza_por_conf = "Media"
+    if conf >= conf_fuerte - histeresis:
+        fuerza_por_conf = "Fuerte"
+    fila.update(conf=conf, fuerza_conf=fuerza_por_conf)
+
+    niveles = {"Débil": 1, "Media": 2, "Fuerte": 3}
+    if niveles.get(fuerza_por_conf, 1) < niveles.get(fuerza_min, 1):
+        print(f"ℹ️  {simbolo}: Señal descartada por fuerza mínima ({fuerza_por_conf} < {fuerza_min}).", flush=True)
+        fila["decision"] = DS.FUERZA_MINIMA
+        return None
+    print(f"[DEBUG] Confianza final bruta: {conf}")
+    resumen_histeresis.append(
+    f"🔍 {simbolo}: Conf={conf:.2f} → Fuerza='{fuerza_por_conf}' → ❌ DESCARTADA"
+    )
 
-        if ia_final.get("veredicto") != "Sí":
-            print(f"ℹ️  {simbolo}: Veredicto final IA = No. No se envía.", flush=True)
-            return
+    if ia_final.get("veredicto") != "Sí":
+        print(f"ℹ️  {simbolo}: Veredicto final IA = No. No se envía.", flush=True)
+        fila["decision"] = DS.VEREDICTO_NO
+        return None
 
-        # ===== Antiflood (tu módulo) =====
-        if AF:
-            try:
-                # Overrides desde config.json (opcionales)
-                if "antiflood_cambio_precio_pct" in cfg:
-                    AF.UMBRAL_VARIACION = float(cfg["antiflood_cambio_precio_pct"]) / 100.0
-                if "antiflood_minutos" in cfg:
-                    AF.TIEMPO_MIN_ENTRE_SEÑALES = int(cfg["antiflood_minutos"])
-
-                historial = AF.cargar_historial()
-                usar_por_intervalo = bool(cfg.get("antiflood_por_intervalo", True))
-                clave = f"{simbolo}|{intervalo}" if usar_por_intervalo else simbolo
-
-                fuerza_ref = fuerza_por_conf  # estable
-                if AF.es_repetida(clave, at["precio_actual"], fuerza_ref, historial):
-                    print(f"ℹ️  {simbolo}: antiflood activo (repetida). No se envía.", flush=True)
-                    return
-            except Exception as e:
-                print(f"ℹ️  Antiflood deshabilitado por excepción: {e}", flush=True)
-        # =================================
-
-        payload = _construir_payload(simbolo, at, ia_final, override_aplicado, alto_riesgo, cfg)
-        
-        from utils import deberia_enviar_senal
-        ok, meta = deberia_enviar_senal(payload, cfg)
-        if not ok:
-            print(f"📛 Señal descartada: {meta['motivo']}  [{simbolo}]")
-            return
-        _enviar_por_telegram(simbolo, payload)
-        resumen_histeresis.append(
-            f"🔍 {simbolo}: Conf={conf:.2f} → Fuerza='{fuerza_por_conf}' → ✅ ACEPTADA"
-        )
+    return {
+        "simbolo": simbolo,
+        "at": at,
+        "ia_final": ia_final,
+        "override": override_aplicado,
+        "alto_riesgo": alto_riesgo,
+        "conf": conf,
+        "fuerza_por_conf": fuerza_por_conf,
+        "fila": fila,
+    }
 
-        # Registrar en historial después de enviar
-        if AF:
-            try:
-                # Ya usamos el historial cargado previamente
-                usar_por_intervalo = bool(cfg.get("antiflood_por_intervalo", True))
-                clave = f"{simbolo}|{intervalo}" if usar_por_intervalo else simbolo
-                AF.registrar_senal(clave, at["precio_actual"], fuerza_por_conf, historial)
-                AF.guardar_historial(historial)
-            except Exception as e:
-                print(f"ℹ️  No se pudo registrar en historial antiflood: {e}", flush=True)
+def _filtrar_y_enviar(candidato: Dict[str, Any], cfg: Dict[str, Any]) -> None:
+    # Antiflood → payload → deberia_enviar_senal → Telegram. Siempre en el proceso central,
+    # así el historial antiflood y el envío tienen un único dueño.
+    simbolo = candidato["simbolo"]
+    at = candidato["at"]
+    conf = candidato["conf"]
+    fuerza_por_conf = candidato["fuerza_por_conf"]
+    fila = candidato["fila"]
+    intervalo = fila["intervalo"]
+
+    # ===== Antiflood (tu módulo) =====
+    if AF:
+        try:
+            # Overrides desde config.json (opcionales)
+            if "antiflood_cambio_precio_pct" in cfg:
+                AF.UMBRAL_VARIACION = float(cfg["antiflood_cambio_precio_pct"]) / 100.0
+            if "antiflood_minutos" in cfg:
+                AF.TIEMPO_MIN_ENTRE_SEÑALES = int(cfg["antiflood_minutos"])
+
+            historial = GR.SESION.capturar("antiflood", "historial", AF.cargar_historial)
+            usar_por_intervalo = bool(cfg.get("antiflood_por_intervalo", True))
+            clave = f"{simbolo}|{intervalo}" if usar_por_intervalo else simbolo
+
+            fuerza_ref = fuerza_por_conf  # estable
+            if AF.es_repetida(clave, at["precio_actual"], fuerza_ref, historial):
+                print(f"ℹ️  {simbolo}: antiflood activo (repetida). No se envía.", flush=True)
+                fila["decision"] = DS.ANTIFLOOD
+                return
+        except Exception as e:
+            print(f"ℹ️  Antiflood deshabilitado por excepción: {e}", flush=True)
+    # =================================
+
+    payload = _construir_payload(simbolo, at, candidato["ia_final"], candidato["override"],
+                                 candidato["alto_riesgo"], cfg)
+    fila.update(penalizacion=payload["penalizacion"], conf_final=payload["confiabilidad"])
+
+    from utils import deberia_enviar_senal
+    ok, meta = deberia_enviar_senal(payload, cfg)
+    if not ok:
+        print(f"📛 Señal descartada: {meta['motivo']}  [{simbolo}]")
+        fila["decision"] = DS.decision_de_filtro(meta["motivo"])
+        return
+    GR.SESION.capturar("telegram", simbolo, lambda: _enviar_por_telegram(simbolo, payload))
+    fila["decision"] = DS.ACEPTADA
+    resumen_histeresis.append(
+        f"🔍 {simbolo}: Conf={conf:.2f} → Fuerza='{fuerza_por_conf}' → ✅ ACEPTADA"
+    )
 
+    # Registrar en historial después de enviar
+    if AF:
+        try:
+            # Ya usamos el historial cargado previamente
+            usar_por_intervalo = bool(cfg.get("antiflood_por_intervalo", True))
+            clave = f"{simbolo}|{intervalo}" if usar_por_intervalo else simbolo
+            AF.registrar_senal(clave, at["precio_actual"], fuerza_por_conf, historial)
+            AF.guardar_historial(historial)
+        except Exception as e:
+            print(f"ℹ️  No se pudo registrar en historial antiflood: {e}", flush=True)
+
+def _registrar_fila(fila: Dict[str, Any], cfg: Dict[str, Any]) -> None:
+    # Corre en el finally de cada símbolo: ni el diario ni la grabación deben cortar el ciclo
+    try:
+        GR.SESION.comparar("decision", fila["simbolo"],
+                           [DS.DECISIONES.get(fila.get("decision"), fila.get("decision")), fila.get("conf_final")])
+    except Exception as e:
+        print(f"⚠️ [GRAB] No se pudo comparar la decisión de {fila.get('simbolo')}: {e}", flush=True)
+    try:
+        if DS.config_diario(cfg)["activo"]:
+            DS.DIARIO.registrar(fila)
+    except Exception as e:
+        print(f"⚠️ [DIARIO] No se pudo registrar {fila.get('simbolo')}: {e}", flush=True)
+
+def _procesar_un_simbolo(simbolo: str, cfg: Dict[str, Any]) -> None:
+    fila = DS.nueva_fila(simbolo, cfg.get("intervalo", "1m"))  # diario de señales: se completa en cada paso
+    try:
+        print(f"🔍 Analizando {simbolo}…", flush=True)
+        candidato = _evaluar_simbolo(simbolo, cfg, fila)
+        if candidato is not None:
+            _filtrar_y_enviar(candidato, cfg)
     except Exception as e:
         print(f"❌ {simbolo}: {e}", flush=True)
         traceback.print_exc()
+    finally:
+        _registrar_fila(fila, cfg)
+
+def _procesar_candidato(candidato: Dict[str, Any], cfg: Dict[str, Any]) -> None:
+    # Coordinador distribuido: filtro central de un candidato evaluado en un worker
+    try:
+        _filtrar_y_enviar(candidato, cfg)
+    except Exception as e:
+        print(f"❌ {candidato['simbolo']}: {e}", flush=True)
+        traceback.print_exc()
+    finally:
+        _registrar_fila(candidato["fila"], cfg)
 
 # ========================
 # LOOP PRINCIPAL
 # ========================
 
+def ejecutar_ciclo() -> Tuple[Dict[str, Any], bool, int]:
+    # Un ciclo completo de escaneo. Devuelve (cfg, alineado, cantidad de símbolos).
+    GR.SESION.marcar("scanner")
+    cfg = _cargar_config_seguro()
+    GP.GOBERNADOR.configurar(GP.config_gobernador(cfg))
+    pcfg = PLAN.config_planificador(cfg)
+    alineado = pcfg["alineado_a_velas"]
+    if alineado:
+        PLAN.PLANIFICADOR.esperar_cierre(cfg.get("intervalo", "1m"), pcfg, DETENER)
+        if DETENER.is_set():
+            return cfg, alineado, 0
+    simbolos, origen = _obtener_simbolos_y_origen(cfg)
+    if not simbolos:
+        print("[CFG] Sin símbolos (filtered vencido y config vacía). Reintentando…", flush=True)
+        return cfg, alineado, 0
+
+    print(f"[CFG] Usando símbolos {origen} ({len(simbolos)})", flush=True)
+    print({
+        "intervalo": cfg.get("intervalo", "1m"),
+        "lista_simbolos": simbolos,
+        "origen_simbolos": origen
+    }, flush=True)
+
+    # Grabando/reproduciendo se escanea en este proceso: los workers no comparten la sesión
+    if DIST.config_distribuido(cfg)["workers"] > 0 and not GR.SESION.activa():
+        DIST.COORDINADOR.ejecutar_ciclo(simbolos, cfg, _procesar_candidato, _registrar_fila, DETENER)
+    elif alineado:
+        PLAN.PLANIFICADOR.ejecutar_ciclo(simbolos, cfg, _procesar_un_simbolo, DETENER)
+    else:
+        for simbolo in simbolos:
+            if DETENER.is_set():
+                break
+            _procesar_un_simbolo(simbolo, cfg)
+    dcfg = DS.config_diario(cfg)
+    if dcfg["activo"]:
+        DS.DIARIO.configurar(directorio=dcfg["directorio"])
+        DS.DIARIO.volcar()
+    GP.GOBERNADOR.imprimir_resumen()
+    return cfg, alineado, len(simbolos)
+
+def _imprimir_resumen_histeresis() -> None:
+    if resumen_histeresis:
+        print("\n🚀 Evaluando señales con histeresis activada:")
+        for r in resumen_histeresis:
+            print(r)
+        resumen_histeresis.clear()
+
 def start_loop():
     print("🚀 Bot integrado (análisis+IA+envío + antiflood) iniciado…", flush=True)
-    while True:
-        ciclo_inicio = time.time()
-        try:
-            cfg = _cargar_config_seguro()
-            simbolos, origen = _obtener_simbolos_y_origen(cfg)
-            if not simbolos:
-                print("[CFG] Sin símbolos (filtered vencido y config vacía). Reintentando…", flush=True)
-                time.sleep(15)
-                continue
-
-            print(f"[CFG] Usando símbolos {origen} ({len(simbolos)})", flush=True)
-            print({
-                "intervalo": cfg.get("intervalo", "1m"),
-                "lista_simbolos": simbolos,
-                "origen_simbolos": origen
-            }, flush=True)
-
-            for simbolo in simbolos:
-                _procesar_un_simbolo(simbolo, cfg)
-
-        except KeyboardInterrupt:
-            print("🛑 Interrumpido por usuario.", flush=True)
-            break
-        except Exception as e:
-            print(f"❌ Error en ciclo principal: {e}", flush=True)
-            traceback.print_exc()
+    cfg = _cargar_config_seguro()
+    acfg = estado_caliente.config_arranque(cfg)
+    if acfg["activo"]:
+        estado_caliente.restaurar(acfg["ruta"], max_edad_horas=acfg["max_edad_horas"])
+    GR.iniciar(cfg)
+    ultimo_guardado = time.time()
+    try:
+        while True:
+            ciclo_inicio = time.time()
+            cfg, alineado = {}, False
+            try:
+                cfg, alineado, n_simbolos = ejecutar_ciclo()
+                if not n_simbolos:
+                    time.sleep(15)
+                    continue
+
+            except KeyboardInterrupt:
+                print("🛑 Interrumpido por usuario.", flush=True)
+                break
+            except Exception as e:
+                print(f"❌ Error en ciclo principal: {e}", flush=True)
+                traceback.print_exc()
+
+            if not alineado:
+                _espera_siguiente_ciclo(ciclo_inicio, cfg)
 
-        _espera_siguiente_ciclo(ciclo_inicio, cfg)
+            _imprimir_resumen_histeresis()
 
-        if resumen_histeresis:
-            print("\n🚀 Evaluando señales con histeresis activada:")
-            for r in resumen_histeresis:
-                print(r)
-            resumen_histeresis.clear()
+            # Sin esto un kill -9 del loop perdería todo el estado caliente
+            if acfg["activo"] and time.time() - ultimo_guardado >= acfg["snapshot_segundos"]:
+                ultimo_guardado = time.time()
+                try:
+                    estado_caliente.guardar(acfg["ruta"])
+                except Exception as e:
+                    print(f"❌ Error guardando estado caliente: {e}", flush=True)
+    finally:
+        DIST.COORDINADOR.detener()
+        GR.SESION.detener()
+        if acfg["activo"]:
+            estado_caliente.guardar(acfg["ruta"])
 
 
 if __name__ == "__main__":
-    start_loop()
\ No newline at end of file
+    start_loop()
@@ -0,0 +1,71 @@
+# bus_eventos.py
+# Bus pub/sub interno para comunicar scanner, trailing y validación en memoria.
+# Sin supervisor (scripts sueltos) los callbacks se ejecutan en el acto.
+# Con supervisor el bus se adjunta a su event loop y las publicaciones hechas
+# desde hilos (asyncio.to_thread) se despachan de forma segura en ese loop.
+
+import asyncio
+import threading
+import traceback
+from collections import defaultdict
+from typing import Dict, Any, List, Callable, Optional
+
+EVENTO_SENAL_EMITIDA = "senal_emitida"
+EVENTO_ORDEN_CONFIRMADA = "orden_confirmada"
+EVENTO_POSICION_ACTUALIZADA = "posicion_actualizada"
+EVENTO_POSICION_CERRADA = "posicion_cerrada"
+
+
+class BusEventos:
+
+    def __init__(self):
+        self._subs: Dict[str, List[Callable[[Dict[str, Any]], Any]]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def suscribir(self, evento: str, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        with self._lock:
+            self._subs[evento].append(callback)
+
+    def desuscribir_todo(self) -> None:
+        with self._lock:
+            self._subs.clear()
+
+    def adjuntar_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def desadjuntar_loop(self) -> None:
+        self._loop = None
+
+    def activo(self) -> bool:
+        # True si hay un supervisor consumiendo eventos (el estado vive en memoria)
+        return self._loop is not None and not self._loop.is_closed()
+
+    def publicar(self, evento: str, datos: Dict[str, Any]) -> None:
+        with self._lock:
+            callbacks = list(self._subs.get(evento, ()))
+        if not callbacks:
+            return
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            for cb in callbacks:
+                self._despachar(evento, cb, datos)
+            return
+        for cb in callbacks:
+            loop.call_soon_threadsafe(self._despachar, evento, cb, datos)
+
+    def _despachar(self, evento: str, cb: Callable[[Dict[str, Any]], Any], datos: Dict[str, Any]) -> None:
+        try:
+            res = cb(datos)
+            if asyncio.iscoroutine(res):
+                if self._loop is not None:
+                    self._loop.create_task(res)
+                else:
+                    res.close()
+                    print(f"⚠️ [BUS] Callback async de '{evento}' ignorado: no hay event loop.", flush=True)
+        except Exception as e:
+            print(f"❌ [BUS] Error en suscriptor de '{evento}': {e}", flush=True)
+            traceback.print_exc()
+
+
+BUS = BusEventos()
@@ -0,0 +1,243 @@
+# dashboard_server.py
+# Servidor local del dashboard con feed incremental por Server-Sent Events.
+# Mantiene las operaciones en memoria y empuja a los navegadores sólo los campos
+# que cambiaron (precio, trailing stop, estado, PnL…), en vez de recargar data.js.
+#   GET /snapshot  → {"version", "operaciones"} con ETag (304 si If-None-Match coincide)
+#   GET /data.js   → mismo snapshot con el formato clásico `const operaciones = [...]`
+#   GET /eventos   → stream SSE de deltas (nueva/cambio/baja); reanuda con Last-Event-ID
+#   GET /          → Dashboard/index.html (y demás archivos estáticos de Dashboard/)
+# Con supervisor se alimenta del bus de eventos; suelto vigila Dashboard/data.js.
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from bus_eventos import EVENTO_ORDEN_CONFIRMADA, EVENTO_POSICION_ACTUALIZADA, EVENTO_POSICION_CERRADA
+from utils import cargar_operaciones_dashboard, clave_operacion, seccion_config
+
+DIR_DASHBOARD = "Dashboard"
+MAX_DELTAS_HISTORIAL = 1000
+KEEPALIVE_SEGUNDOS = 15
+
+
+def config_dashboard(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "dashboard")
+    return {
+        "activo": bool(raw.get("activo", False)),
+        "host": str(raw.get("host", "127.0.0.1")),
+        "puerto": int(raw.get("puerto", 8765)),
+    }
+
+
+class LibroDashboard:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops: Dict[str, Dict[str, Any]] = {}
+        self._version = 0
+        self._instancia = uuid.uuid4().hex[:8]  # invalida ETags de otro proceso
+        self._deltas: deque = deque(maxlen=MAX_DELTAS_HISTORIAL)
+        self._clientes: List[queue.Queue] = []
+        self._cache: Optional[Tuple[int, bytes]] = None
+
+    def cargar(self, operaciones: List[Dict[str, Any]]) -> None:
+        # Recarga completa: las filas que ya no están (data.js editado a mano) se dan de baja
+        for op in operaciones:
+            self.actualizar(op)
+        presentes = {clave_operacion(op) for op in operaciones}
+        with self._lock:
+            for clave in [c for c in self._ops if c not in presentes]:
+                del self._ops[clave]
+                self._emitir("baja", clave, {})
+
+    def _emitir(self, tipo: str, clave: str, cambios: Dict[str, Any]) -> None:
+        # Con self._lock tomado
+        self._version += 1
+        delta = {"v": self._version, "tipo": tipo, "id": clave, "cambios": cambios}
+        self._deltas.append(delta)
+        for q in self._clientes:
+            q.put(delta)
+
+    def actualizar(self, op: Dict[str, Any]) -> bool:
+        clave = clave_operacion(op)
+        with self._lock:
+            previa = self._ops.get(clave)
+            if previa is None:
+                cambios = dict(op)
+                tipo = "nueva"
+            else:
+                cambios = {k: v for k, v in op.items() if previa.get(k) != v}
+                cambios.update({k: None for k in previa if k not in op})
+                if not cambios:
+                    return False
+                tipo = "cambio"
+            self._ops[clave] = dict(op)
+            self._emitir(tipo, clave, cambios)
+        return True
+
+    def etag(self, version: int) -> str:
+        return f'"{self._instancia}-{version}"'
+
+    def snapshot(self) -> Tuple[int, bytes]:
+        with self._lock:
+            if self._cache is None or self._cache[0] != self._version:
+                cuerpo = {"version": self._version, "operaciones": [dict(op, id=k) for k, op in self._ops.items()]}
+                self._cache = (self._version, json.dumps(cuerpo, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            return self._cache
+
+    def suscribir(self, desde: Optional[int]) -> Tuple[queue.Queue, bool]:
+        # Devuelve la cola del cliente y si puede reanudar (False → debe pedir /snapshot)
+        q: queue.Queue = queue.Queue()
+        with self._lock:
+            reanuda = desde is not None and desde <= self._version and (
+                desde == self._version or (self._deltas and self._deltas[0]["v"] <= desde + 1)
+            )
+            if reanuda:
+                for d in self._deltas:
+                    if d["v"] > desde:
+                        q.put(d)
+            self._clientes.append(q)
+        return q, bool(reanuda)
+
+    def desuscribir(self, q: queue.Queue) -> None:
+        with self._lock:
+            if q in self._clientes:
+                self._clientes.remove(q)
+
+    def suscribir_bus(self, bus) -> None:
+        for evento in (EVENTO_ORDEN_CONFIRMADA, EVENTO_POSICION_ACTUALIZADA, EVENTO_POSICION_CERRADA):
+            bus.suscribir(evento, self.actualizar)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    libro: LibroDashboard = None  # se asigna en crear_servidor
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        ruta = urlparse(self.path).path
+        if ruta == "/snapshot":
+            self._snapshot(json_puro=True)
+        elif ruta == "/data.js":
+            self._snapshot(json_puro=False)
+        elif ruta == "/eventos":
+            self._eventos()
+        else:
+            self._estatico(ruta)
+
+    def _snapshot(self, json_puro: bool):
+        version, cuerpo = self.libro.snapshot()
+        etag = self.libro.etag(version)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        if json_puro:
+            tipo = "application/json; charset=utf-8"
+        else:
+            ops = json.loads(cuerpo)["operaciones"]
+            cuerpo = ("const operaciones = " + json.dumps(ops, ensure_ascii=False) + ";").encode("utf-8")
+            tipo = "application/javascript; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _eventos(self):
+        ultimo = self.headers.get("Last-Event-ID")
+        desde = int(ultimo) if ultimo and ultimo.isdigit() else None
+        q, reanuda = self.libro.suscribir(desde)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "keep-alive")
+            self.end_headers()
+            if not reanuda:
+                # El cliente debe (re)cargar /snapshot antes de aplicar deltas
+                version, _ = self.libro.snapshot()
+                self._enviar(f"event: reset\nid: {version}\ndata: {{\"version\": {version}}}\n\n")
+            while True:
+                try:
+                    d = q.get(timeout=KEEPALIVE_SEGUNDOS)
+                except queue.Empty:
+                    self._enviar(": keepalive\n\n")
+                    continue
+                datos = json.dumps(d, ensure_ascii=False, separators=(",", ":"))
+                self._enviar(f"event: {d['tipo']}\nid: {d['v']}\ndata: {datos}\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.libro.desuscribir(q)
+
+    def _enviar(self, texto: str):
+        self.wfile.write(texto.encode("utf-8"))
+        self.wfile.flush()
+
+    def _estatico(self, ruta: str):
+        nombre = "index.html" if ruta in ("/", "") else ruta.lstrip("/")
+        base = os.path.abspath(DIR_DASHBOARD)
+        archivo = os.path.abspath(os.path.join(base, nombre))
+        if not archivo.startswith(base + os.sep) or not os.path.isfile(archivo):
+            self.send_error(404)
+            return
+        tipos = {".html": "text/html", ".js": "application/javascript", ".css": "text/css"}
+        with open(archivo, "rb") as f:
+            cuerpo = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", tipos.get(os.path.splitext(archivo)[1], "application/octet-stream") + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+def crear_servidor(libro: LibroDashboard, host: str, puerto: int) -> ThreadingHTTPServer:
+    handler = type("HandlerDashboard", (_Handler,), {"libro": libro})
+    servidor = ThreadingHTTPServer((host, puerto), handler)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def iniciar_en_hilo(libro: LibroDashboard, dcfg: Dict[str, Any]) -> ThreadingHTTPServer:
+    servidor = crear_servidor(libro, dcfg["host"], dcfg["puerto"])
+    threading.Thread(target=servidor.serve_forever, name="dashboard", daemon=True).start()
+    print(f"📊 Dashboard en vivo: http://{dcfg['host']}:{dcfg['puerto']}/", flush=True)
+    return servidor
+
+
+def _vigilar_data_js(libro: LibroDashboard, intervalo: float = 1.0) -> None:
+    # Modo suelto: otros procesos siguen escribiendo data.js; se difunde sólo lo que cambió
+    ruta = os.path.join(DIR_DASHBOARD, "data.js")
+    mtime = None
+    while True:
+        try:
+            actual = os.stat(ruta).st_mtime_ns
+            if actual != mtime:
+                mtime = actual
+                libro.cargar(cargar_operaciones_dashboard())
+        except FileNotFoundError:
+            pass
+        time.sleep(intervalo)
+
+
+if __name__ == "__main__":
+    with open("config.json", "r", encoding="utf-8") as f:
+        dcfg = config_dashboard(json.load(f))
+    libro = LibroDashboard()
+    iniciar_en_hilo(libro, dcfg)
+    try:
+        _vigilar_data_js(libro)
+    except KeyboardInterrupt:
+        print("🛑 Interrumpido por usuario.", flush=True)
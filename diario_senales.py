@@ -0,0 +1,292 @@
+# diario_senales.py
+# Diario columnar append-only de cada candidato evaluado por bot_integrado.
+# Cada fila es un registro de esquema fijo (array estructurado NumPy): valores de AT,
+# veredicto IA, override, penalización, confianza final y la decisión tomada
+# (aceptada o motivo de descarte). Las filas se acumulan en memoria durante el ciclo
+# y se vuelcan al final en un único write binario por día:
+#   diario_senales/senales-v1-AAAAMMDD[-sufijo].bin
+# Consulta offline:
+#   python diario_senales.py resumen [--desde 2026-10-01] [--hasta ...] [--simbolo BTCUSDT]
+#   python diario_senales.py ultimos [--n 50] [--decision antiflood]
+
+import argparse
+import glob
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from utils import seccion_config
+
+DIRECTORIO = "diario_senales"
+VERSION_ESQUEMA = 1
+
+# Decisiones (columna `decision`)
+ACEPTADA = 0
+SIN_DATOS = 1
+SIN_VELA_NUEVA = 2
+FUERZA_MINIMA = 3
+VEREDICTO_NO = 4
+ANTIFLOOD = 5
+FILTRO_FUERZA = 6
+FILTRO_CONFIANZA = 7
+FILTRO_INCONSISTENCIA = 8
+ERROR = 9
+EXPIRADA = 10  # candidato de un worker que llegó después del timeout de su ciclo
+
+DECISIONES = {
+    ACEPTADA: "aceptada",
+    SIN_DATOS: "sin_datos",
+    SIN_VELA_NUEVA: "sin_vela_nueva",
+    FUERZA_MINIMA: "fuerza_minima",
+    VEREDICTO_NO: "veredicto_no",
+    ANTIFLOOD: "antiflood",
+    FILTRO_FUERZA: "filtro_fuerza",
+    FILTRO_CONFIANZA: "filtro_confianza",
+    FILTRO_INCONSISTENCIA: "filtro_inconsistencia",
+    ERROR: "error",
+    EXPIRADA: "expirada",
+}
+_CODIGO_DECISION = {v: k for k, v in DECISIONES.items()}
+
+FUERZAS = {"Débil": 1, "Media": 2, "Fuerte": 3}
+_NOMBRE_FUERZA = {v: k for k, v in FUERZAS.items()}
+
+ESQUEMA = np.dtype([
+    ("ts_ms", "<i8"),
+    ("simbolo", "S16"),
+    ("intervalo", "S4"),
+    ("decision", "u1"),
+    ("precio", "<f8"),
+    ("rsi", "<f4"),
+    ("macd", "<f4"),
+    ("ema_short", "<f8"),
+    ("ema_long", "<f8"),
+    ("atr_pct", "<f4"),
+    ("volumen_rel", "<f4"),
+    ("fuerza_at", "i1"),
+    ("patron", "S24"),
+    ("patron_dir", "i1"),
+    ("confluencia_mtf", "<f4"),
+    ("ia_veredicto", "i1"),    # 1 = Sí, 0 = No, -1 = sin IA
+    ("ia_conf", "<f4"),
+    ("override", "?"),
+    ("alto_riesgo", "?"),
+    ("conf", "<f4"),           # confianza tras override (la que clasifica fuerza_conf)
+    ("fuerza_conf", "i1"),
+    ("penalizacion", "<f4"),
+    ("conf_final", "<f4"),     # confiabilidad del payload tras penalizaciones
+])
+
+_CAPACIDAD_INICIAL = 256
+
+
+def config_diario(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "diario")
+    return {
+        "activo": bool(raw.get("activo", True)),
+        "directorio": str(raw.get("directorio", DIRECTORIO)),
+    }
+
+
+def decision_de_filtro(motivo: str) -> int:
+    # Traduce meta["motivo"] de utils.deberia_enviar_senal a un código de decisión
+    if motivo.startswith("Fuerza"):
+        return FILTRO_FUERZA
+    if motivo.startswith("Confianza"):
+        return FILTRO_CONFIANZA
+    return FILTRO_INCONSISTENCIA
+
+
+def nueva_fila(simbolo: str, intervalo: str) -> Dict[str, Any]:
+    # Fila parcial; bot_integrado la completa a medida que avanza la evaluación
+    return {"simbolo": simbolo, "intervalo": intervalo, "decision": ERROR}
+
+
+def _num(valor: Any) -> float:
+    # Valores de la IA pueden llegar como None o texto: nunca deben cortar el registro
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _texto(valor: Any, largo: int) -> bytes:
+    return str(valor).encode("utf-8")[:largo]
+
+
+class DiarioSenales:
+
+    def __init__(self, directorio: str = DIRECTORIO, sufijo: str = ""):
+        self.directorio = directorio
+        self.sufijo = sufijo  # distingue procesos que escriben a la vez
+        self._buf = np.zeros(_CAPACIDAD_INICIAL, dtype=ESQUEMA)
+        self._n = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._n
+
+    def configurar(self, directorio: Optional[str] = None, sufijo: Optional[str] = None) -> None:
+        if directorio is not None:
+            self.directorio = directorio
+        if sufijo is not None:
+            self.sufijo = sufijo
+
+    def registrar(self, fila: Dict[str, Any]) -> None:
+        at = fila.get("at") or {}
+        ia = fila.get("ia") or {}
+        with self._lock:
+            if self._n == len(self._buf):
+                self._buf = np.resize(self._buf, len(self._buf) * 2)
+            r = self._buf[self._n]
+            r["ts_ms"] = int(time.time() * 1000)
+            r["simbolo"] = _texto(fila["simbolo"], 16)
+            r["intervalo"] = _texto(fila["intervalo"], 4)
+            r["decision"] = fila["decision"]
+            r["precio"] = _num(at.get("precio_actual"))
+            r["rsi"] = _num(at.get("rsi"))
+            r["macd"] = _num(at.get("macd"))
+            r["ema_short"] = _num(at.get("ema_short"))
+            r["ema_long"] = _num(at.get("ema_long"))
+            r["atr_pct"] = _num(at.get("atr_pct"))
+            r["volumen_rel"] = _num(at.get("volumen_rel"))
+            r["fuerza_at"] = FUERZAS.get(at.get("fuerza"), 0)
+            r["patron"] = _texto(at.get("patron", ""), 24)
+            patron_dir = _num(at.get("patron_direccion", 0))
+            r["patron_dir"] = 0 if np.isnan(patron_dir) else int(patron_dir)
+            r["confluencia_mtf"] = _num(at.get("confluencia_mtf"))
+            veredicto = ia.get("veredicto")
+            r["ia_veredicto"] = -1 if veredicto is None else int(veredicto == "Sí")
+            r["ia_conf"] = _num(ia.get("confiabilidad"))
+            r["override"] = bool(fila.get("override", False))
+            r["alto_riesgo"] = bool(fila.get("alto_riesgo", False))
+            r["conf"] = _num(fila.get("conf"))
+            r["fuerza_conf"] = FUERZAS.get(fila.get("fuerza_conf"), 0)
+            r["penalizacion"] = _num(fila.get("penalizacion"))
+            r["conf_final"] = _num(fila.get("conf_final"))
+            self._n += 1
+
+    def _ruta(self, ts_ms: int) -> str:
+        dia = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime("%Y%m%d")
+        sufijo = f"-{self.sufijo}" if self.sufijo else ""
+        return os.path.join(self.directorio, f"senales-v{VERSION_ESQUEMA}-{dia}{sufijo}.bin")
+
+    def volcar(self) -> int:
+        # Un append binario por día presente en el lote (normalmente uno por ciclo)
+        with self._lock:
+            lote = self._buf[:self._n].copy()
+            self._n = 0
+        if not len(lote):
+            return 0
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            dias = lote["ts_ms"] // 86_400_000
+            for dia in np.unique(dias):
+                parte = lote[dias == dia]
+                with open(self._ruta(int(parte["ts_ms"][0])), "ab") as f:
+                    f.write(parte.tobytes())
+        except Exception as e:
+            print(f"⚠️ [DIARIO] No se pudo volcar el diario de señales: {e}", flush=True)
+            return 0
+        return len(lote)
+
+
+DIARIO = DiarioSenales()
+
+
+# ========================
+# API de consulta
+# ========================
+
+def _dia_de_ruta(ruta: str) -> str:
+    return os.path.basename(ruta).split("-")[2][:8]
+
+
+def leer(desde: Optional[str] = None, hasta: Optional[str] = None,
+         directorio: str = DIRECTORIO) -> np.ndarray:
+    # desde/hasta: fechas ISO (AAAA-MM-DD) inclusivas, en UTC
+    patron = os.path.join(directorio, f"senales-v{VERSION_ESQUEMA}-*.bin")
+    d = desde.replace("-", "") if desde else "00000000"
+    h = hasta.replace("-", "") if hasta else "99999999"
+    partes = []
+    for ruta in sorted(glob.glob(patron)):
+        if not d <= _dia_de_ruta(ruta) <= h:
+            continue
+        n = os.path.getsize(ruta) // ESQUEMA.itemsize  # descarta un registro truncado al final
+        partes.append(np.fromfile(ruta, dtype=ESQUEMA, count=n))
+    if not partes:
+        return np.zeros(0, dtype=ESQUEMA)
+    filas = np.concatenate(partes)
+    return filas[np.argsort(filas["ts_ms"], kind="stable")]
+
+
+def filtrar(filas: np.ndarray, simbolo: Optional[str] = None, decision: Optional[str] = None,
+            desde_ms: Optional[int] = None, hasta_ms: Optional[int] = None) -> np.ndarray:
+    m = np.ones(len(filas), dtype=bool)
+    if simbolo:
+        m &= filas["simbolo"] == simbolo.upper().encode("utf-8")
+    if decision:
+        m &= filas["decision"] == _CODIGO_DECISION[decision]
+    if desde_ms is not None:
+        m &= filas["ts_ms"] >= desde_ms
+    if hasta_ms is not None:
+        m &= filas["ts_ms"] <= hasta_ms
+    return filas[m]
+
+
+def resumen_decisiones(filas: np.ndarray) -> Dict[str, int]:
+    conteo = np.bincount(filas["decision"], minlength=len(DECISIONES))
+    return {DECISIONES[i]: int(c) for i, c in enumerate(conteo) if c}
+
+
+def resumen_por_simbolo(filas: np.ndarray) -> Dict[str, Dict[str, int]]:
+    resumen: Dict[str, Counter] = {}
+    for simbolo, decision in zip(filas["simbolo"].tolist(), filas["decision"].tolist()):
+        resumen.setdefault(simbolo.decode("utf-8"), Counter())[DECISIONES[decision]] += 1
+    return {s: dict(c) for s, c in sorted(resumen.items())}
+
+
+def a_dataframe(filas: np.ndarray):
+    import pandas as pd
+    df = pd.DataFrame(filas)
+    for col in ("simbolo", "intervalo", "patron"):
+        df[col] = df[col].str.decode("utf-8")
+    df["decision"] = df["decision"].map(DECISIONES)
+    for col in ("fuerza_at", "fuerza_conf"):
+        df[col] = df[col].map(_NOMBRE_FUERZA)
+    df["ts"] = pd.to_datetime(df["ts_ms"], unit="ms", utc=True)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta del diario de señales")
+    parser.add_argument("comando", choices=["resumen", "ultimos"])
+    parser.add_argument("--dir", default=DIRECTORIO)
+    parser.add_argument("--desde")
+    parser.add_argument("--hasta")
+    parser.add_argument("--simbolo")
+    parser.add_argument("--decision", choices=list(_CODIGO_DECISION))
+    parser.add_argument("--n", type=int, default=30)
+    args = parser.parse_args()
+
+    filas = filtrar(leer(args.desde, args.hasta, args.dir), args.simbolo, args.decision)
+    print(f"📒 {len(filas)} candidatos en el diario", flush=True)
+    if args.comando == "resumen":
+        for decision, n in sorted(resumen_decisiones(filas).items(), key=lambda x: -x[1]):
+            print(f"  {decision:<22} {n}")
+        if not args.simbolo:
+            for simbolo, conteo in resumen_por_simbolo(filas).items():
+                print(f"  {simbolo:<12} {conteo}")
+        return
+    cols = ["ts", "simbolo", "decision", "precio", "rsi", "ia_veredicto", "ia_conf",
+            "conf", "fuerza_conf", "penalizacion", "conf_final", "patron"]
+    print(a_dataframe(filas[-args.n:])[cols].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
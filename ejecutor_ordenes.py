@@ -0,0 +1,300 @@
+# ejecutor_ordenes.py
+# Camino de ejecución de baja latencia para señales confirmadas en Telegram.
+# - Sesión HTTP firmada persistente (keep-alive) contra Binance Spot.
+# - Offset de hora del servidor cacheado (se resincroniza cada N segundos o ante -1021).
+# - Filtros del símbolo (LOT_SIZE, PRICE_FILTER, NOTIONAL) cacheados: la cantidad se
+#   precalcula al emitir la señal, así la confirmación envía una única request.
+# - Registra latencia confirmación→fill y slippage contra precio_actual por orden.
+
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN
+from typing import Dict, Any, Optional
+from urllib.parse import urlencode
+
+import requests
+from dotenv import load_dotenv
+
+from gobernador_peso import GOBERNADOR, PRIORIDAD_ORDEN
+from utils import seccion_config
+
+load_dotenv()
+
+RUTA_METRICAS = "metricas_ordenes.jsonl"
+ERROR_TIMESTAMP = -1021
+
+
+def config_ejecucion(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "ejecucion")
+    return {
+        "recv_window_ms": int(raw.get("recv_window_ms", 5000)),
+        "refresco_tiempo_segundos": float(raw.get("refresco_tiempo_segundos", 300)),
+        "ruta_metricas": str(raw.get("ruta_metricas", RUTA_METRICAS)),
+    }
+
+
+class ErrorOrden(Exception):
+    pass
+
+
+def _json_respuesta(r, contexto: str) -> Dict[str, Any]:
+    # Ante errores de gateway Binance puede devolver HTML o un cuerpo vacío
+    try:
+        data = r.json()
+    except ValueError:
+        raise ErrorOrden(f"{contexto}: respuesta no JSON (HTTP {r.status_code}): {r.text[:200]!r}")
+    if not isinstance(data, dict):
+        raise ErrorOrden(f"{contexto}: respuesta inesperada (HTTP {r.status_code})")
+    return data
+
+
+def _cuantizar(valor: Decimal, paso: Decimal) -> Decimal:
+    if paso <= 0:
+        return valor
+    return (valor / paso).to_integral_value(rounding=ROUND_DOWN) * paso
+
+
+class EjecutorOrdenes:
+
+    def __init__(self, ecfg: Optional[Dict[str, Any]] = None):
+        self.ecfg = ecfg or config_ejecucion({})
+        self._api_key = os.getenv("BINANCE_API_KEY", "")
+        self._secret = os.getenv("BINANCE_API_SECRET", "").encode("utf-8")
+        self._sesion = requests.Session()
+        self._sesion.headers.update({"X-MBX-APIKEY": self._api_key})
+        self._offset_ms = 0
+        self._offset_ts = 0.0
+        self._filtros: Dict[str, Dict[str, Decimal]] = {}
+        self._preparadas: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._hilo_refresco: Optional[threading.Thread] = None
+
+    # ---------- Hora del servidor y filtros ----------
+
+    def sincronizar_hora(self) -> int:
+        t0 = time.time()
+        r = GOBERNADOR.get("/api/v3/time", prioridad=PRIORIDAD_ORDEN, timeout=5, sesion=self._sesion,
+                           deduplicar=False)
+        r.raise_for_status()
+        t1 = time.time()
+        server_time = _json_respuesta(r, "time").get("serverTime")
+        if server_time is None:
+            raise ErrorOrden("time: respuesta sin serverTime")
+        # Se asume latencia simétrica: la hora del servidor corresponde al punto medio
+        self._offset_ms = int(server_time - (t0 + t1) / 2 * 1000)
+        self._offset_ts = t1
+        GOBERNADOR.ajustar_reloj(self._offset_ms / 1000.0)
+        return self._offset_ms
+
+    def _timestamp_ms(self) -> int:
+        if time.time() - self._offset_ts > self.ecfg["refresco_tiempo_segundos"]:
+            self.sincronizar_hora()
+        return int(time.time() * 1000) + self._offset_ms
+
+    def calentar(self) -> None:
+        # Abre la conexión TLS y deja el offset listo antes de la primera confirmación;
+        # un hilo lo mantiene fresco para que _timestamp_ms nunca sincronice en caliente
+        self.sincronizar_hora()
+        if self._hilo_refresco is None:
+            self._hilo_refresco = threading.Thread(target=self._refrescar_hora, name="ejecutor-hora", daemon=True)
+            self._hilo_refresco.start()
+
+    def _refrescar_hora(self) -> None:
+        while True:
+            time.sleep(self.ecfg["refresco_tiempo_segundos"] * 0.8)
+            try:
+                self.sincronizar_hora()
+            except Exception as e:
+                print(f"⚠️ [EXEC] No se pudo resincronizar la hora: {e}", flush=True)
+
+    def filtros(self, simbolo: str) -> Dict[str, Decimal]:
+        if simbolo in self._filtros:
+            return self._filtros[simbolo]
+        r = GOBERNADOR.get("/api/v3/exchangeInfo", {"symbol": simbolo}, prioridad=PRIORIDAD_ORDEN,
+                           timeout=10, sesion=self._sesion)
+        r.raise_for_status()
+        simbolos = _json_respuesta(r, f"exchangeInfo {simbolo}").get("symbols") or []
+        if not simbolos:
+            raise ErrorOrden(f"exchangeInfo {simbolo}: símbolo desconocido")
+        info = simbolos[0]
+        f = {"step": Decimal("0"), "min_qty": Decimal("0"), "tick": Decimal("0"), "min_notional": Decimal("0")}
+        for flt in info.get("filters", []):
+            tipo = flt.get("filterType")
+            if tipo == "LOT_SIZE":
+                f["step"] = Decimal(flt["stepSize"]).normalize()
+                f["min_qty"] = Decimal(flt["minQty"])
+            elif tipo == "PRICE_FILTER":
+                f["tick"] = Decimal(flt["tickSize"]).normalize()
+            elif tipo in ("NOTIONAL", "MIN_NOTIONAL"):
+                f["min_notional"] = Decimal(flt.get("minNotional", "0"))
+        self._filtros[simbolo] = f
+        return f
+
+    def exportar_filtros(self) -> Dict[str, Dict[str, Decimal]]:
+        return dict(self._filtros)
+
+    def restaurar_filtros(self, filtros: Dict[str, Dict[str, Decimal]]) -> None:
+        for simbolo, f in filtros.items():
+            self._filtros.setdefault(simbolo, f)
+
+    # ---------- Preparación al emitir la señal ----------
+
+    def preparar_orden(self, id_orden: str, simbolo: str, monto_usdt: float, precio_ref: float,
+                       lado: str = "BUY") -> Dict[str, Any]:
+        f = self.filtros(simbolo)
+        precio = _cuantizar(Decimal(str(precio_ref)), f["tick"])
+        if precio <= 0:
+            raise ErrorOrden(f"{simbolo}: precio de referencia inválido ({precio_ref})")
+        cantidad = _cuantizar(Decimal(str(monto_usdt)) / precio, f["step"])
+        if cantidad < f["min_qty"] or cantidad <= 0:
+            raise ErrorOrden(f"{simbolo}: cantidad {cantidad} < minQty {f['min_qty']} para {monto_usdt} USDT")
+        if cantidad * precio < f["min_notional"]:
+            raise ErrorOrden(f"{simbolo}: nocional {cantidad * precio} < mínimo {f['min_notional']}")
+        preparada = {
+            "id": id_orden,
+            "simbolo": simbolo,
+            "lado": lado,
+            "cantidad": format(cantidad, "f"),
+            "precio_ref": float(precio_ref),
+            "preparada_ts": time.time(),
+        }
+        with self._lock:
+            self._preparadas[id_orden] = preparada
+        return preparada
+
+    # ---------- Ejecución tras la confirmación ----------
+
+    def _firmar(self, params: Dict[str, Any]) -> str:
+        query = urlencode(params)
+        firma = hmac.new(self._secret, query.encode("utf-8"), hashlib.sha256).hexdigest()
+        return f"{query}&signature={firma}"
+
+    def _enviar_orden(self, preparada: Dict[str, Any]) -> Dict[str, Any]:
+        params = {
+            "symbol": preparada["simbolo"],
+            "side": preparada["lado"],
+            "type": "MARKET",
+            "quantity": preparada["cantidad"],
+            "newClientOrderId": preparada["id"][-36:],
+            "newOrderRespType": "FULL",
+            "recvWindow": self.ecfg["recv_window_ms"],
+            "timestamp": self._timestamp_ms(),
+        }
+        r = GOBERNADOR.post(
+            "/api/v3/order",
+            data=self._firmar(params),
+            prioridad=PRIORIDAD_ORDEN,
+            sesion=self._sesion,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            timeout=10,
+        )
+        if r.status_code != 200:
+            # Los rechazos de Binance traen {code, msg}; el código -1021 dispara la resincronización
+            try:
+                data = _json_respuesta(r, "order")
+            except ErrorOrden:
+                r.raise_for_status()
+                raise
+            raise ErrorOrden(f"{data.get('code')}: {data.get('msg')}")
+        return _json_respuesta(r, "order")
+
+    def ejecutar_confirmada(self, id_orden: str, ts_confirmacion: Optional[float] = None,
+                            preparada: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        ts_confirmacion = ts_confirmacion or time.time()
+        with self._lock:
+            cacheada = self._preparadas.pop(id_orden, None)
+        preparada = preparada or cacheada
+        if preparada is None:
+            raise ErrorOrden(f"Orden {id_orden} sin preparar")
+        try:
+            orden = self._enviar_orden(preparada)
+        except ErrorOrden as e:
+            if not str(e).startswith(f"{ERROR_TIMESTAMP}:"):
+                raise
+            print("⚠️ [EXEC] Timestamp fuera de recvWindow, resincronizando hora…", flush=True)
+            self.sincronizar_hora()
+            orden = self._enviar_orden(preparada)
+        ts_fill = time.time()
+
+        fills = orden.get("fills") or []
+        qty = sum(float(f["qty"]) for f in fills) or float(orden.get("executedQty", 0))
+        nocional = sum(float(f["price"]) * float(f["qty"]) for f in fills) or float(orden.get("cummulativeQuoteQty", 0))
+        precio_medio = nocional / qty if qty else 0.0
+        comision = sum(float(f.get("commission", 0)) for f in fills)
+        signo = 1 if preparada["lado"] == "BUY" else -1
+        slippage_bps = signo * (precio_medio / preparada["precio_ref"] - 1) * 10_000 if precio_medio else None
+
+        resultado = {
+            "id": id_orden,
+            "simbolo": preparada["simbolo"],
+            "lado": preparada["lado"],
+            "cantidad": qty,
+            "precio_medio": precio_medio,
+            "comision": comision,
+            "precio_ref": preparada["precio_ref"],
+            "slippage_bps": round(slippage_bps, 2) if slippage_bps is not None else None,
+            "latencia_ms": round((ts_fill - ts_confirmacion) * 1000, 1),
+            "order_id": orden.get("orderId"),
+            "ts_fill": ts_fill,
+        }
+        self._registrar_metrica(resultado)
+        print(
+            f"⚡ [EXEC] {resultado['simbolo']} {resultado['lado']} qty={qty} @ {precio_medio:.8f} "
+            f"latencia={resultado['latencia_ms']}ms slippage={resultado['slippage_bps']}bps",
+            flush=True,
+        )
+        return resultado
+
+    def _registrar_metrica(self, resultado: Dict[str, Any]) -> None:
+        try:
+            with open(self.ecfg["ruta_metricas"], "a", encoding="utf-8") as f:
+                f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"⚠️ [EXEC] No se pudo registrar métrica: {e}", flush=True)
+
+
+def ejecutar_orden_pendiente(pendiente: Dict[str, Any], ts_confirmacion: Optional[float] = None) -> Dict[str, Any]:
+    # Para el handler de confirmación de Telegram: ejecuta y registra la operación
+    from utils import _append_operacion_dashboard, trailing_a_fraccion
+    ts_confirmacion = ts_confirmacion or time.time()
+    ejecutor = obtener_ejecutor()
+    preparada = pendiente.get("orden_preparada")
+    if preparada is None:
+        preparada = ejecutor.preparar_orden(pendiente["id"], pendiente["simbolo"],
+                                            pendiente["monto"], pendiente["precio_actual"])
+    res = ejecutor.ejecutar_confirmada(pendiente["id"], ts_confirmacion, preparada)
+    operacion = {
+        "id": pendiente["id"],
+        "simbolo": pendiente["simbolo"],
+        "precio_entrada": res["precio_medio"],
+        "cantidad": res["cantidad"],
+        "sl": pendiente.get("sl"),
+        "tp": pendiente.get("tp"),
+        "confiabilidad": pendiente.get("confiabilidad"),
+        "estado": "Confirmada",
+        "timestamp": int(res["ts_fill"] * 1000),
+    }
+    trailing = trailing_a_fraccion(pendiente.get("trailing_pct"))
+    if trailing is not None:
+        operacion["trailing_pct"] = trailing
+    _append_operacion_dashboard(pendiente["simbolo"], operacion)
+    return res
+
+
+_EJECUTOR: Optional[EjecutorOrdenes] = None
+
+
+def obtener_ejecutor() -> EjecutorOrdenes:
+    global _EJECUTOR
+    if _EJECUTOR is None:
+        try:
+            with open("config.json", "r", encoding="utf-8") as f:
+                ecfg = config_ejecucion(json.load(f))
+        except Exception:
+            ecfg = config_ejecucion({})
+        _EJECUTOR = EjecutorOrdenes(ecfg)
+    return _EJECUTOR
@@ -1,19 +1,27 @@
 import json
 import time
 from pathlib import Path
-from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
-import telebot
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+from bus_eventos import BUS, EVENTO_SENAL_EMITIDA
 
-TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-CHAT_ID = int(os.getenv("TELEGRAM_CHAT_ID"))
-bot = telebot.TeleBot(TOKEN)
+load_dotenv()
 
 ORDENES_PATH = Path("ordenes_pendientes.json")
 
+_bot = None
+_chat_id = None
+
+def _telegram():
+    # TeleBot y credenciales se resuelven en el primer envío, no al importar el módulo
+    global _bot, _chat_id
+    if _bot is None:
+        import telebot
+        _chat_id = int(os.getenv("TELEGRAM_CHAT_ID"))
+        _bot = telebot.TeleBot(os.getenv("TELEGRAM_BOT_TOKEN"))
+    return _bot, _chat_id
+
 def enviar_mensaje_con_botones(
     simbolo,
     precio_actual,
@@ -48,6 +56,7 @@ def enviar_mensaje_con_botones(
     if mensaje_ia:
         mensaje += f"\n\n🧠 *IA:*\n{mensaje_ia}"
 
+    from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
     markup = InlineKeyboardMarkup()
     markup.row_width = 2
     markup.add(
@@ -73,15 +82,29 @@ def enviar_mensaje_con_botones(
         "mensaje_ia": mensaje_ia
     }
 
-    ordenes = {}
-    if ORDENES_PATH.exists():
-        try:
-            ordenes = json.loads(ORDENES_PATH.read_text(encoding="utf-8"))
-        except Exception:
-            ordenes = {}
+    # Cantidad y filtros se resuelven ahora: al confirmar sólo queda enviar la orden
+    try:
+        from ejecutor_ordenes import obtener_ejecutor
+        payload["orden_preparada"] = obtener_ejecutor().preparar_orden(
+            id_orden, simbolo, float(monto_usdt), float(precio_actual)
+        )
+    except Exception as e:
+        print(f"⚠️ No se pudo preparar la orden de {simbolo}: {e}")
+
+    if BUS.activo():
+        # El supervisor guarda la orden pendiente en memoria y la persiste como snapshot
+        BUS.publicar(EVENTO_SENAL_EMITIDA, payload)
+    else:
+        ordenes = {}
+        if ORDENES_PATH.exists():
+            try:
+                ordenes = json.loads(ORDENES_PATH.read_text(encoding="utf-8"))
+            except Exception:
+                ordenes = {}
 
-    ordenes[id_orden] = payload
-    ORDENES_PATH.write_text(json.dumps(ordenes, indent=2, ensure_ascii=False), encoding="utf-8")
+        ordenes[id_orden] = payload
+        ORDENES_PATH.write_text(json.dumps(ordenes, indent=2, ensure_ascii=False), encoding="utf-8")
 
-    bot.send_message(CHAT_ID, mensaje, parse_mode="Markdown", reply_markup=markup)
+    bot, chat_id = _telegram()
+    bot.send_message(chat_id, mensaje, parse_mode="Markdown", reply_markup=markup)
     print(f"📩 Enviada señal a Telegram para {simbolo} (ID: {id_orden})")
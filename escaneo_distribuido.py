@@ -0,0 +1,267 @@
+# escaneo_distribuido.py
+# Modo coordinador/workers para universos de cientos de símbolos.
+# - Los símbolos se reparten entre N procesos worker con rendezvous hashing (HRW):
+#   la asignación es estable entre ciclos y al cambiar la lista o N sólo se mueve
+#   el mínimo de símbolos, así los buffers de velas de cada worker siguen calientes.
+# - El coordinador arma el plan del ciclo con planificador (prioridad y reparto en la
+#   ventana de la vela, lag) y cada worker sigue los turnos de su parte, saltando los
+#   símbolos sin vela cerrada nueva.
+# - Cada worker evalúa su parte (velas → AT → IA → fuerza/veredicto) y devuelve sólo
+#   los candidatos. Los que llegan tarde (ciclo vencido) se registran como "expirada". El peso REST lo regula gobernador_peso en cada proceso: todos leen
+#   X-MBX-USED-WEIGHT-1M, que es por IP, y cada worker además se limita a 1/N del
+#   techo de escaneo con sus propias reservas.
+# - El coordinador (proceso principal) aplica el antiflood, deberia_enviar_senal y
+#   el envío a Telegram de forma centralizada.
+# Se activa con distribuido.workers > 0 en config.json; bot_integrado.ejecutar_ciclo
+# delega aquí, así funciona tanto con start_loop como bajo el supervisor.
+
+import hashlib
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+import diario_senales as DS
+import planificador as PLAN
+from utils import seccion_config
+
+
+def config_distribuido(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "distribuido")
+    return {
+        "workers": max(0, int(raw.get("workers", 0))),
+        "timeout_ciclo_segundos": float(raw.get("timeout_ciclo_segundos", 600)),
+    }
+
+
+def _peso_hrw(simbolo: str, worker: int) -> int:
+    # hash() de Python cambia entre procesos: se usa un digest estable
+    d = hashlib.blake2b(f"{worker}|{simbolo}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(d, "big")
+
+
+def asignar_worker(simbolo: str, n_workers: int) -> int:
+    return max(range(n_workers), key=lambda w: _peso_hrw(simbolo, w))
+
+
+def repartir(simbolos: List[str], n_workers: int) -> Dict[str, int]:
+    return {s: asignar_worker(s, n_workers) for s in simbolos}
+
+
+# ========================
+# Worker
+# ========================
+
+def _ruta_estado_worker(ruta: str, id_worker: int) -> str:
+    base, ext = os.path.splitext(ruta)
+    return f"{base}-w{id_worker}{ext}"
+
+
+def _bucle_worker(id_worker: int, tareas: "mp.Queue", resultados: "mp.Queue", acfg: Dict[str, Any]) -> None:
+    import bot_integrado as B
+    import estado_caliente
+    import gobernador_peso as GP
+
+    DS.DIARIO.configurar(sufijo=f"w{id_worker}")
+    ruta_estado = _ruta_estado_worker(acfg["ruta"], id_worker)
+    if acfg["activo"]:
+        estado_caliente.restaurar(ruta_estado, max_edad_horas=acfg["max_edad_horas"])
+    print(f"🧩 [DIST] Worker {id_worker} listo (pid {os.getpid()}).", flush=True)
+    try:
+        while True:
+            tarea = tareas.get()
+            if tarea is None:
+                break
+            ciclo, cfg, turnos, base, cerrada_ms = tarea
+            GP.GOBERNADOR.configurar(GP.config_gobernador(cfg), participantes=config_distribuido(cfg)["workers"])
+            inicio = time.time()
+            candidatos = 0
+            omitidos = 0
+            for desfase, _, simbolo in turnos:
+                # La vela analizada por símbolo vive en el planificador de este worker
+                if cerrada_ms is not None and not PLAN.PLANIFICADOR.pendientes([simbolo], cerrada_ms):
+                    omitidos += 1
+                    continue
+                pausa = base + desfase - time.time()
+                if pausa > 0:
+                    time.sleep(pausa)
+                fila = DS.nueva_fila(simbolo, cfg.get("intervalo", "1m"))
+                candidato = None
+                try:
+                    print(f"🔍 [w{id_worker}] Analizando {simbolo}…", flush=True)
+                    candidato = B._evaluar_simbolo(simbolo, cfg, fila)
+                except Exception as e:
+                    print(f"❌ [w{id_worker}] {simbolo}: {e}", flush=True)
+                    traceback.print_exc()
+                if candidato is not None:
+                    # La fila viaja con el candidato y la registra el coordinador
+                    resultados.put(("candidato", id_worker, ciclo, candidato))
+                    candidatos += 1
+                else:
+                    B._registrar_fila(fila, cfg)
+            dcfg = DS.config_diario(cfg)
+            if dcfg["activo"]:
+                DS.DIARIO.configurar(directorio=dcfg["directorio"])
+                DS.DIARIO.volcar()
+            resultados.put(("fin", id_worker, ciclo, {
+                "simbolos": len(turnos),
+                "candidatos": candidatos,
+                "omitidos": omitidos,
+                "duracion_s": round(time.time() - inicio, 2),
+            }))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if acfg["activo"]:
+            try:
+                estado_caliente.guardar(ruta_estado)
+            except Exception as e:
+                print(f"⚠️ [DIST] Worker {id_worker}: no se pudo guardar el estado: {e}", flush=True)
+
+
+# ========================
+# Coordinador
+# ========================
+
+class Coordinador:
+
+    def __init__(self):
+        self._ctx = mp.get_context("spawn")  # fork no es seguro con hilos (supervisor, dashboard)
+        self._workers: List[Tuple[Any, Any]] = []  # (Process, cola de tareas) por id de worker
+        self._resultados = None
+        self._asignacion: Dict[str, int] = {}
+        self._ciclo = 0
+        self._expirar: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def _iniciar_worker(self, id_worker: int, acfg: Dict[str, Any]) -> Tuple[Any, Any]:
+        tareas = self._ctx.Queue()
+        p = self._ctx.Process(target=_bucle_worker, args=(id_worker, tareas, self._resultados, acfg),
+                              name=f"scanner-w{id_worker}", daemon=True)
+        p.start()
+        return p, tareas
+
+    def _ajustar_workers(self, n: int, cfg: Dict[str, Any]) -> None:
+        from estado_caliente import config_arranque
+        acfg = config_arranque(cfg)
+        if self._resultados is None:
+            self._resultados = self._ctx.Queue()
+        while len(self._workers) > n:
+            p, tareas = self._workers.pop()
+            tareas.put(None)
+            p.join(timeout=10)
+        for i, (p, _) in enumerate(self._workers):
+            if not p.is_alive():
+                print(f"⚠️ [DIST] Worker {i} caído (exit {p.exitcode}). Reiniciando…", flush=True)
+                self._workers[i] = self._iniciar_worker(i, acfg)
+        while len(self._workers) < n:
+            self._workers.append(self._iniciar_worker(len(self._workers), acfg))
+
+    def _registrar_expirado(self, candidato: Dict[str, Any]) -> None:
+        if self._expirar is None:
+            return
+        fila = candidato["fila"]
+        fila["decision"] = DS.EXPIRADA
+        print(f"⌛ [DIST] Candidato {candidato['simbolo']} llegó tras el timeout de su ciclo: expirado.", flush=True)
+        self._expirar(fila)
+
+    def ejecutar_ciclo(self, simbolos: List[str], cfg: Dict[str, Any],
+                       procesar_candidato: Callable[[Dict[str, Any], Dict[str, Any]], None],
+                       registrar_fila: Callable[[Dict[str, Any], Dict[str, Any]], None],
+                       detener: Optional[threading.Event] = None) -> Dict[str, Any]:
+        self._expirar = lambda fila: registrar_fila(fila, cfg)
+        dcfg = config_distribuido(cfg)
+        n = dcfg["workers"]
+        self._ajustar_workers(n, cfg)
+
+        asignacion = repartir(simbolos, n)
+        movidos = sum(1 for s, w in asignacion.items() if s in self._asignacion and self._asignacion[s] != w)
+        nuevos = sum(1 for s in asignacion if s not in self._asignacion)
+        quitados = sum(1 for s in self._asignacion if s not in asignacion)
+        if self._asignacion and (movidos or nuevos or quitados):
+            print(f"🔀 [DIST] Rebalanceo: {movidos} movidos, {nuevos} nuevos, {quitados} quitados.", flush=True)
+        self._asignacion = asignacion
+
+        # Mismo plan que el ciclo secuencial: prioridad y reparto en la ventana de la vela
+        intervalo = cfg.get("intervalo", "1m")
+        alineado = PLAN.config_planificador(cfg)["alineado_a_velas"]
+        inicio = time.time()
+        lag = PLAN.PLANIFICADOR.lag(inicio)
+        cerrada_ms = PLAN.PLANIFICADOR.vela_cerrada_ms(intervalo) if alineado else None
+        turnos = PLAN.PLANIFICADOR.turnos(simbolos, cfg)
+        partes: Dict[int, List[Tuple[float, int, str]]] = {}
+        for turno in turnos:
+            partes.setdefault(asignacion[turno[2]], []).append(turno)
+        self._ciclo += 1
+        for w, parte in partes.items():
+            self._workers[w][1].put((self._ciclo, cfg, parte, inicio, cerrada_ms))
+
+        pendientes = set(partes)
+        candidatos = 0
+        omitidos = 0
+        duraciones: Dict[int, float] = {}
+        while pendientes:
+            if detener is not None and detener.is_set():
+                break
+            if time.time() - inicio > dcfg["timeout_ciclo_segundos"]:
+                print(f"⚠️ [DIST] Timeout de ciclo: sin respuesta de los workers {sorted(pendientes)}.", flush=True)
+                break
+            try:
+                tipo, w, ciclo, dato = self._resultados.get(timeout=5)
+            except queue.Empty:
+                caidos = {w for w in pendientes if not self._workers[w][0].is_alive()}
+                if caidos:
+                    print(f"⚠️ [DIST] Workers caídos durante el ciclo: {sorted(caidos)}.", flush=True)
+                    pendientes -= caidos
+                continue
+            if ciclo != self._ciclo:
+                # Resto de un ciclo anterior cortado por timeout
+                if tipo == "candidato":
+                    self._registrar_expirado(dato)
+                continue
+            if tipo == "candidato":
+                candidatos += 1
+                procesar_candidato(dato, cfg)
+            else:
+                pendientes.discard(w)
+                duraciones[w] = dato["duracion_s"]
+                omitidos += dato["omitidos"]
+
+        reporte = {
+            "workers": n,
+            "simbolos": len(simbolos),
+            "candidatos": candidatos,
+            "duracion_s": round(time.time() - inicio, 2),
+            "worker_mas_lento_s": max(duraciones.values()) if duraciones else None,
+        }
+        print(f"🧩 [DIST] Ciclo {self._ciclo}: {reporte}", flush=True)
+        if alineado:
+            urgentes = sum(1 for _, p, _ in turnos if p < PLAN.PRIORIDAD_NORMAL)
+            PLAN.PLANIFICADOR.reportar(intervalo, lag, urgentes, len(turnos) - urgentes, omitidos, inicio)
+        return reporte
+
+    def detener(self) -> None:
+        for p, tareas in self._workers:
+            tareas.put(None)
+        for p, _ in self._workers:
+            p.join(timeout=15)
+            if p.is_alive():
+                p.terminate()
+        self._workers = []
+        # Candidatos que quedaron en la cola sin ciclo que los espere
+        expirados = 0
+        while self._resultados is not None:
+            try:
+                tipo, _, _, dato = self._resultados.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                break
+            if tipo == "candidato":
+                self._registrar_expirado(dato)
+                expirados += 1
+        if expirados:
+            DS.DIARIO.volcar()
+
+
+COORDINADOR = Coordinador()
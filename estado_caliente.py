@@ -0,0 +1,151 @@
+# estado_caliente.py
+# Snapshot del estado en memoria para reinicios en caliente.
+# Al apagar (y cada `snapshot_segundos` bajo el supervisor) se guarda en un pickle:
+#   - buffers de velas base/timeframes de MTF.AGREGADOR (los indicadores se recalculan
+#     sobre ellos en milisegundos, así que no hace falta guardarlos aparte);
+#   - última vela analizada por símbolo del planificador (no se re-señala la misma vela);
+#   - max_price/stop de las posiciones abiertas del libro de trailing_manager;
+#   - filtros de símbolo cacheados por el ejecutor de órdenes.
+# Las órdenes pendientes y las operaciones ya se persisten en ordenes_pendientes.json y
+# Dashboard/data.js, y el historial antiflood en su propio archivo: no se duplican aquí.
+# Al arrancar se restaura, y el primer ciclo sólo pide a Binance las velas que faltan.
+# Los buffers de velas (DataFrames) van en un pickle anidado: cargar el snapshot no
+# importa pandas, así posiciones y planificador se reponen antes del primer tick de
+# trailing y las velas después, cuando el scanner ya cargó pandas.
+
+import os
+import pickle
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+from utils import clave_operacion, escribir_bytes_atomico, seccion_config
+
+RUTA_SNAPSHOT = "estado_caliente.pkl"
+VERSION = 2
+
+# Velas cargadas de un snapshot y aún no aplicadas (multi_timeframe sin importar todavía):
+# un guardado en ese intervalo las conserva en vez de perderlas
+_velas_pendientes: Optional[Dict[str, Any]] = None
+
+
+def config_arranque(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "arranque")
+    return {
+        "activo": bool(raw.get("activo", True)),
+        "ruta": str(raw.get("ruta", RUTA_SNAPSHOT)),
+        "snapshot_segundos": float(raw.get("snapshot_segundos", 300)),
+        "max_edad_horas": float(raw.get("max_edad_horas", 24)),
+    }
+
+
+def _capturar() -> Dict[str, Any]:
+    # Sólo se toca lo que ya está importado: guardar no debe cargar módulos pesados
+    estado: Dict[str, Any] = {"version": VERSION, "ts": time.time()}
+    mtf = sys.modules.get("multi_timeframe")
+    if mtf is not None:
+        velas = mtf.AGREGADOR.exportar()
+        estado["n_velas"] = len(velas["base"])
+        estado["velas"] = pickle.dumps(velas, protocol=pickle.HIGHEST_PROTOCOL)
+    elif _velas_pendientes is not None:
+        estado.update(_velas_pendientes)
+    plan = sys.modules.get("planificador")
+    if plan is not None:
+        estado["planificador"] = plan.PLANIFICADOR.exportar()
+    tm = sys.modules.get("trailing_manager")
+    if tm is not None:
+        # Bajo el lock del libro: el trailing puede estar cerrando o compactando en otro hilo
+        estado["posiciones"] = tm.LIBRO.instantanea()
+    ej = sys.modules.get("ejecutor_ordenes")
+    if ej is not None and ej._EJECUTOR is not None:
+        estado["filtros"] = ej._EJECUTOR.exportar_filtros()
+    return estado
+
+
+def guardar(ruta: str = RUTA_SNAPSHOT) -> None:
+    inicio = time.time()
+    estado = _capturar()
+    escribir_bytes_atomico(ruta, pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL))
+    print(f"💾 [ARRANQUE] Estado caliente guardado: {estado.get('n_velas', 0)} símbolos con velas, "
+          f"{len(estado.get('posiciones', []))} posiciones ({(time.time() - inicio) * 1000:.0f}ms)", flush=True)
+
+
+def _fusionar_posiciones(posiciones: List[Dict[str, Any]], operaciones: List[Dict[str, Any]]) -> int:
+    # Sólo se recupera el máximo alcanzado de las posiciones que siguen abiertas en data.js
+    guardadas = {clave_operacion(op): op for op in posiciones}
+    n = 0
+    for op in operaciones:
+        previa = guardadas.get(clave_operacion(op))
+        if previa is None or op.get("estado") != "Confirmada":
+            continue
+        max_previo = float(previa.get("max_price") or 0)
+        if max_previo > float(op.get("max_price") or 0):
+            op["max_price"] = max_previo
+            n += 1
+    return n
+
+
+def aplicar_velas(estado: Dict[str, Any]) -> int:
+    # Importa multi_timeframe (y pandas): bajo el supervisor corre en la tarea del scanner
+    global _velas_pendientes
+    if "velas" not in estado:
+        return 0
+    import multi_timeframe
+    _velas_pendientes = None
+    return multi_timeframe.AGREGADOR.restaurar(pickle.loads(estado["velas"]))
+
+
+def aplicar(estado: Dict[str, Any], operaciones: Optional[List[Dict[str, Any]]] = None,
+            velas: bool = True) -> Dict[str, int]:
+    # Repone en memoria un estado ya cargado (snapshot o cabecera de una sesión grabada).
+    # velas=False deja los buffers para aplicar_velas()
+    global _velas_pendientes
+    n_velas = 0
+    if velas:
+        n_velas = aplicar_velas(estado)
+    elif "velas" in estado:
+        _velas_pendientes = {"velas": estado["velas"], "n_velas": estado.get("n_velas", 0)}
+    if "planificador" in estado:
+        import planificador
+        planificador.PLANIFICADOR.restaurar(estado["planificador"])
+    n_pos = 0
+    if operaciones is not None and estado.get("posiciones"):
+        n_pos = _fusionar_posiciones(estado["posiciones"], operaciones)
+    if estado.get("filtros"):
+        from ejecutor_ordenes import obtener_ejecutor
+        obtener_ejecutor().restaurar_filtros(estado["filtros"])
+    return {"velas": n_velas, "posiciones": n_pos}
+
+
+def cargar(ruta: str = RUTA_SNAPSHOT, max_edad_horas: float = 24.0) -> Optional[Dict[str, Any]]:
+    # Lee y valida el snapshot sin aplicarlo; None = arranque en frío
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, "rb") as f:
+            estado = pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ [ARRANQUE] Snapshot ilegible, arranque en frío: {e}", flush=True)
+        return None
+    if not isinstance(estado, dict) or estado.get("version") != VERSION:
+        print("⚠️ [ARRANQUE] Snapshot de otra versión, arranque en frío.", flush=True)
+        return None
+    edad_h = (time.time() - estado.get("ts", 0)) / 3600.0
+    if edad_h > max_edad_horas:
+        print(f"⚠️ [ARRANQUE] Snapshot de hace {edad_h:.1f}h (> {max_edad_horas}h), arranque en frío.", flush=True)
+        return None
+    return estado
+
+
+def restaurar(ruta: str = RUTA_SNAPSHOT, operaciones: Optional[List[Dict[str, Any]]] = None,
+              max_edad_horas: float = 24.0) -> bool:
+    # `operaciones`: lista en memoria sobre la que se reponen los max_price
+    inicio = time.time()
+    estado = cargar(ruta, max_edad_horas)
+    if estado is None:
+        return False
+    n = aplicar(estado, operaciones)
+    edad_min = (time.time() - estado.get("ts", 0)) / 60.0
+    print(f"♻️ [ARRANQUE] Estado caliente restaurado (hace {edad_min:.0f} min): {n['velas']} símbolos con velas, "
+          f"{n['posiciones']} posiciones con max_price recuperado ({(time.time() - inicio) * 1000:.0f}ms)", flush=True)
+    return True
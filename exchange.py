@@ -0,0 +1,193 @@
+# exchange.py
+# Interfaz de exchange enchufable para la lógica de posiciones.
+# - ExchangeBinance: Binance Spot real vía python-binance (cliente creado a demanda).
+# - ExchangeSimulado: exchange en proceso para paper trading y pruebas de carga;
+#   reproduce velas guardadas a una velocidad configurable y llena órdenes de mercado
+#   con slippage y comisión configurables.
+# trailing_manager y utils.obtener_precio_actual usan obtener_exchange().
+
+import csv
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from grabacion import SESION
+from gobernador_peso import GOBERNADOR, PRIORIDAD_ORDEN, PRIORIDAD_POSICION, peso_endpoint
+
+
+class Exchange(ABC):
+
+    @abstractmethod
+    def precio(self, simbolo: str) -> float:
+        ...
+
+    @abstractmethod
+    def orden_mercado(self, simbolo: str, lado: str, cantidad: float) -> Dict[str, Any]:
+        # Devuelve un dict con el formato de respuesta FULL de Binance (fills incluidos)
+        ...
+
+    def vender_mercado(self, simbolo: str, cantidad: float) -> Dict[str, Any]:
+        return self.orden_mercado(simbolo, "SELL", cantidad)
+
+    def comprar_mercado(self, simbolo: str, cantidad: float) -> Dict[str, Any]:
+        return self.orden_mercado(simbolo, "BUY", cantidad)
+
+
+class ExchangeBinance(Exchange):
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from binance.client import Client
+                    self._client = Client(os.getenv("BINANCE_API_KEY"), os.getenv("BINANCE_API_SECRET"))
+        return self._client
+
+    def precio(self, simbolo: str) -> float:
+        # Endpoint público: va directo por el gobernador (prioridad de posición y deduplicado
+        # entre trailing, validación y utils cuando piden el mismo símbolo a la vez)
+        r = GOBERNADOR.get("/api/v3/ticker/price", {"symbol": simbolo}, prioridad=PRIORIDAD_POSICION, timeout=10)
+        r.raise_for_status()
+        return float(r.json()["price"])
+
+    def orden_mercado(self, simbolo: str, lado: str, cantidad: float) -> Dict[str, Any]:
+        # Al reproducir una sesión grabada se devuelve el fill grabado: nunca se envía la orden
+        return SESION.capturar("orden", f"{simbolo}|{lado}", lambda: self._orden_mercado(simbolo, lado, cantidad))
+
+    def _orden_mercado(self, simbolo: str, lado: str, cantidad: float) -> Dict[str, Any]:
+        with GOBERNADOR.turno(peso_endpoint("/api/v3/order"), PRIORIDAD_ORDEN):
+            try:
+                if lado == "SELL":
+                    return self.client.order_market_sell(symbol=simbolo, quantity=cantidad)
+                return self.client.order_market_buy(symbol=simbolo, quantity=cantidad)
+            finally:
+                GOBERNADOR.observar(getattr(self.client, "response", None))
+
+
+# ========================
+# Exchange simulado
+# ========================
+
+def cargar_klines_archivo(ruta: str) -> np.ndarray:
+    # Acepta el JSON crudo de /api/v3/klines o el CSV de data.binance.vision (sin cabecera).
+    # Devuelve una matriz (velas, 6): open_time_ms, open, high, low, close, close_time_ms
+    if ruta.endswith(".json"):
+        with open(ruta, "r", encoding="utf-8") as f:
+            filas = json.load(f)
+    else:
+        with open(ruta, "r", encoding="utf-8", newline="") as f:
+            filas = [r for r in csv.reader(f) if r and r[0].isdigit()]
+    m = np.array([[float(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[6])] for r in filas])
+    if m.size and m[0, 0] > 1e14:
+        # Los CSV recientes de data.binance.vision vienen en microsegundos
+        m[:, [0, 5]] /= 1000.0
+    return m[np.argsort(m[:, 0], kind="stable")]
+
+
+class ExchangeSimulado(Exchange):
+    # Precio intra-vela: open → extremo cercano → extremo lejano → close, en tercios de la
+    # vela, para que los stops se crucen como en el mercado real.
+
+    def __init__(self, velas: Dict[str, np.ndarray], aceleracion: float = 0.0,
+                 slippage_bps: float = 5.0, comision_pct: float = 0.1,
+                 inicio_ms: Optional[float] = None):
+        if not velas:
+            raise ValueError("ExchangeSimulado necesita velas de al menos un símbolo")
+        self._velas = velas
+        self._aperturas = {s: v[:, 0] for s, v in velas.items()}
+        self.aceleracion = float(aceleracion)
+        self.slippage_bps = float(slippage_bps)
+        self.comision_pct = float(comision_pct)
+        self.inicio_ms = float(inicio_ms if inicio_ms is not None else min(v[0, 0] for v in velas.values()))
+        self.fin_ms = max(v[-1, 5] for v in velas.values())
+        self._sim_ms = self.inicio_ms
+        self._real_inicio = time.time()
+        self._siguiente_id = 1
+        self.ordenes: List[Dict[str, Any]] = []
+
+    @classmethod
+    def desde_archivos(cls, rutas: Dict[str, str], **kwargs) -> "ExchangeSimulado":
+        return cls({s: cargar_klines_archivo(r) for s, r in rutas.items()}, **kwargs)
+
+    # ---------- Reloj simulado ----------
+
+    def ahora_ms(self) -> float:
+        if self.aceleracion > 0:
+            return self.inicio_ms + (time.time() - self._real_inicio) * 1000.0 * self.aceleracion
+        return self._sim_ms
+
+    def avanzar(self, segundos: float) -> float:
+        # Modo "lo más rápido posible" (aceleracion=0): el llamador mueve el reloj
+        self._sim_ms += segundos * 1000.0
+        return self._sim_ms
+
+    def terminado(self) -> bool:
+        return self.ahora_ms() > self.fin_ms
+
+    def simbolos(self) -> List[str]:
+        return list(self._velas)
+
+    # ---------- Interfaz Exchange ----------
+
+    def precio(self, simbolo: str) -> float:
+        velas = self._velas[simbolo]
+        t = self.ahora_ms()
+        i = int(np.searchsorted(self._aperturas[simbolo], t, side="right")) - 1
+        if i < 0:
+            return float(velas[0, 1])
+        o, h, l, c, cierre = velas[i, 1], velas[i, 2], velas[i, 3], velas[i, 4], velas[i, 5]
+        if t >= cierre:
+            return float(c)
+        frac = (t - velas[i, 0]) / max(1.0, cierre - velas[i, 0])
+        puntos = (o, l, h, c) if c >= o else (o, h, l, c)
+        return float(np.interp(frac, (0.0, 1 / 3, 2 / 3, 1.0), puntos))
+
+    def orden_mercado(self, simbolo: str, lado: str, cantidad: float) -> Dict[str, Any]:
+        ref = self.precio(simbolo)
+        signo = 1 if lado == "BUY" else -1
+        precio = ref * (1 + signo * self.slippage_bps / 10_000)
+        nocional = precio * float(cantidad)
+        orden = {
+            "symbol": simbolo,
+            "orderId": self._siguiente_id,
+            "side": lado,
+            "type": "MARKET",
+            "status": "FILLED",
+            "transactTime": int(self.ahora_ms()),
+            "executedQty": str(cantidad),
+            "cummulativeQuoteQty": str(nocional),
+            "fills": [{
+                "price": str(precio),
+                "qty": str(cantidad),
+                "commission": str(nocional * self.comision_pct / 100.0),
+                "commissionAsset": "USDT",
+            }],
+        }
+        self._siguiente_id += 1
+        self.ordenes.append(orden)
+        return orden
+
+
+_EXCHANGE: Optional[Exchange] = None
+
+
+def obtener_exchange() -> Exchange:
+    global _EXCHANGE
+    if _EXCHANGE is None:
+        _EXCHANGE = ExchangeBinance()
+    return _EXCHANGE
+
+
+def configurar_exchange(exchange: Exchange) -> None:
+    global _EXCHANGE
+    _EXCHANGE = exchange
@@ -0,0 +1,323 @@
+# gobernador_peso.py
+# Gobernador central del request weight de Binance Spot (límite por IP y minuto).
+# - Cada request reserva su peso por endpoint antes de salir; el uso real se corrige
+#   con la cabecera X-MBX-USED-WEIGHT-1M de cada respuesta (incluye el de otros
+#   procesos de la misma IP, p.ej. los workers de escaneo_distribuido).
+# - Cola por prioridad: órdenes > precios de posiciones > klines del escaneo. Cada
+#   prioridad tiene un techo del límite, así el escaneo nunca consume el margen que
+#   necesitan las ventas de stop-loss.
+# - Con N procesos escaneando (escaneo_distribuido) cada uno recibe 1/N del techo de
+#   escaneo para sus propias reservas, además del techo global: la cabecera llega con
+#   retraso y sin esto N workers podrían pasarse juntos hasta el primer 429.
+# - Por encima de `lento_desde_pct` el escaneo se espacia para repartir el peso que
+#   queda en lo que resta del minuto, en vez de agotarlo en una ráfaga.
+# - Ante 429/418 se respeta Retry-After para todas las prioridades.
+# - El minuto de la ventana es el del reloj de Binance (cabecera Date, o el offset
+#   exacto que mide el ejecutor de órdenes), no el reloj local.
+# - GETs idénticos simultáneos se resuelven con una sola request; cada hilo que se
+#   suma recibe su propia copia de la respuesta.
+# - Con una sesión de grabacion activa, las respuestas se graban/reproducen aquí
+#   (al reproducir no se reserva peso ni se sale a la red).
+
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from grabacion import SESION
+from utils import seccion_config
+
+BINANCE_API = "https://api.binance.com"
+CABECERA_PESO = "X-MBX-USED-WEIGHT-1M"
+
+PRIORIDAD_ORDEN = 0
+PRIORIDAD_POSICION = 1
+PRIORIDAD_ESCANEO = 2
+NOMBRES_PRIORIDAD = {PRIORIDAD_ORDEN: "ordenes", PRIORIDAD_POSICION: "posiciones", PRIORIDAD_ESCANEO: "escaneo"}
+
+# Pesos de /api/v3 (documentación de Binance Spot); (con symbol, sin symbol)
+PESOS_ENDPOINT: Dict[str, Tuple[int, int]] = {
+    "/api/v3/klines": (2, 2),
+    "/api/v3/ticker/price": (2, 4),
+    "/api/v3/ticker/24hr": (2, 80),
+    "/api/v3/exchangeInfo": (20, 20),
+    "/api/v3/time": (1, 1),
+    "/api/v3/order": (1, 1),
+}
+
+
+def peso_endpoint(ruta: str, params: Optional[Dict[str, Any]] = None) -> int:
+    con_simbolo, sin_simbolo = PESOS_ENDPOINT.get(ruta, (1, 1))
+    return con_simbolo if params and "symbol" in params else sin_simbolo
+
+
+def config_gobernador(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "gobernador_peso")
+    return {
+        "limite_peso_min": max(1, int(raw.get("limite_peso_min", 6000))),
+        "techo_escaneo_pct": float(raw.get("techo_escaneo_pct", 80)),
+        "techo_posiciones_pct": float(raw.get("techo_posiciones_pct", 95)),
+        "lento_desde_pct": float(raw.get("lento_desde_pct", 60)),
+    }
+
+
+def _copiar_respuesta(r: requests.Response) -> requests.Response:
+    # El cuerpo ya está leído (bytes inmutables); estado y cabeceras no se comparten entre hilos
+    copia = requests.Response()
+    copia.__setstate__(r.__getstate__())
+    copia.headers = CaseInsensitiveDict(r.headers)
+    return copia
+
+
+class _EnVuelo:
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.respuesta: Optional[requests.Response] = None
+        self.error: Optional[BaseException] = None
+
+
+class GobernadorPeso:
+
+    def __init__(self, gcfg: Optional[Dict[str, Any]] = None):
+        self._cond = threading.Condition()
+        self._espera: list = []  # heap de (prioridad, secuencia)
+        self._secuencia = 0
+        self._offset_servidor = 0.0  # hora de Binance - hora local, en segundos
+        self._offset_preciso = False
+        self._minuto = int(time.time() // 60)
+        self._usado = 0   # peso del minuto de toda la IP (reservas + cabecera)
+        self._propio = 0  # peso del minuto reservado por este proceso
+        self._participantes = 1
+        self._bloqueado_hasta = 0.0
+        self._ultimo_escaneo = 0.0
+        self._esperado = {p: 0.0 for p in NOMBRES_PRIORIDAD}
+        self._deduplicadas = 0
+        self._vuelo_lock = threading.Lock()
+        self._en_vuelo: Dict[Tuple, _EnVuelo] = {}
+        self._sesion = requests.Session()
+        self.configurar(gcfg or config_gobernador({}))
+
+    def configurar(self, gcfg: Dict[str, Any], participantes: Optional[int] = None) -> None:
+        # `participantes`: procesos que escanean a la vez contra la misma IP
+        with self._cond:
+            if participantes is not None:
+                self._participantes = max(1, int(participantes))
+            self.limite = gcfg["limite_peso_min"]
+            self._techo = {
+                PRIORIDAD_ORDEN: float(self.limite),
+                PRIORIDAD_POSICION: self.limite * gcfg["techo_posiciones_pct"] / 100.0,
+                PRIORIDAD_ESCANEO: self.limite * gcfg["techo_escaneo_pct"] / 100.0,
+            }
+            self._lento = self.limite * gcfg["lento_desde_pct"] / 100.0
+            self._techo_propio_escaneo = self._techo[PRIORIDAD_ESCANEO] / self._participantes
+            self._cond.notify_all()
+
+    # ---------- Reloj del servidor ----------
+
+    def _reloj(self) -> float:
+        return time.time() + self._offset_servidor
+
+    def ajustar_reloj(self, offset_s: float) -> None:
+        # Offset medido con /api/v3/time (ejecutor_ordenes): tiene prioridad sobre la cabecera Date
+        with self._cond:
+            self._offset_servidor = offset_s
+            self._offset_preciso = True
+            self._cond.notify_all()
+
+    def _hora_respuesta(self, respuesta: requests.Response) -> float:
+        # Hora de Binance al responder; Date tiene resolución de 1s, se toma el punto medio
+        fecha = respuesta.headers.get("Date")
+        if fecha:
+            try:
+                ts = parsedate_to_datetime(fecha).timestamp() + 0.5
+            except (TypeError, ValueError):
+                return self._reloj()
+            if not self._offset_preciso and abs(ts - self._reloj()) > 1.0:
+                self._offset_servidor = ts - time.time()
+            return ts
+        return self._reloj()
+
+    # ---------- Reserva de peso ----------
+
+    def _rotar(self, ahora: float) -> None:
+        minuto = int(ahora // 60)
+        if minuto != self._minuto:
+            self._minuto = minuto
+            self._usado = 0
+            self._propio = 0
+
+    def _pausa(self, peso: int, prioridad: int, ahora: float) -> float:
+        if ahora < self._bloqueado_hasta:
+            return self._bloqueado_hasta - ahora
+        fin_minuto = (self._minuto + 1) * 60.0
+        techo = self._techo[prioridad]
+        if self._usado + peso > techo:
+            return fin_minuto - ahora + 0.05
+        if prioridad == PRIORIDAD_ESCANEO and self._propio + peso > self._techo_propio_escaneo:
+            return fin_minuto - ahora + 0.05
+        if prioridad == PRIORIDAD_ESCANEO and self._usado > self._lento:
+            # Reparte lo que queda hasta el techo en lo que resta del minuto
+            intervalo = (fin_minuto - ahora) * peso / max(1.0, techo - self._usado)
+            return self._ultimo_escaneo + intervalo - ahora
+        return 0.0
+
+    def _reservar(self, peso: int, prioridad: int) -> float:
+        inicio = time.time()
+        with self._cond:
+            self._secuencia += 1
+            ticket = (prioridad, self._secuencia)
+            heapq.heappush(self._espera, ticket)
+            self._cond.notify_all()
+            try:
+                while True:
+                    if self._espera[0] != ticket:
+                        # Sólo la cabeza mide su pausa; el resto despierta cuando la cabeza sale
+                        self._cond.wait()
+                        continue
+                    ahora = self._reloj()
+                    self._rotar(ahora)
+                    pausa = self._pausa(peso, prioridad, ahora)
+                    if pausa <= 0:
+                        break
+                    self._cond.wait(timeout=pausa)
+                self._usado += peso
+                self._propio += peso
+                if prioridad == PRIORIDAD_ESCANEO:
+                    self._ultimo_escaneo = self._reloj()
+            finally:
+                self._espera.remove(ticket)
+                heapq.heapify(self._espera)
+                self._cond.notify_all()
+            esperado = time.time() - inicio
+            self._esperado[prioridad] += esperado
+        return esperado
+
+    def _devolver(self, peso: int) -> None:
+        with self._cond:
+            self._usado = max(0, self._usado - peso)
+            self._propio = max(0, self._propio - peso)
+            self._cond.notify_all()
+
+    @contextmanager
+    def turno(self, peso: int, prioridad: int):
+        # Para llamadas que no pasan por get/post (p.ej. el cliente de python-binance):
+        # reservar aquí y luego pasar la respuesta a observar()
+        yield self._reservar(peso, prioridad)
+
+    def observar(self, respuesta: Optional[requests.Response]) -> None:
+        if respuesta is None:
+            return
+        usado = respuesta.headers.get(CABECERA_PESO)
+        with self._cond:
+            hora = self._hora_respuesta(respuesta)
+            self._rotar(self._reloj())
+            minuto = int(hora // 60)
+            if usado is not None:
+                if minuto > self._minuto:
+                    # Binance ya abrió la ventana siguiente: manda su contador
+                    self._minuto = minuto
+                    self._usado = int(usado)
+                    self._propio = 0
+                elif minuto == self._minuto:
+                    self._usado = max(self._usado, int(usado))
+                # (una respuesta del minuto anterior que llega tarde no cuenta)
+            if respuesta.status_code in (418, 429):
+                espera = float(respuesta.headers.get("Retry-After", 60))
+                self._bloqueado_hasta = max(self._bloqueado_hasta, self._reloj() + espera)
+                print(f"🚫 [PESO] Binance respondió {respuesta.status_code}: pausa de {espera:.0f}s "
+                      f"para todas las requests.", flush=True)
+            self._cond.notify_all()
+
+    # ---------- Requests ----------
+
+    def get(self, ruta: str, params: Optional[Dict[str, Any]] = None, prioridad: int = PRIORIDAD_ESCANEO,
+            timeout: float = 15, sesion: Optional[requests.Session] = None,
+            deduplicar: bool = True) -> requests.Response:
+        if not SESION.activa():
+            return self._get(ruta, params, prioridad, timeout, sesion, deduplicar)
+        clave = f"{ruta}?{urlencode(sorted((params or {}).items()))}"
+        return SESION.capturar_respuesta(
+            "binance", clave, lambda: self._get(ruta, params, prioridad, timeout, sesion, deduplicar))
+
+    def _get(self, ruta: str, params: Optional[Dict[str, Any]], prioridad: int, timeout: float,
+             sesion: Optional[requests.Session], deduplicar: bool) -> requests.Response:
+        url = f"{BINANCE_API}{ruta}"
+        peso = peso_endpoint(ruta, params)
+        self._reservar(peso, prioridad)
+        if not deduplicar:
+            r = (sesion or self._sesion).get(url, params=params, timeout=timeout)
+            self.observar(r)
+            return r
+
+        clave = (url, tuple(sorted((params or {}).items())))
+        with self._vuelo_lock:
+            pendiente = self._en_vuelo.get(clave)
+            propia = pendiente is None
+            if propia:
+                pendiente = self._en_vuelo[clave] = _EnVuelo()
+        if not propia:
+            # Otra request idéntica ya está en la red: se devuelve el peso y se comparte la respuesta
+            self._devolver(peso)
+            if not pendiente.evento.wait(timeout):
+                raise requests.Timeout(f"Timeout esperando request en vuelo a {ruta}")
+            if pendiente.error is not None:
+                raise pendiente.error
+            with self._cond:
+                self._deduplicadas += 1
+            return _copiar_respuesta(pendiente.respuesta)
+        try:
+            r = (sesion or self._sesion).get(url, params=params, timeout=timeout)
+            self.observar(r)
+            pendiente.respuesta = r
+            return r
+        except BaseException as e:
+            pendiente.error = e
+            raise
+        finally:
+            with self._vuelo_lock:
+                self._en_vuelo.pop(clave, None)
+            pendiente.evento.set()
+
+    def post(self, ruta: str, data: Any = None, prioridad: int = PRIORIDAD_ORDEN, timeout: float = 10,
+             sesion: Optional[requests.Session] = None, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        def _post():
+            self._reservar(peso_endpoint(ruta), prioridad)
+            r = (sesion or self._sesion).post(f"{BINANCE_API}{ruta}", data=data, headers=headers, timeout=timeout)
+            self.observar(r)
+            return r
+
+        # data firmada (timestamp/signature) cambia en cada llamada: se graba por ruta
+        return SESION.capturar_respuesta("binance", f"POST {ruta}", _post)
+
+    # ---------- Métricas ----------
+
+    def resumen(self, reiniciar: bool = True) -> Dict[str, Any]:
+        with self._cond:
+            self._rotar(self._reloj())
+            res = {
+                "usado": self._usado,
+                "propio": self._propio,
+                "limite": self.limite,
+                "espera_s": {NOMBRES_PRIORIDAD[p]: round(s, 2) for p, s in self._esperado.items()},
+                "deduplicadas": self._deduplicadas,
+            }
+            if reiniciar:
+                self._esperado = {p: 0.0 for p in NOMBRES_PRIORIDAD}
+                self._deduplicadas = 0
+        return res
+
+    def imprimir_resumen(self) -> None:
+        res = self.resumen()
+        if res["usado"] > self._lento or any(res["espera_s"].values()) or res["deduplicadas"]:
+            print(f"⚖️ [PESO] usado={res['usado']}/{res['limite']} espera={res['espera_s']} "
+                  f"deduplicadas={res['deduplicadas']}", flush=True)
+
+
+GOBERNADOR = GobernadorPeso()
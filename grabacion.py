@@ -0,0 +1,364 @@
+# grabacion.py
+# Grabación y reproducción de sesiones de bot_integrado / trailing_manager.
+# Toda la E/S externa pasa por capturar(canal, clave, fn): klines y tickers de
+# Binance (gobernador_peso), respuestas de Groq, config.json y archivos leídos,
+# hora de las velas/planificador, órdenes y envíos a Telegram.
+# - Grabando: se ejecuta fn() y su resultado se agrega a un archivo JSON lines con
+#   gzip (sesiones/sesion-AAAAMMDD-HHMMSS.jsonl.gz), volcado al empezar cada ciclo.
+# - Reproduciendo: fn() no se ejecuta; se devuelve el valor grabado para esa
+#   (canal, clave) en el mismo orden. Sin red, sin sleeps, sin enviar nada.
+# El estado en memoria al empezar a grabar (estado_caliente) viaja en la cabecera, y
+# cada decisión por símbolo se compara contra la grabada para detectar diferencias.
+#   python grabacion.py reproducir sesiones/sesion-....jsonl.gz [--dir DIR] [--silencioso]
+
+import argparse
+import base64
+import contextlib
+import gzip
+import json
+import os
+import pickle
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Optional
+
+from utils import seccion_config
+
+VERSION = 1
+DIRECTORIO = "sesiones"
+CABECERAS_GRABADAS = ("X-MBX-USED-WEIGHT-1M", "Retry-After")
+
+
+def config_grabacion(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "grabacion")
+    return {
+        "activo": bool(raw.get("activo", False)),
+        "directorio": str(raw.get("directorio", DIRECTORIO)),
+    }
+
+
+class ErrorGrabado(Exception):
+    # Excepción original de la grabación, relanzada al reproducir
+    pass
+
+
+class SesionAgotada(Exception):
+    # La reproducción pidió una entrada que no está en la sesión: el camino divergió
+    pass
+
+
+class RespuestaGrabada:
+    # Lo que los llamadores usan de requests.Response: status_code, headers, json(), text
+
+    def __init__(self, status_code: int, headers: Dict[str, str], cuerpo: Any, texto: str = ""):
+        self.status_code = status_code
+        self.headers = headers
+        self._cuerpo = cuerpo
+        self.text = texto
+
+    def json(self) -> Any:
+        if self._cuerpo is None:
+            raise ValueError("Respuesta grabada sin cuerpo JSON")
+        return self._cuerpo
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} (respuesta grabada)", response=self)
+
+
+def _serializar_respuesta(r) -> Dict[str, Any]:
+    try:
+        cuerpo, texto = r.json(), ""
+    except ValueError:
+        cuerpo, texto = None, r.text[:500]
+    return {
+        "s": r.status_code,
+        "h": {k: r.headers[k] for k in CABECERAS_GRABADAS if k in r.headers},
+        "j": cuerpo,
+        "txt": texto,
+    }
+
+
+class SesionGrabacion:
+
+    def __init__(self):
+        self.modo: Optional[str] = None  # None | "grabar" | "reproducir"
+        self.ruta: Optional[str] = None
+        self._lock = threading.Lock()
+        self._lock_archivo = threading.Lock()
+        self._buffer: List[str] = []
+        self._entradas: Dict[tuple, deque] = defaultdict(deque)
+        self._esperados: Dict[tuple, deque] = defaultdict(deque)
+        self._marcas: List[Dict[str, Any]] = []
+        self.cabecera: Dict[str, Any] = {}
+        self.diferencias = 0
+
+    def activa(self) -> bool:
+        return self.modo is not None
+
+    @property
+    def reproduciendo(self) -> bool:
+        return self.modo == "reproducir"
+
+    # ---------- Grabación ----------
+
+    def grabar(self, ruta: str, estado: Optional[Dict[str, Any]] = None) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self.ruta = ruta
+        self.modo = "grabar"
+        cabecera = {"t": "h", "version": VERSION, "inicio": time.time()}
+        if estado is not None:
+            cabecera["estado"] = base64.b64encode(pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL)).decode("ascii")
+        self._agregar(cabecera)
+        self.volcar()
+        print(f"🎙️ [GRAB] Grabando sesión en {ruta}", flush=True)
+
+    def _agregar(self, registro: Dict[str, Any]) -> None:
+        # Se serializa en el momento: el valor puede mutar después (listas en memoria)
+        try:
+            linea = json.dumps(registro, ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError, OverflowError) as e:
+            # Grabar nunca debe cortar al llamador: queda el hueco ("nv") y la sesión sigue alineada
+            print(f"⚠️ [GRAB] {registro.get('c')}:{registro.get('k')} no serializable, se graba sin valor: {e}",
+                  flush=True)
+            registro = {k: v for k, v in registro.items() if k != "v"}
+            registro["nv"] = f"{type(e).__name__}: {e}"
+            linea = json.dumps(registro, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._buffer.append(linea)
+
+    def volcar(self) -> None:
+        if self.modo != "grabar":
+            return
+        with self._lock_archivo:
+            with self._lock:
+                lineas, self._buffer = self._buffer, []
+            if lineas:
+                # Cada volcado es un miembro gzip más del mismo archivo (gzip los concatena)
+                with gzip.open(self.ruta, "at", encoding="utf-8") as f:
+                    f.write("\n".join(lineas) + "\n")
+
+    def detener(self) -> None:
+        if self.modo == "grabar":
+            self.volcar()
+            print(f"🎙️ [GRAB] Sesión cerrada: {self.ruta}", flush=True)
+        self.modo = None
+
+    # ---------- Reproducción ----------
+
+    def reproducir(self, ruta: str) -> None:
+        self.ruta = ruta
+        with gzip.open(ruta, "rt", encoding="utf-8") as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                r = json.loads(linea)
+                tipo = r["t"]
+                if tipo == "h":
+                    self.cabecera = r
+                elif tipo == "c":
+                    self._entradas[(r["c"], r["k"])].append(r)
+                elif tipo == "x":
+                    self._esperados[(r["c"], r["k"])].append(r.get("v"))
+                elif tipo == "m":
+                    self._marcas.append(r)
+        if self.cabecera.get("version") != VERSION:
+            raise ValueError(f"Sesión de versión {self.cabecera.get('version')}, se esperaba {VERSION}")
+        self.modo = "reproducir"
+
+    def estado_inicial(self) -> Optional[Dict[str, Any]]:
+        if "estado" not in self.cabecera:
+            return None
+        return pickle.loads(base64.b64decode(self.cabecera["estado"]))
+
+    def marcas(self) -> List[Dict[str, Any]]:
+        return list(self._marcas)
+
+    def primera(self, canal: str, clave: str) -> Any:
+        # Valor de la próxima entrada sin consumirla (p.ej. la lista inicial de operaciones)
+        cola = self._entradas.get((canal, clave))
+        return cola[0].get("v") if cola else None
+
+    def pendientes(self) -> int:
+        return sum(len(d) for d in self._entradas.values())
+
+    def _siguiente(self, canal: str, clave: str) -> Dict[str, Any]:
+        with self._lock:
+            cola = self._entradas.get((canal, clave))
+            if not cola:
+                raise SesionAgotada(f"Sin entrada grabada para {canal}:{clave}")
+            return cola.popleft()
+
+    # ---------- Puntos de captura ----------
+
+    def capturar(self, canal: str, clave: str, fn: Callable[[], Any]) -> Any:
+        if self.modo is None:
+            return fn()
+        if self.modo == "reproducir":
+            r = self._siguiente(canal, clave)
+            if "e" in r:
+                raise ErrorGrabado(r["e"])
+            if "nv" in r:
+                raise ErrorGrabado(f"valor no grabado ({r['nv']})")
+            return r["v"]
+        try:
+            valor = fn()
+        except Exception as e:
+            self._agregar({"t": "c", "c": canal, "k": clave, "e": f"{type(e).__name__}: {e}"})
+            raise
+        self._agregar({"t": "c", "c": canal, "k": clave, "v": valor})
+        return valor
+
+    def capturar_respuesta(self, canal: str, clave: str, fn: Callable[[], Any]):
+        # Para funciones que devuelven un requests.Response
+        if self.modo is None:
+            return fn()
+        if self.modo == "reproducir":
+            r = self.capturar(canal, clave, fn)
+            return RespuestaGrabada(r["s"], r["h"], r["j"], r.get("txt", ""))
+        respuesta = None
+
+        def _llamar():
+            nonlocal respuesta
+            respuesta = fn()
+            return _serializar_respuesta(respuesta)
+
+        self.capturar(canal, clave, _llamar)
+        return respuesta
+
+    def ahora(self, clave: str) -> float:
+        return self.capturar("tiempo", clave, time.time)
+
+    def dormir(self, segundos: float, detener: Optional[threading.Event] = None) -> None:
+        # `detener`: la espera se corta en cuanto se activa (apagado del supervisor)
+        if self.reproduciendo or segundos <= 0:
+            return
+        if detener is not None:
+            detener.wait(segundos)
+        else:
+            time.sleep(segundos)
+
+    def marcar(self, tipo: str, **datos) -> None:
+        # Orden global de ciclos del scanner / ticks de trailing, para reproducirlos igual.
+        # Cada marca vuelca lo grabado hasta ahí: un corte deja la sesión usable.
+        if self.modo == "grabar":
+            self.volcar()
+            self._agregar({"t": "m", "m": tipo, **datos})
+
+    def comparar(self, canal: str, clave: str, valor: Any) -> None:
+        if self.modo == "grabar":
+            self._agregar({"t": "x", "c": canal, "k": clave, "v": valor})
+        elif self.modo == "reproducir":
+            with self._lock:
+                cola = self._esperados.get((canal, clave))
+                esperado = cola.popleft() if cola else None
+            try:
+                valor = json.loads(json.dumps(valor))  # mismas conversiones que al grabar
+            except (TypeError, ValueError, OverflowError):
+                valor = None  # al grabar tampoco se pudo: quedó sin valor
+            if esperado != valor:
+                self.diferencias += 1
+                print(f"🔁 [REPLAY] Diferencia en {canal}:{clave}: grabado={esperado} reproducido={valor}", flush=True)
+
+
+SESION = SesionGrabacion()
+
+
+def iniciar(cfg: Dict[str, Any]) -> bool:
+    # Llamado desde los puntos de entrada (supervisor, start_loop, trailing_manager)
+    gcfg = config_grabacion(cfg)
+    if not gcfg["activo"] or SESION.activa():
+        return False
+    from estado_caliente import _capturar
+    nombre = datetime.now().strftime("sesion-%Y%m%d-%H%M%S.jsonl.gz")
+    SESION.grabar(os.path.join(gcfg["directorio"], nombre), _capturar())
+    return True
+
+
+# ========================
+# Reproducción
+# ========================
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100.0 * (len(ordenados) - 1))))]
+
+
+def reproducir(ruta: str, directorio: Optional[str] = None, silencioso: bool = False) -> Dict[str, Any]:
+    ruta = os.path.abspath(ruta)
+    # Las salidas (data.js, diario, historial) se escriben en un directorio aparte
+    directorio = directorio or tempfile.mkdtemp(prefix="replay_")
+    os.makedirs(os.path.join(directorio, "Dashboard"), exist_ok=True)
+    os.chdir(directorio)
+
+    SESION.reproducir(ruta)
+    import bot_integrado
+    import trailing_manager
+    from estado_caliente import aplicar
+    estado = SESION.estado_inicial()
+    if estado is not None:
+        # Los max_price del libro al empezar a grabar se reponen sobre la primera lista de trailing
+        aplicar(estado, SESION.primera("entrada", "trailing_manager"))
+
+    tiempos: Dict[str, List[float]] = defaultdict(list)
+    error = None
+    salida = open(os.devnull, "w", encoding="utf-8") if silencioso else None
+    inicio = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(salida) if salida else contextlib.nullcontext():
+            for marca in SESION.marcas():
+                t0 = time.perf_counter()
+                if marca["m"] == "scanner":
+                    bot_integrado.ejecutar_ciclo()
+                elif marca["m"] == "trailing":
+                    trailing_manager.trailing_manager([] if marca.get("en_memoria") else None)
+                tiempos[marca["m"]].append((time.perf_counter() - t0) * 1000.0)
+    except SesionAgotada as e:
+        error = str(e)
+    finally:
+        if salida:
+            salida.close()
+        SESION.detener()
+
+    resumen = {
+        "sesion": ruta,
+        "directorio_salida": directorio,
+        "duracion_s": round(time.perf_counter() - inicio, 3),
+        "diferencias": SESION.diferencias,
+        "entradas_sin_usar": SESION.pendientes(),
+        "divergencia": error,
+    }
+    for tipo, ms in tiempos.items():
+        resumen[tipo] = {
+            "n": len(ms),
+            "total_ms": round(sum(ms), 1),
+            "p50_ms": round(statistics.median(ms), 2),
+            "p95_ms": round(_percentil(ms, 95), 2),
+            "max_ms": round(max(ms), 2),
+        }
+    print(f"🔁 [REPLAY] {json.dumps(resumen, ensure_ascii=False)}", flush=True)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducción de sesiones grabadas")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    r = sub.add_parser("reproducir")
+    r.add_argument("sesion")
+    r.add_argument("--dir", default=None, help="directorio de salida (por defecto uno temporal)")
+    r.add_argument("--silencioso", action="store_true", help="sin logs por símbolo, para medir tiempos")
+    args = parser.parse_args()
+    # Como script este módulo es __main__: los hooks usan la SESION del módulo `grabacion`
+    import grabacion
+    grabacion.reproducir(args.sesion, args.dir, args.silencioso)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# libro_posiciones.py
+# Libro de posiciones en memoria para trailing_manager, indexado por símbolo.
+# Cada símbolo guarda sus posiciones en columnas NumPy (entrada, cantidad, max_price,
+# trailing_pct, sl, tp) y un heap (heapq sobre -stop) de niveles de stop. Con cada precio:
+#   - max_price y el stop efectivo max(sl, max_price·(1-trailing_pct)) se actualizan
+#     vectorizados sobre las posiciones del símbolo;
+#   - el tope del heap es el stop más alto: si el precio está por encima no hay nada
+#     que cerrar (O(1)); si no, sólo se sacan las posiciones efectivamente cruzadas.
+#     Las entradas viejas (stop reemplazado o posición cerrada) se descartan al salir.
+# Las posiciones cerradas salen del conjunto caliente. La lista de operaciones se
+# sincroniza por clave: altas, bajas, cambios de estado y ediciones de sl/trailing_pct/tp.
+
+import heapq
+import threading
+from typing import Dict, Any, List, Tuple, Optional
+
+import numpy as np
+
+from utils import clave_operacion
+
+_COLUMNAS = ("entrada", "cantidad", "max_price", "trailing_pct", "sl", "tp")
+_CAPACIDAD_INICIAL = 16
+_EDITABLES = ("trailing_pct", "sl", "tp")
+
+
+def _valores(op: Dict[str, Any]) -> Dict[str, float]:
+    entrada = float(op["precio_entrada"])
+    return {
+        "entrada": entrada,
+        "cantidad": float(op.get("cantidad") or 0),
+        "max_price": float(op.get("max_price") or entrada),
+        "trailing_pct": 0.03 if op.get("trailing_pct") is None else float(op["trailing_pct"]),
+        "sl": float(op.get("sl") or 0),
+        "tp": float(op.get("tp") or 0),
+    }
+
+
+class _PosicionesSimbolo:
+
+    def __init__(self):
+        self.n = 0
+        self.activas = 0
+        self.col = {c: np.zeros(_CAPACIDAD_INICIAL) for c in _COLUMNAS + ("stop",)}
+        self.activa = np.zeros(_CAPACIDAD_INICIAL, dtype=bool)
+        self.ids: List[Optional[str]] = []
+        self.heap: List[Tuple[float, int]] = []  # (-stop, fila): el tope es el stop más alto
+        self.precio: Optional[float] = None
+
+    def _crecer(self) -> None:
+        cap = len(self.activa) * 2
+        for c in self.col:
+            self.col[c] = np.resize(self.col[c], cap)
+        nueva = np.zeros(cap, dtype=bool)
+        nueva[:self.n] = self.activa[:self.n]
+        self.activa = nueva
+
+    def _rehacer_heap(self) -> None:
+        vivos = np.flatnonzero(self.activa[:self.n])
+        self.heap = list(zip((-self.col["stop"][vivos]).tolist(), vivos.tolist()))
+        heapq.heapify(self.heap)
+
+    def agregar(self, id_op: str, valores: Dict[str, float]) -> int:
+        if self.n == len(self.activa):
+            self._crecer()
+        i = self.n
+        for c in _COLUMNAS:
+            self.col[c][i] = valores[c]
+        self.col["stop"][i] = max(valores["sl"], valores["max_price"] * (1 - valores["trailing_pct"]))
+        self.activa[i] = True
+        self.ids.append(id_op)
+        self.n += 1
+        self.activas += 1
+        heapq.heappush(self.heap, (-float(self.col["stop"][i]), i))
+        return i
+
+    def editar(self, i: int, valores: Dict[str, float]) -> None:
+        # Nuevo sl/trailing_pct/tp: si el stop baja, la entrada vieja del heap queda obsoleta
+        for c in _EDITABLES:
+            self.col[c][i] = valores[c]
+        previo = self.col["stop"][i]
+        self.col["stop"][i] = max(valores["sl"], self.col["max_price"][i] * (1 - valores["trailing_pct"]))
+        if self.col["stop"][i] != previo:
+            # Con el mismo stop la entrada vigente sigue valiendo: otra igual se leería dos veces
+            heapq.heappush(self.heap, (-float(self.col["stop"][i]), i))
+
+    def retirar(self, i: int) -> None:
+        if self.activa[i]:
+            self.activa[i] = False
+            self.ids[i] = None
+            self.activas -= 1
+
+    def actualizar_precio(self, precio: float) -> Tuple[List[Tuple[int, str]], np.ndarray]:
+        # Devuelve (disparadas [(fila, motivo)], filas cuyo max_price subió)
+        self.precio = precio
+        n = self.n
+        c = self.col
+        subio = np.flatnonzero(self.activa[:n] & (precio > c["max_price"][:n]))
+        if subio.size:
+            c["max_price"][subio] = precio
+            previo = c["stop"][subio]
+            c["stop"][subio] = np.maximum(c["sl"][subio], precio * (1 - c["trailing_pct"][subio]))
+            if subio.size * 4 > self.activas or len(self.heap) > 4 * self.activas:
+                self._rehacer_heap()
+            else:
+                # Sólo las filas cuyo stop cambió (el sl puede sostenerlo aunque suba el máximo)
+                for i in subio[c["stop"][subio] != previo].tolist():
+                    heapq.heappush(self.heap, (-float(c["stop"][i]), i))
+
+        disparadas = []
+        vistas = set()
+        while self.heap and -self.heap[0][0] >= precio:
+            neg_stop, i = heapq.heappop(self.heap)
+            if not self.activa[i] or -neg_stop != c["stop"][i] or i in vistas:
+                continue  # entrada vieja: posición cerrada, stop ya reemplazado o repetida
+            vistas.add(i)
+            disparadas.append((i, "SL" if precio <= c["sl"][i] else "Trailing"))
+        return disparadas, subio
+
+    def reinsertar(self, i: int) -> None:
+        heapq.heappush(self.heap, (-float(self.col["stop"][i]), i))
+
+    def compactar(self) -> Dict[str, int]:
+        # Reconstruye columnas y heap sólo con las activas; devuelve id → nueva fila
+        vivos = np.flatnonzero(self.activa[:self.n])
+        cap = max(_CAPACIDAD_INICIAL, len(vivos) * 2)
+        for c in self.col:
+            nueva = np.zeros(cap)
+            nueva[:len(vivos)] = self.col[c][vivos]
+            self.col[c] = nueva
+        self.activa = np.zeros(cap, dtype=bool)
+        self.activa[:len(vivos)] = True
+        self.ids = [self.ids[i] for i in vivos]
+        self.n = self.activas = len(vivos)
+        self._rehacer_heap()
+        return {id_op: i for i, id_op in enumerate(self.ids)}
+
+
+class LibroPosiciones:
+
+    def __init__(self):
+        # El trailing lo modifica en su hilo y estado_caliente lo lee desde otro (supervisor)
+        self._lock = threading.RLock()
+        self._reiniciar()
+
+    def _reiniciar(self) -> None:
+        self._por_simbolo: Dict[str, _PosicionesSimbolo] = {}
+        self._indice: Dict[str, Tuple[str, int]] = {}  # id → (símbolo, fila)
+        self.operaciones: Dict[str, Dict[str, Any]] = {}  # id → dict de la operación
+        self._cerradas: set = set()  # cerradas por el libro que la lista aún puede traer como Confirmada
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+    def __contains__(self, id_op: str) -> bool:
+        return id_op in self._indice
+
+    def simbolos(self) -> List[str]:
+        with self._lock:
+            return [s for s, p in self._por_simbolo.items() if p.activas]
+
+    def agregar(self, op: Dict[str, Any]) -> bool:
+        with self._lock:
+            id_op = clave_operacion(op)
+            if id_op in self._indice:
+                return False
+            pos = self._por_simbolo.setdefault(op["simbolo"], _PosicionesSimbolo())
+            self._indice[id_op] = (op["simbolo"], pos.agregar(id_op, _valores(op)))
+            self.operaciones[id_op] = op
+            return True
+
+    def sincronizar(self, operaciones: List[Dict[str, Any]]) -> None:
+        # Por clave (id o simbolo+fecha), no por posición en la lista: data.js puede
+        # editarse a mano (estado, sl, trailing_pct) o perder filas.
+        with self._lock:
+            confirmadas: Dict[str, Dict[str, Any]] = {}
+            presentes = set()
+            for op in operaciones:
+                id_op = clave_operacion(op)
+                presentes.add(id_op)
+                if op.get("estado") == "Confirmada" and id_op not in self._cerradas:
+                    confirmadas[id_op] = op
+            self._cerradas &= presentes
+            for id_op in [i for i in self._indice if i not in confirmadas]:
+                self.retirar(id_op)
+            for id_op, op in confirmadas.items():
+                if id_op not in self._indice:
+                    self.agregar(op)
+                    continue
+                simbolo, i = self._indice[id_op]
+                pos = self._por_simbolo[simbolo]
+                valores = _valores(op)
+                if any(pos.col[c][i] != valores[c] for c in _EDITABLES):
+                    pos.editar(i, valores)
+                    self.operaciones[id_op] = {**self.operaciones[id_op], **{c: op.get(c) for c in _EDITABLES}}
+
+    def cerrar(self, id_op: str) -> Optional[Dict[str, Any]]:
+        # Vendida por el trailing: no se re-agrega aunque la lista la siga trayendo Confirmada
+        with self._lock:
+            self._cerradas.add(id_op)
+            return self.retirar(id_op)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._reiniciar()
+
+    def retirar(self, id_op: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            ubicacion = self._indice.pop(id_op, None)
+            if ubicacion is None:
+                return None
+            simbolo, i = ubicacion
+            pos = self._por_simbolo[simbolo]
+            pos.retirar(i)
+            if pos.activas == 0:
+                del self._por_simbolo[simbolo]
+            elif pos.n > 64 and pos.activas < pos.n // 2:
+                for nuevo_id, j in pos.compactar().items():
+                    self._indice[nuevo_id] = (simbolo, j)
+            return self.operaciones.pop(id_op, None)
+
+    def actualizar_precio(self, simbolo: str, precio: float) -> Tuple[List[Tuple[str, str]], List[str]]:
+        # Devuelve ([(id, motivo)] disparadas, [id] cuyo max_price/stop subió)
+        with self._lock:
+            pos = self._por_simbolo.get(simbolo)
+            if pos is None:
+                return [], []
+            disparadas, subio = pos.actualizar_precio(precio)
+            return [(pos.ids[i], m) for i, m in disparadas], [pos.ids[i] for i in subio]
+
+    def reintentar(self, id_op: str) -> None:
+        # La venta falló: la posición vuelve al heap para revisarse en el próximo precio
+        with self._lock:
+            simbolo, i = self._indice[id_op]
+            self._por_simbolo[simbolo].reinsertar(i)
+
+    def valores(self, id_op: str) -> Dict[str, float]:
+        with self._lock:
+            simbolo, i = self._indice[id_op]
+            pos = self._por_simbolo[simbolo]
+            max_price = float(pos.col["max_price"][i])
+            return {
+                "max_price": max_price,
+                "trailing_stop": max_price * (1 - float(pos.col["trailing_pct"][i])),
+                "stop_efectivo": float(pos.col["stop"][i]),
+                "precio_actual": pos.precio,
+            }
+
+    def volcar(self, id_op: str) -> Dict[str, Any]:
+        # Copia el estado columnar al dict de la operación (para dashboard / snapshot)
+        with self._lock:
+            op = dict(self.operaciones[id_op])
+            op.update(self.valores(id_op))
+            self.operaciones[id_op] = op
+            return op
+
+    def instantanea(self) -> List[Dict[str, Any]]:
+        # Posiciones abiertas con su estado columnar, consistente frente al hilo del trailing
+        with self._lock:
+            return [{**op, **self.valores(id_op)} for id_op, op in self.operaciones.items()]
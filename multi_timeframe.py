@@ -0,0 +1,180 @@
+# multi_timeframe.py
+# Análisis multi-timeframe derivado de un único feed base (p.ej. 1m).
+# Las velas de 5m/15m/1h se agregan de forma incremental a partir de las velas
+# base ya descargadas por _klines, así que no hay requests REST extra por timeframe.
+# Tras el arranque (bootstrap) sólo se piden a Binance las velas base que faltan.
+
+from typing import Dict, Any, List, Callable, Optional
+
+import pandas as pd
+
+from utils import intervalo_a_segundos, seccion_config
+
+COLUMNAS_VELA = ["open_time", "open", "high", "low", "close", "volume", "close_time"]
+LIMITE_KLINES = 1000  # máximo que acepta /api/v3/klines por request
+
+
+def config_mtf(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "multi_timeframe")
+    return {
+        "activo": bool(raw.get("activo", False)),
+        "timeframes": list(raw.get("timeframes", ["5m", "15m", "1h"])),
+        "min_velas_tf": int(raw.get("min_velas_tf", 30)),
+        "max_velas_base": min(LIMITE_KLINES, int(raw.get("max_velas_base", LIMITE_KLINES))),
+        "max_velas_tf": int(raw.get("max_velas_tf", 300)),
+        "velas_analisis": int(raw.get("velas_analisis", 200)),
+    }
+
+
+def timeframes_validos(intervalo_base: str, timeframes: List[str]) -> List[str]:
+    base_seg = intervalo_a_segundos(intervalo_base)
+    validos = []
+    for tf in timeframes:
+        try:
+            tf_seg = intervalo_a_segundos(tf)
+        except ValueError:
+            print(f"⚠️ [MTF] Timeframe inválido ignorado: {tf}", flush=True)
+            continue
+        # Semanas no se alinean con el epoch (Binance abre el lunes), se excluyen
+        if tf.endswith("w") or tf_seg <= base_seg or tf_seg % base_seg != 0:
+            print(f"⚠️ [MTF] {tf} no es múltiplo superior de {intervalo_base}. Ignorado.", flush=True)
+            continue
+        validos.append(tf)
+    return validos
+
+
+def _agregar_velas(base: pd.DataFrame, tf_seg: int) -> pd.DataFrame:
+    bucket = base["open_time"].dt.floor(f"{tf_seg}s")
+    g = base.groupby(bucket, sort=True)
+    agg = pd.DataFrame({
+        "open": g["open"].first(),
+        "high": g["high"].max(),
+        "low": g["low"].min(),
+        "close": g["close"].last(),
+        "volume": g["volume"].sum(),
+        "close_time": g["close_time"].max(),
+    })
+    agg.index.name = "open_time"
+    return agg.reset_index()[COLUMNAS_VELA]
+
+
+def _fusionar_tf(previas: Optional[pd.DataFrame], nuevas: pd.DataFrame, max_velas: int) -> pd.DataFrame:
+    if previas is None or previas.empty:
+        return nuevas.tail(max_velas).reset_index(drop=True)
+    previas = previas.copy()
+    ultima = previas.index[-1]
+    # La primera vela agregada puede completar la última vela (parcial) ya existente
+    if nuevas["open_time"].iloc[0] == previas.at[ultima, "open_time"]:
+        primera = nuevas.iloc[0]
+        previas.at[ultima, "high"] = max(previas.at[ultima, "high"], primera["high"])
+        previas.at[ultima, "low"] = min(previas.at[ultima, "low"], primera["low"])
+        previas.at[ultima, "close"] = primera["close"]
+        previas.at[ultima, "volume"] = previas.at[ultima, "volume"] + primera["volume"]
+        previas.at[ultima, "close_time"] = primera["close_time"]
+        nuevas = nuevas.iloc[1:]
+    if not nuevas.empty:
+        previas = pd.concat([previas, nuevas], ignore_index=True)
+    return previas.tail(max_velas).reset_index(drop=True)
+
+
+def _score_alcista(at: Dict[str, Any]) -> float:
+    votos = 0
+    if at["rsi"] > 50: votos += 1
+    if at["macd"] > 0: votos += 1
+    if at["ema_short"] > at["ema_long"]: votos += 1
+    return votos / 3.0
+
+
+class AgregadorMultiTF:
+    # Mantiene por símbolo un buffer de velas base cerradas y las velas agregadas
+    # de cada timeframe superior (la última puede estar en formación).
+
+    def __init__(self):
+        self._base: Dict[str, pd.DataFrame] = {}
+        self._tfs: Dict[str, Dict[str, pd.DataFrame]] = {}
+
+    def velas_a_pedir(self, simbolo: str, intervalo_base: str, ahora_ms: int, mcfg: Dict[str, Any]) -> int:
+        base = self._base.get(simbolo)
+        if base is None or base.empty:
+            return mcfg["max_velas_base"]
+        base_ms = intervalo_a_segundos(intervalo_base) * 1000
+        ultima_ms = int(base["open_time"].iloc[-1].value // 1_000_000)
+        faltantes = max(0, (ahora_ms - ultima_ms) // base_ms)
+        # +2: la vela en formación y margen por latencia en el cierre
+        return int(min(mcfg["max_velas_base"], faltantes + 2))
+
+    def ingerir(self, simbolo: str, df: pd.DataFrame, intervalo_base: str, ahora: pd.Timestamp,
+                mcfg: Dict[str, Any]) -> pd.DataFrame:
+        cerradas = df[df["close_time"] <= ahora]
+        en_formacion = df[df["close_time"] > ahora]
+
+        base = self._base.get(simbolo)
+        if base is not None and not base.empty:
+            # Hueco entre el buffer y lo descargado (p.ej. arranque tras mucho tiempo): se descarta
+            hueco = pd.Timedelta(seconds=intervalo_a_segundos(intervalo_base))
+            if not cerradas.empty and cerradas["open_time"].iloc[0] > base["open_time"].iloc[-1] + hueco:
+                base = None
+                self._tfs.pop(simbolo, None)
+            else:
+                cerradas = cerradas[cerradas["open_time"] > base["open_time"].iloc[-1]]
+
+        if not cerradas.empty:
+            cerradas = cerradas[COLUMNAS_VELA].reset_index(drop=True)
+            if base is None or base.empty:
+                base = cerradas
+            else:
+                base = pd.concat([base, cerradas], ignore_index=True)
+            self._base[simbolo] = base.tail(mcfg["max_velas_base"]).reset_index(drop=True)
+
+            tfs = self._tfs.setdefault(simbolo, {})
+            for tf in timeframes_validos(intervalo_base, mcfg["timeframes"]):
+                nuevas = _agregar_velas(cerradas, intervalo_a_segundos(tf))
+                previas = tfs.get(tf)
+                if previas is None or previas.empty:
+                    # Bootstrap: el primer bucket empieza antes de la primera vela base descargada
+                    # y quedaría parcial para siempre; se arranca en el primer bucket completo
+                    nuevas = nuevas[nuevas["open_time"] >= cerradas["open_time"].iloc[0]].reset_index(drop=True)
+                    if nuevas.empty:
+                        continue
+                tfs[tf] = _fusionar_tf(previas, nuevas, mcfg["max_velas_tf"])
+
+        base = self._base.get(simbolo)
+        if base is None:
+            return df
+        analisis = base.tail(max(1, mcfg["velas_analisis"] - len(en_formacion)))
+        return pd.concat([analisis, en_formacion[COLUMNAS_VELA]], ignore_index=True)
+
+    def exportar(self) -> Dict[str, Any]:
+        return {"base": dict(self._base), "tfs": {s: dict(t) for s, t in self._tfs.items()}}
+
+    def restaurar(self, estado: Dict[str, Any]) -> int:
+        self._base.update(estado.get("base", {}))
+        self._tfs.update(estado.get("tfs", {}))
+        return len(self._base)
+
+    def velas_tf(self, simbolo: str, tf: str) -> Optional[pd.DataFrame]:
+        return self._tfs.get(simbolo, {}).get(tf)
+
+    def confluencia(self, simbolo: str, at_base: Dict[str, Any], cfg: Dict[str, Any],
+                    analizar: Callable[[pd.DataFrame, Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        mcfg = config_mtf(cfg)
+        intervalo_base = cfg.get("intervalo", "1m")
+        detalle = {intervalo_base: {"fuerza": at_base["fuerza"], "score": round(_score_alcista(at_base), 3)}}
+        scores = [_score_alcista(at_base)]
+        for tf in timeframes_validos(intervalo_base, mcfg["timeframes"]):
+            velas = self.velas_tf(simbolo, tf)
+            if velas is None or len(velas) < mcfg["min_velas_tf"]:
+                n = 0 if velas is None else len(velas)
+                detalle[tf] = {"fuerza": None, "score": None, "velas": n}
+                continue
+            at_tf = analizar(velas, cfg)
+            score = _score_alcista(at_tf)
+            scores.append(score)
+            detalle[tf] = {"fuerza": at_tf["fuerza"], "score": round(score, 3)}
+        return {
+            "confluencia_mtf": round(sum(scores) / len(scores), 3),
+            "timeframes_mtf": detalle,
+        }
+
+
+AGREGADOR = AgregadorMultiTF()
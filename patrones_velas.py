@@ -0,0 +1,124 @@
+# patrones_velas.py
+# Detección vectorizada de patrones de velas japonesas con NumPy.
+# Trabaja sobre matrices OHLC de forma (simbolos, velas) — o un vector para un
+# solo símbolo — y evalúa todos los patrones sobre todas las filas en una pasada.
+# Devuelve por símbolo el patrón más fuerte de las últimas `ventana` velas.
+# El Doji (dirección 0) es indecisión: no cuenta como patrón para la penalización.
+
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# (nombre, fuerza relativa, dirección: +1 alcista, -1 bajista, 0 indecisión)
+PATRONES: List[Tuple[str, float, int]] = [
+    ("Doji", 1.0, 0),
+    ("Martillo", 2.0, 1),
+    ("Martillo invertido", 1.5, 1),
+    ("Hombre colgado", 2.0, -1),
+    ("Estrella fugaz", 2.0, -1),
+    ("Envolvente alcista", 3.0, 1),
+    ("Envolvente bajista", 3.0, -1),
+    ("Harami alcista", 1.5, 1),
+    ("Harami bajista", 1.5, -1),
+    ("Estrella de la mañana", 4.0, 1),
+    ("Estrella de la tarde", 4.0, -1),
+    ("Tres soldados blancos", 3.5, 1),
+    ("Tres cuervos negros", 3.5, -1),
+]
+NOMBRES = [p[0] for p in PATRONES]
+FUERZAS = np.array([p[1] for p in PATRONES], dtype=float)
+DIRECCIONES = np.array([p[2] for p in PATRONES], dtype=int)
+SIN_PATRON = "Ninguno"
+VELAS_NECESARIAS = 3  # el patrón más largo usa 3 velas
+
+
+def _prev(x: np.ndarray, k: int) -> np.ndarray:
+    # Desplaza k velas hacia atrás sobre el último eje, rellenando con NaN
+    out = np.full_like(x, np.nan)
+    out[..., k:] = x[..., :-k]
+    return out
+
+
+def detectar(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray) -> np.ndarray:
+    # Devuelve una matriz booleana (patrones, simbolos, velas)
+    o, h, l, c = (np.atleast_2d(np.asarray(x, dtype=float)) for x in (o, h, l, c))
+    rango = np.maximum(h - l, 1e-12)
+    cuerpo = np.abs(c - o)
+    techo = np.maximum(o, c)
+    piso = np.minimum(o, c)
+    sombra_sup = h - techo
+    sombra_inf = piso - l
+    alcista = c > o
+    bajista = c < o
+
+    o1, c1 = _prev(o, 1), _prev(c, 1)
+    o2, c2, h2, l2 = _prev(o, 2), _prev(c, 2), _prev(h, 2), _prev(l, 2)
+    cuerpo1 = np.abs(c1 - o1)
+    cuerpo2 = np.abs(c2 - o2)
+    alcista1, bajista1 = c1 > o1, c1 < o1
+    alcista2, bajista2 = c2 > o2, c2 < o2
+    rango2 = np.maximum(h2 - l2, 1e-12)
+
+    pequeno = cuerpo <= 0.1 * rango
+    forma_martillo = (sombra_inf >= 2 * cuerpo) & (sombra_sup <= 0.25 * rango) & ~pequeno
+    forma_invertida = (sombra_sup >= 2 * cuerpo) & (sombra_inf <= 0.25 * rango) & ~pequeno
+
+    doji = pequeno
+    martillo = forma_martillo & bajista1
+    martillo_inv = forma_invertida & bajista1
+    hombre_colgado = forma_martillo & alcista1
+    estrella_fugaz = forma_invertida & alcista1
+    envolvente_alc = alcista & bajista1 & (c >= o1) & (o <= c1) & (cuerpo > cuerpo1)
+    envolvente_baj = bajista & alcista1 & (o >= c1) & (c <= o1) & (cuerpo > cuerpo1)
+    harami_alc = alcista & bajista1 & (techo < o1) & (piso > c1)
+    harami_baj = bajista & alcista1 & (techo < c1) & (piso > o1)
+    cuerpo2_grande = cuerpo2 >= 0.5 * rango2
+    estrella_central = cuerpo1 <= 0.3 * cuerpo2
+    manana = bajista2 & cuerpo2_grande & estrella_central & alcista & (c > (o2 + c2) / 2)
+    tarde = alcista2 & cuerpo2_grande & estrella_central & bajista & (c < (o2 + c2) / 2)
+    soldados = (alcista & alcista1 & alcista2 & (c > c1) & (c1 > c2)
+                & (o > o1) & (o < c1) & (o1 > o2) & (o1 < c2) & (sombra_sup <= 0.3 * rango))
+    cuervos = (bajista & bajista1 & bajista2 & (c < c1) & (c1 < c2)
+               & (o < o1) & (o > c1) & (o1 < o2) & (o1 > c2) & (sombra_inf <= 0.3 * rango))
+
+    return np.stack([
+        doji, martillo, martillo_inv, hombre_colgado, estrella_fugaz,
+        envolvente_alc, envolvente_baj, harami_alc, harami_baj,
+        manana, tarde, soldados, cuervos,
+    ])
+
+
+def patron_mas_fuerte_lote(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray,
+                           ventana: int = 3, decaimiento: float = 0.7) -> List[Dict[str, Any]]:
+    # Sólo hacen falta las últimas `ventana` velas más las previas que usa el patrón más largo
+    if ventana < 1:
+        raise ValueError(f"ventana debe ser >= 1 (recibido {ventana})")  # [-0:] tomaría todas las velas
+    cola = ventana + VELAS_NECESARIAS - 1
+    o, h, l, c = (np.atleast_2d(np.asarray(x, dtype=float))[:, -cola:] for x in (o, h, l, c))
+    m = detectar(o, h, l, c)[:, :, -ventana:]                    # (P, S, W)
+    peso_edad = decaimiento ** np.arange(m.shape[2] - 1, -1, -1)  # la vela más reciente pesa 1
+    score = m * FUERZAS[:, None, None] * peso_edad[None, None, :]
+    plano = score.transpose(1, 0, 2).reshape(score.shape[1], -1)  # (S, P*W)
+    mejor = plano.argmax(axis=1)
+    resultado = []
+    for s, idx in enumerate(mejor):
+        if plano[s, idx] <= 0:
+            resultado.append({"patron": SIN_PATRON, "direccion": 0, "hace_velas": None})
+            continue
+        p, w = divmod(int(idx), m.shape[2])
+        resultado.append({
+            "patron": NOMBRES[p],
+            "direccion": int(DIRECCIONES[p]),
+            "hace_velas": int(m.shape[2] - 1 - w),
+        })
+    return resultado
+
+
+def patron_mas_fuerte(df: pd.DataFrame, ventana: int = 3) -> Dict[str, Any]:
+    if df is None or len(df) < VELAS_NECESARIAS:
+        return {"patron": SIN_PATRON, "direccion": 0, "hace_velas": None}
+    return patron_mas_fuerte_lote(
+        df["open"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy(), ventana
+    )[0]
+
@@ -0,0 +1,174 @@
+# planificador.py
+# Planificador alineado al cierre de velas para bot_integrado.
+# Despierta justo después de cada límite de `intervalo` (+ espera_cierre_segundos),
+# analiza sólo los símbolos con una vela cerrada nueva y reparte el trabajo en la
+# ventana del intervalo por prioridad: posiciones abiertas y simbolos_recomendados
+# primero, el resto espaciado. Reporta el lag de planificación de cada ciclo.
+
+import math
+import threading
+import time
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+from bus_eventos import BUS
+from grabacion import SESION
+from utils import intervalo_a_segundos, cargar_operaciones_dashboard, seccion_config
+
+PRIORIDAD_POSICION = 0
+PRIORIDAD_RECOMENDADO = 1
+PRIORIDAD_NORMAL = 2
+
+
+def config_planificador(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "planificador")
+    return {
+        "alineado_a_velas": bool(raw.get("alineado_a_velas", False)),
+        "espera_cierre_segundos": max(0.0, float(raw.get("espera_cierre_segundos", 2.0))),
+        "ventana_reparto_pct": min(100.0, max(0.0, float(raw.get("ventana_reparto_pct", 60.0)))),
+    }
+
+
+# Con supervisor las operaciones viven en su memoria (EstadoCompartido): no se relee data.js
+_fuente_operaciones: Optional[Callable[[], List[Dict[str, Any]]]] = None
+
+
+def usar_operaciones_en_memoria(fuente: Optional[Callable[[], List[Dict[str, Any]]]]) -> None:
+    global _fuente_operaciones
+    _fuente_operaciones = fuente
+
+
+def simbolos_con_posicion_abierta() -> set:
+    fuente = cargar_operaciones_dashboard
+    if _fuente_operaciones is not None and BUS.activo():
+        fuente = _fuente_operaciones
+    # Misma clave en ambos casos: la reproducción (sin supervisor) consume lo grabado
+    operaciones = SESION.capturar("archivo", "Dashboard/data.js", fuente)
+    return {op.get("simbolo") for op in operaciones if op.get("estado") == "Confirmada"}
+
+
+class PlanificadorVelas:
+
+    def __init__(self):
+        self._ultima_vela: Dict[str, int] = {}   # símbolo → open_time (ms) de la última vela cerrada analizada
+        self._ultimo_limite: Optional[int] = None  # límite de intervalo (ms) del último ciclo
+        self._objetivo: float = 0.0
+
+    def esperar_cierre(self, intervalo: str, pcfg: Dict[str, Any],
+                       detener: Optional[threading.Event] = None) -> int:
+        seg = intervalo_a_segundos(intervalo)
+        espera = pcfg["espera_cierre_segundos"]
+        ahora = SESION.ahora("planificador")
+        # Último límite cuyo margen de asentamiento ya pasó
+        limite = int(math.floor((ahora - espera) / seg) * seg)
+        if self._ultimo_limite is not None and limite * 1000 <= self._ultimo_limite:
+            limite = self._ultimo_limite // 1000 + seg
+            objetivo = limite + espera
+            print(f"⏳ Esperando {objetivo - ahora:.1f}s al cierre de vela {intervalo}…", flush=True)
+            SESION.dormir(objetivo - time.time(), detener)
+        elif self._ultimo_limite is not None and limite * 1000 > self._ultimo_limite + seg * 1000:
+            saltados = (limite * 1000 - self._ultimo_limite) // (seg * 1000) - 1
+            print(f"⚠️ [PLAN] Ciclo anterior excedió el intervalo: {saltados} vela(s) sin ciclo propio.", flush=True)
+        self._ultimo_limite = limite * 1000
+        self._objetivo = limite + espera
+        return self._ultimo_limite
+
+    def vela_cerrada_ms(self, intervalo: str) -> int:
+        # open_time de la vela que cerró en el último límite planificado
+        return self._ultimo_limite - intervalo_a_segundos(intervalo) * 1000
+
+    def es_vela_nueva(self, simbolo: str, open_ms: int) -> bool:
+        return self._ultima_vela.get(simbolo, -1) < open_ms
+
+    def marcar_analizada(self, simbolo: str, open_ms: int) -> None:
+        self._ultima_vela[simbolo] = max(open_ms, self._ultima_vela.get(simbolo, -1))
+
+    def exportar(self) -> Dict[str, Any]:
+        return {"ultima_vela": dict(self._ultima_vela)}
+
+    def restaurar(self, estado: Dict[str, Any]) -> None:
+        # Evita reanalizar (y re-señalar) la misma vela cerrada tras un reinicio
+        for simbolo, open_ms in estado.get("ultima_vela", {}).items():
+            self._ultima_vela[simbolo] = max(open_ms, self._ultima_vela.get(simbolo, -1))
+
+    def priorizar(self, simbolos: List[str], cfg: Dict[str, Any]) -> List[Tuple[int, str]]:
+        abiertas = simbolos_con_posicion_abierta()
+        recomendados = set(cfg.get("simbolos_recomendados") or [])
+        con_prioridad = []
+        for s in simbolos:
+            if s in abiertas:
+                p = PRIORIDAD_POSICION
+            elif s in recomendados:
+                p = PRIORIDAD_RECOMENDADO
+            else:
+                p = PRIORIDAD_NORMAL
+            con_prioridad.append((p, s))
+        con_prioridad.sort(key=lambda x: x[0])  # sort estable: respeta el orden original
+        return con_prioridad
+
+    def pendientes(self, simbolos: List[str], cerrada_ms: int) -> List[str]:
+        # Símbolos cuya vela cerrada `cerrada_ms` todavía no se analizó
+        return [s for s in simbolos if self._ultima_vela.get(s, -1) < cerrada_ms]
+
+    def turnos(self, simbolos: List[str], cfg: Dict[str, Any]) -> List[Tuple[float, int, str]]:
+        # (desfase en segundos, prioridad, símbolo): urgentes en 0, el resto repartido en la ventana
+        # del intervalo. Lo usan el ciclo secuencial y los workers de escaneo_distribuido.
+        pcfg = config_planificador(cfg)
+        seg = intervalo_a_segundos(cfg.get("intervalo", "1m"))
+        ordenados = self.priorizar(simbolos, cfg)
+        resto = [s for p, s in ordenados if p == PRIORIDAD_NORMAL]
+        ventana = 0.0
+        if pcfg["alineado_a_velas"]:
+            ventana = max(0.0, seg * pcfg["ventana_reparto_pct"] / 100.0 - pcfg["espera_cierre_segundos"])
+        return ([(0.0, p, s) for p, s in ordenados if p < PRIORIDAD_NORMAL]
+                + [(ventana * i / len(resto), PRIORIDAD_NORMAL, s) for i, s in enumerate(resto)])
+
+    def lag(self, inicio: float) -> float:
+        return inicio - self._objetivo
+
+    def reportar(self, intervalo: str, lag: float, urgentes: int, repartidos: int, omitidos: int,
+                 inicio: float) -> Dict[str, Any]:
+        reporte = {
+            "lag_ms": round(lag * 1000.0, 1),
+            "urgentes": urgentes,
+            "repartidos": repartidos,
+            "omitidos": omitidos,
+            "duracion_s": round(time.time() - inicio, 2),
+        }
+        print(
+            f"⏱️ [PLAN] Vela {intervalo} cerrada: lag={reporte['lag_ms']}ms "
+            f"urgentes={reporte['urgentes']} repartidos={reporte['repartidos']} "
+            f"sin vela nueva={reporte['omitidos']} duración={reporte['duracion_s']}s",
+            flush=True,
+        )
+        return reporte
+
+    def ejecutar_ciclo(self, simbolos: List[str], cfg: Dict[str, Any],
+                       procesar: Callable[[str, Dict[str, Any]], None],
+                       detener: Optional[threading.Event] = None) -> Dict[str, Any]:
+        intervalo = cfg.get("intervalo", "1m")
+        inicio = time.time()
+        lag = self.lag(inicio)
+
+        pendientes = self.pendientes(simbolos, self.vela_cerrada_ms(intervalo))
+        turnos = self.turnos(pendientes, cfg)
+        urgentes = [s for _, p, s in turnos if p < PRIORIDAD_NORMAL]
+        resto = [(desfase, s) for desfase, p, s in turnos if p == PRIORIDAD_NORMAL]
+
+        for s in urgentes:
+            if detener is not None and detener.is_set():
+                break
+            procesar(s, cfg)
+
+        base = time.time()
+        for desfase, s in resto:
+            pausa = base + desfase - time.time()
+            if pausa > 0:
+                SESION.dormir(pausa, detener)
+            if detener is not None and detener.is_set():
+                break
+            procesar(s, cfg)
+
+        return self.reportar(intervalo, lag, len(urgentes), len(resto), len(simbolos) - len(pendientes), inicio)
+
+
+PLANIFICADOR = PlanificadorVelas()
@@ -0,0 +1,167 @@
+# screener.py
+# Screener del universo USDT spot que genera simbolos_filtrados.json
+# (el archivo que bot_integrado._leer_filtered acepta si tiene <= 70 min).
+# Dos requests por pasada: ticker 24h masivo + exchangeInfo. El ranking de
+# todos los pares se hace en una sola pasada vectorizada con NumPy.
+
+import json
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from gobernador_peso import GOBERNADOR, PRIORIDAD_ESCANEO, config_gobernador
+from utils import escribir_texto_atomico, seccion_config
+
+RUTA_FILTRADOS = "simbolos_filtrados.json"
+
+# Tokens apalancados y stablecoins contra USDT no aportan señales útiles
+_SUFIJOS_EXCLUIDOS = ("UPUSDT", "DOWNUSDT", "BULLUSDT", "BEARUSDT")
+_BASES_ESTABLES = {"USDC", "FDUSD", "TUSD", "BUSD", "USDP", "DAI", "EUR", "AEUR", "USDE", "PYUSD", "EURI"}
+
+
+def config_screener(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "screener")
+    pesos = raw.get("pesos", {}) if isinstance(raw.get("pesos", {}), dict) else {}
+    return {
+        "frecuencia_minutos": float(raw.get("frecuencia_minutos", 30)),
+        "max_simbolos": int(raw.get("max_simbolos", 30)),
+        "min_volumen_usdt": float(raw.get("min_volumen_usdt", 5_000_000)),
+        "min_trades": int(raw.get("min_trades", 5_000)),
+        "min_volatilidad_pct": float(raw.get("min_volatilidad_pct", 2.0)),
+        "max_volatilidad_pct": float(raw.get("max_volatilidad_pct", 40.0)),
+        "min_cambio_pct": float(raw.get("min_cambio_pct", -5.0)),
+        "sobre_vwap": bool(raw.get("sobre_vwap", True)),
+        "pesos": {
+            "liquidez": float(pesos.get("liquidez", 0.5)),
+            "volatilidad": float(pesos.get("volatilidad", 0.25)),
+            "tendencia": float(pesos.get("tendencia", 0.25)),
+        },
+    }
+
+
+def _descargar_universo() -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    r = GOBERNADOR.get("/api/v3/ticker/24hr", prioridad=PRIORIDAD_ESCANEO, timeout=20)
+    r.raise_for_status()
+    tickers = r.json()
+    r = GOBERNADOR.get("/api/v3/exchangeInfo", {"permissions": "SPOT"}, prioridad=PRIORIDAD_ESCANEO, timeout=20)
+    r.raise_for_status()
+    return tickers, r.json()
+
+
+def _simbolos_operables(exchange_info: Dict[str, Any]) -> set:
+    operables = set()
+    for s in exchange_info.get("symbols", []):
+        if s.get("status") != "TRADING" or s.get("quoteAsset") != "USDT":
+            continue
+        if not s.get("isSpotTradingAllowed", True):
+            continue
+        if s.get("baseAsset") in _BASES_ESTABLES or s["symbol"].endswith(_SUFIJOS_EXCLUIDOS):
+            continue
+        operables.add(s["symbol"])
+    return operables
+
+
+def _rank_pct(valores: np.ndarray) -> np.ndarray:
+    # Rango percentil en [0, 1]; robusto frente a outliers de volumen
+    if valores.size <= 1:
+        return np.ones_like(valores, dtype=float)
+    # Empates con el rango promedio: el resultado no depende del orden de los tickers
+    rank = pd.Series(valores).rank(method="average").to_numpy()
+    return (rank - 1.0) / (valores.size - 1)
+
+
+def rankear_universo(tickers: List[Dict[str, Any]], operables: set, scfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+    filas = [t for t in tickers if t.get("symbol") in operables]
+    if not filas:
+        return []
+    simbolos = np.array([t["symbol"] for t in filas])
+    campos = ("lastPrice", "highPrice", "lowPrice", "weightedAvgPrice", "priceChangePercent", "quoteVolume", "count")
+    m = np.array([[t.get(c, 0) for c in campos] for t in filas], dtype=float)
+    ultimo, alto, bajo, vwap, cambio, volumen, trades = m.T
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volatilidad = np.where(ultimo > 0, (alto - bajo) / ultimo * 100.0, 0.0)
+
+    mascara = (
+        (ultimo > 0)
+        & (volumen >= scfg["min_volumen_usdt"])
+        & (trades >= scfg["min_trades"])
+        & (volatilidad >= scfg["min_volatilidad_pct"])
+        & (volatilidad <= scfg["max_volatilidad_pct"])
+        & (cambio >= scfg["min_cambio_pct"])
+    )
+    if scfg["sobre_vwap"]:
+        mascara &= ultimo >= vwap
+    if not mascara.any():
+        return []
+
+    idx = np.flatnonzero(mascara)
+    p = scfg["pesos"]
+    score = (
+        p["liquidez"] * _rank_pct(np.log10(volumen[idx] + 1.0))
+        + p["volatilidad"] * _rank_pct(volatilidad[idx])
+        + p["tendencia"] * _rank_pct(cambio[idx])
+    )
+    # Desempate por símbolo: mismo top para el mismo universo, venga en el orden que venga
+    top = idx[np.lexsort((simbolos[idx], -score))[:scfg["max_simbolos"]]]
+    score_por_idx = dict(zip(idx.tolist(), score.tolist()))
+    return [
+        {
+            "symbol": str(simbolos[i]),
+            "score": round(score_por_idx[i], 4),
+            "volumen_usdt": round(float(volumen[i]), 2),
+            "volatilidad_pct": round(float(volatilidad[i]), 2),
+            "cambio_pct": round(float(cambio[i]), 2),
+        }
+        for i in top
+    ]
+
+
+def escribir_atomico(ruta: str, data: Dict[str, Any]) -> None:
+    escribir_texto_atomico(ruta, json.dumps(data, indent=2, ensure_ascii=False))
+
+
+def ejecutar_screener(cfg: Dict[str, Any], ruta: str = RUTA_FILTRADOS) -> List[str]:
+    scfg = config_screener(cfg)
+    GOBERNADOR.configurar(config_gobernador(cfg))
+    tickers, info = _descargar_universo()
+    t0 = time.perf_counter()
+    operables = _simbolos_operables(info)
+    ranking = rankear_universo(tickers, operables, scfg)
+    ms = (time.perf_counter() - t0) * 1000.0
+    simbolos = [r["symbol"] for r in ranking]
+    escribir_atomico(ruta, {
+        "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "symbols": simbolos,
+        "universo": len(operables),
+        "ranking": ranking,
+    })
+    print(f"🔎 [SCREENER] {len(operables)} pares USDT → {len(simbolos)} seleccionados en {ms:.1f} ms", flush=True)
+    return simbolos
+
+
+def start_loop():
+    print("🔎 Screener de símbolos iniciado…", flush=True)
+    while True:
+        inicio = time.time()
+        cfg = {}
+        try:
+            with open("config.json", "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+            ejecutar_screener(cfg)
+        except KeyboardInterrupt:
+            print("🛑 Interrumpido por usuario.", flush=True)
+            break
+        except Exception as e:
+            print(f"❌ [SCREENER] Error: {e}", flush=True)
+            traceback.print_exc()
+        espera = max(1, config_screener(cfg)["frecuencia_minutos"] * 60 - (time.time() - inicio))
+        time.sleep(espera)
+
+
+if __name__ == "__main__":
+    start_loop()
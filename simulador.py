@@ -0,0 +1,130 @@
+# simulador.py
+# Paper trading / prueba de carga de la lógica de posiciones sobre ExchangeSimulado.
+# Corre miles de posiciones simuladas por trailing_manager (trailing/SL) reproduciendo
+# velas guardadas mucho más rápido que el tiempo real.
+#   python simulador.py descargar BTCUSDT 1m 1000      → datos_klines/BTCUSDT.json
+#   python simulador.py correr --posiciones 5000 --paso 15 [--aceleracion 0]
+
+import argparse
+import glob
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, Any, List
+
+import numpy as np
+
+import trailing_manager
+from exchange import ExchangeSimulado, configurar_exchange
+from gobernador_peso import GOBERNADOR
+
+DIR_KLINES = "datos_klines"
+
+
+def descargar_klines(simbolo: str, intervalo: str, limit: int, directorio: str = DIR_KLINES) -> str:
+    r = GOBERNADOR.get("/api/v3/klines", {"symbol": simbolo, "interval": intervalo, "limit": limit}, timeout=15)
+    r.raise_for_status()
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"{simbolo}.json")
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(r.json(), f)
+    print(f"💾 {simbolo}: {limit} velas {intervalo} guardadas en {ruta}", flush=True)
+    return ruta
+
+
+def rutas_klines(directorio: str = DIR_KLINES) -> Dict[str, str]:
+    rutas = {}
+    for ruta in sorted(glob.glob(os.path.join(directorio, "*.json")) + glob.glob(os.path.join(directorio, "*.csv"))):
+        rutas[os.path.splitext(os.path.basename(ruta))[0].split("-")[0]] = ruta
+    return rutas
+
+
+def generar_posiciones(ex: ExchangeSimulado, n: int, monto_usdt: float = 10.0,
+                       sl_pct: float = 2.0, tp_pct: float = 4.0, semilla: int = 7) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(semilla)
+    simbolos = ex.simbolos()
+    operaciones = []
+    for i in range(n):
+        simbolo = simbolos[int(rng.integers(len(simbolos)))]
+        entrada = ex.precio(simbolo)
+        operaciones.append({
+            "id": f"SIM_{simbolo}_{i}",
+            "simbolo": simbolo,
+            "precio_entrada": entrada,
+            "cantidad": monto_usdt / entrada,
+            # trailing_manager interpreta trailing_pct como fracción
+            "trailing_pct": float(rng.uniform(0.005, 0.03)),
+            "sl": entrada * (1 - sl_pct / 100),
+            "tp": entrada * (1 + tp_pct / 100),
+            "estado": "Confirmada",
+        })
+    return operaciones
+
+
+def simular(ex: ExchangeSimulado, operaciones: List[Dict[str, Any]], paso_segundos: float = 15.0) -> Dict[str, Any]:
+    tcfg = trailing_manager.config_trailing({"trailing": {"log_seguimiento": False}})
+    configurar_exchange(ex)
+    inicio_real = time.time()
+    inicio_sim = ex.ahora_ms()
+    ticks = 0
+    cerradas = []
+    while not ex.terminado():
+        cerradas.extend(trailing_manager.trailing_manager(operaciones, tcfg))
+        ticks += 1
+        if len(trailing_manager.LIBRO) == 0:
+            break
+        if ex.aceleracion > 0:
+            time.sleep(paso_segundos / ex.aceleracion)
+        else:
+            ex.avanzar(paso_segundos)
+
+    real = max(1e-9, time.time() - inicio_real)
+    sim = (ex.ahora_ms() - inicio_sim) / 1000.0
+    resumen = {
+        "posiciones": len(operaciones),
+        "cerradas": len(cerradas),
+        "abiertas": len(operaciones) - len(cerradas),
+        "por_motivo": dict(Counter(op.get("motivo_cierre") for op in cerradas)),
+        "pyl_usdt": round(sum(op.get("pyl_usdt", 0.0) for op in cerradas), 4),
+        "comisiones_usdt": round(sum(float(o["fills"][0]["commission"]) for o in ex.ordenes), 4),
+        "ticks": ticks,
+        "segundos_simulados": round(sim, 1),
+        "segundos_reales": round(real, 3),
+        "aceleracion_efectiva": round(sim / real, 1),
+        "posiciones_tick_por_seg": round(ticks * len(operaciones) / real, 1),
+    }
+    print(f"🧪 [SIM] {json.dumps(resumen, ensure_ascii=False)}", flush=True)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de posiciones sobre velas guardadas")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    d = sub.add_parser("descargar")
+    d.add_argument("simbolo")
+    d.add_argument("intervalo", nargs="?", default="1m")
+    d.add_argument("limit", nargs="?", type=int, default=1000)
+    c = sub.add_parser("correr")
+    c.add_argument("--dir", default=DIR_KLINES)
+    c.add_argument("--posiciones", type=int, default=1000)
+    c.add_argument("--paso", type=float, default=15.0, help="segundos simulados por tick")
+    c.add_argument("--aceleracion", type=float, default=0.0, help="0 = lo más rápido posible")
+    c.add_argument("--slippage-bps", type=float, default=5.0)
+    c.add_argument("--comision-pct", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.comando == "descargar":
+        descargar_klines(args.simbolo, args.intervalo, args.limit)
+        return
+    rutas = rutas_klines(args.dir)
+    if not rutas:
+        print(f"❌ No hay velas en {args.dir}. Usa: python simulador.py descargar BTCUSDT", flush=True)
+        return
+    ex = ExchangeSimulado.desde_archivos(rutas, aceleracion=args.aceleracion,
+                                         slippage_bps=args.slippage_bps, comision_pct=args.comision_pct)
+    simular(ex, generar_posiciones(ex, args.posiciones), args.paso)
+
+
+if __name__ == "__main__":
+    main()
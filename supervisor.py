@@ -0,0 +1,313 @@
+# supervisor.py
+# Punto de entrada único: corre scanner (bot_integrado), trailing (trailing_manager)
+# y validación (validar_monto_minimo) como tareas cooperativas de un mismo event loop.
+# El estado compartido (operaciones y órdenes pendientes) vive en memoria y se
+# actualiza por el bus de eventos; Dashboard/data.js y ordenes_pendientes.json
+# pasan a ser un snapshot en segundo plano, no el canal de comunicación.
+# Las órdenes pendientes se escriben en el acto (la confirmación de Telegram corre en
+# otro proceso y las lee del archivo), y antes de cada snapshot se incorporan las
+# operaciones que otro proceso haya agregado a data.js en vez de pisarlas.
+
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+import traceback
+from typing import Dict, Any, List, Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from bus_eventos import (
+    BUS,
+    EVENTO_SENAL_EMITIDA,
+    EVENTO_ORDEN_CONFIRMADA,
+    EVENTO_POSICION_ACTUALIZADA,
+    EVENTO_POSICION_CERRADA,
+)
+from dashboard_server import LibroDashboard, config_dashboard, iniciar_en_hilo
+import estado_caliente
+import grabacion
+import planificador
+from utils import cargar_operaciones_dashboard, clave_operacion, escribir_texto_atomico, seccion_config
+
+RUTA_DATA_JS = "Dashboard/data.js"
+RUTA_ORDENES = "ordenes_pendientes.json"
+
+
+def _mtime(ruta: str):
+    try:
+        return os.stat(ruta).st_mtime_ns
+    except OSError:
+        return None
+
+
+def config_supervisor(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    raw = seccion_config(cfg, "supervisor")
+    return {
+        "trailing_segundos": float(raw.get("trailing_segundos", 15)),
+        "validacion_segundos": float(raw.get("validacion_segundos", 10)),
+        "snapshot_segundos": float(raw.get("snapshot_segundos", 30)),
+    }
+
+
+class EstadoCompartido:
+
+    def __init__(self, operaciones: List[Dict[str, Any]], ordenes: Dict[str, Any]):
+        self.operaciones = operaciones
+        self.ordenes = ordenes
+        self._indice = {clave_operacion(op): i for i, op in enumerate(operaciones)}
+        self.operaciones_sucias = False
+        self.ordenes_sucias = False
+        self._mtime_data_js = _mtime(RUTA_DATA_JS)  # última versión de data.js leída o escrita por nosotros
+
+    @classmethod
+    def cargar(cls) -> "EstadoCompartido":
+        ordenes = {}
+        try:
+            with open(RUTA_ORDENES, "r", encoding="utf-8") as f:
+                ordenes = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ [SUP] ordenes_pendientes.json ilegible, se parte vacío: {e}", flush=True)
+        return cls(cargar_operaciones_dashboard(), ordenes)
+
+    def suscribir(self, bus) -> None:
+        bus.suscribir(EVENTO_SENAL_EMITIDA, self._on_senal_emitida)
+        bus.suscribir(EVENTO_ORDEN_CONFIRMADA, self._on_orden_confirmada)
+        bus.suscribir(EVENTO_POSICION_ACTUALIZADA, self._on_posicion)
+        bus.suscribir(EVENTO_POSICION_CERRADA, self._on_posicion)
+
+    def _upsert_operacion(self, op: Dict[str, Any]) -> None:
+        clave = clave_operacion(op)
+        i = self._indice.get(clave)
+        if i is None:
+            self._indice[clave] = len(self.operaciones)
+            self.operaciones.append(op)
+        else:
+            if self.operaciones[i] == op:
+                return
+            self.operaciones[i] = op
+        self.operaciones_sucias = True
+
+    def _escribir_ordenes(self) -> None:
+        self.ordenes_sucias = False
+        escribir_texto_atomico(RUTA_ORDENES, json.dumps(self.ordenes, indent=2, ensure_ascii=False))
+
+    def _on_senal_emitida(self, payload: Dict[str, Any]) -> None:
+        # Write-through: una confirmación rápida en Telegram tiene que encontrar la orden
+        self.ordenes[payload["id"]] = payload
+        self._escribir_ordenes()
+
+    def _on_orden_confirmada(self, op: Dict[str, Any]) -> None:
+        if self.ordenes.pop(op.get("id"), None) is not None:
+            self._escribir_ordenes()
+        self._upsert_operacion(op)
+        print(f"✅ [SUP] Operación confirmada en memoria: {op.get('simbolo')}", flush=True)
+
+    def _on_posicion(self, op: Dict[str, Any]) -> None:
+        self._upsert_operacion(op)
+
+    def reingerir_externas(self) -> int:
+        # data.js cambió fuera del supervisor (p.ej. el handler de confirmación en otro
+        # proceso): las operaciones que no conocemos entran como confirmadas por el bus,
+        # así también las ven trailing y el dashboard. Las conocidas mantienen la versión en memoria.
+        mtime = _mtime(RUTA_DATA_JS)
+        if mtime is None or mtime == self._mtime_data_js:
+            return 0
+        self._mtime_data_js = mtime
+        nuevas = [op for op in cargar_operaciones_dashboard() if clave_operacion(op) not in self._indice]
+        for op in nuevas:
+            self._on_orden_confirmada(op)
+            BUS.publicar(EVENTO_POSICION_ACTUALIZADA, op)
+        if nuevas:
+            print(f"📥 [SUP] {len(nuevas)} operación(es) agregadas a data.js por otro proceso.", flush=True)
+        return len(nuevas)
+
+    def persistir(self) -> None:
+        self.reingerir_externas()
+        if self.operaciones_sucias:
+            self.operaciones_sucias = False
+            contenido = "const operaciones = " + json.dumps(self.operaciones, indent=2, ensure_ascii=False) + ";"
+            escribir_texto_atomico(RUTA_DATA_JS, contenido)
+            self._mtime_data_js = _mtime(RUTA_DATA_JS)
+        if self.ordenes_sucias:
+            self._escribir_ordenes()
+
+
+async def _restaurar_estado(estado: EstadoCompartido, acfg: Dict[str, Any],
+                            cfg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # Posiciones, planificador y filtros: sin pandas, el trailing arranca en cuanto terminan.
+    # Las velas las aplica el scanner después de importar bot_integrado.
+    snapshot = None
+    if acfg["activo"]:
+        try:
+            snapshot = await asyncio.to_thread(estado_caliente.cargar, acfg["ruta"], acfg["max_edad_horas"])
+            if snapshot is not None:
+                n = await asyncio.to_thread(estado_caliente.aplicar, snapshot, estado.operaciones, False)
+                print(f"♻️ [SUP] Estado caliente restaurado: {n['posiciones']} posiciones con max_price "
+                      f"recuperado, {snapshot.get('n_velas', 0)} símbolos con velas en espera del scanner.",
+                      flush=True)
+        except Exception as e:
+            print(f"⚠️ [SUP] No se pudo restaurar el estado caliente: {e}", flush=True)
+    # La cabecera de la grabación lleva el estado ya restaurado (velas pendientes incluidas)
+    await asyncio.to_thread(grabacion.iniciar, cfg)
+    return snapshot
+
+
+async def _tarea_scanner(restauracion: "asyncio.Task[Optional[Dict[str, Any]]]") -> None:
+    # pandas & cía. se importan fuera del loop: trailing y dashboard ya están corriendo
+    bot_integrado = await asyncio.to_thread(importlib.import_module, "bot_integrado")
+    snapshot = await restauracion
+    if snapshot is not None:
+        try:
+            n_velas = await asyncio.to_thread(estado_caliente.aplicar_velas, snapshot)
+            print(f"♻️ [SUP] Velas restauradas: {n_velas} símbolos.", flush=True)
+        except Exception as e:
+            print(f"⚠️ [SUP] No se pudieron restaurar las velas: {e}", flush=True)
+    while True:
+        inicio = time.time()
+        try:
+            cfg, alineado, n_simbolos = await asyncio.to_thread(bot_integrado.ejecutar_ciclo)
+            if not n_simbolos:
+                await asyncio.sleep(15)
+                continue
+            if not alineado:
+                await asyncio.sleep(bot_integrado._segundos_hasta_siguiente_ciclo(inicio, cfg))
+            bot_integrado._imprimir_resumen_histeresis()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ [SUP] Error en scanner: {e}", flush=True)
+            traceback.print_exc()
+            await asyncio.sleep(5)
+
+
+async def _tarea_trailing(estado: EstadoCompartido, scfg: Dict[str, Any], cfg: Dict[str, Any],
+                          restauracion: "asyncio.Task[Optional[Dict[str, Any]]]") -> None:
+    import trailing_manager
+    tcfg = trailing_manager.config_trailing(cfg)
+    # El primer tick necesita los max_price restaurados
+    await restauracion
+    while True:
+        try:
+            # Copia de la lista: las novedades vuelven por el bus y se aplican en el loop
+            await asyncio.to_thread(trailing_manager.trailing_manager, list(estado.operaciones), tcfg)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ [SUP] Error en trailing: {e}", flush=True)
+            traceback.print_exc()
+        await asyncio.sleep(scfg["trailing_segundos"])
+
+
+async def _tarea_validacion(estado: EstadoCompartido, scfg: Dict[str, Any]) -> None:
+    import validar_monto_minimo
+    while True:
+        try:
+            validar_monto_minimo.validar_ordenes(estado.ordenes)
+        except Exception as e:
+            print(f"❌ [SUP] Error en validación: {e}", flush=True)
+        await asyncio.sleep(scfg["validacion_segundos"])
+
+
+async def _tarea_snapshot(estado: EstadoCompartido, scfg: Dict[str, Any]) -> None:
+    while True:
+        await asyncio.sleep(scfg["snapshot_segundos"])
+        try:
+            estado.persistir()
+        except Exception as e:
+            print(f"❌ [SUP] Error guardando snapshot: {e}", flush=True)
+
+
+async def _tarea_estado_caliente(acfg: Dict[str, Any]) -> None:
+    while True:
+        await asyncio.sleep(acfg["snapshot_segundos"])
+        try:
+            await asyncio.to_thread(estado_caliente.guardar, acfg["ruta"])
+        except Exception as e:
+            print(f"❌ [SUP] Error guardando estado caliente: {e}", flush=True)
+
+
+async def _precalentar_ejecutor() -> None:
+    try:
+        from ejecutor_ordenes import obtener_ejecutor
+        await asyncio.to_thread(obtener_ejecutor().calentar)
+    except Exception as e:
+        print(f"⚠️ [SUP] No se pudo precalentar el ejecutor de órdenes: {e}", flush=True)
+
+
+def _cargar_config() -> Dict[str, Any]:
+    try:
+        with open("config.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"❌ Error cargando config.json: {e}", flush=True)
+        return {}
+
+
+async def main() -> None:
+    print("🚀 Supervisor iniciado (scanner + trailing + validación)…", flush=True)
+    cfg = _cargar_config()
+    scfg = config_supervisor(cfg)
+    acfg = estado_caliente.config_arranque(cfg)
+    estado = EstadoCompartido.cargar()
+    BUS.adjuntar_loop(asyncio.get_running_loop())
+    estado.suscribir(BUS)
+    # El planificador prioriza posiciones abiertas leyendo esta lista, no data.js
+    planificador.usar_operaciones_en_memoria(lambda: list(estado.operaciones))
+    dcfg = config_dashboard(cfg)
+    servidor = None
+    if dcfg["activo"]:
+        libro = LibroDashboard()
+        libro.cargar(estado.operaciones)
+        libro.suscribir_bus(BUS)
+        servidor = iniciar_en_hilo(libro, dcfg)
+    # El ejecutor se calienta en segundo plano: el arranque no espera a la red
+    asyncio.create_task(_precalentar_ejecutor(), name="ejecutor")
+    # La restauración corre en segundo plano: validación y dashboard no la esperan
+    restauracion = asyncio.create_task(_restaurar_estado(estado, acfg, cfg), name="restauracion")
+    tareas = [
+        restauracion,
+        asyncio.create_task(_tarea_scanner(restauracion), name="scanner"),
+        asyncio.create_task(_tarea_trailing(estado, scfg, cfg, restauracion), name="trailing"),
+        asyncio.create_task(_tarea_validacion(estado, scfg), name="validacion"),
+        asyncio.create_task(_tarea_snapshot(estado, scfg), name="snapshot"),
+    ]
+    if acfg["activo"]:
+        tareas.append(asyncio.create_task(_tarea_estado_caliente(acfg), name="estado_caliente"))
+    try:
+        await asyncio.gather(*tareas)
+    finally:
+        # Cancelar la tarea no frena el hilo de asyncio.to_thread: el ciclo de escaneo
+        # en curso mira este flag en cada símbolo, y asyncio.run no espera el ciclo entero
+        bot_integrado = sys.modules.get("bot_integrado")
+        if bot_integrado is not None:
+            bot_integrado.DETENER.set()
+        for t in tareas:
+            t.cancel()
+        if servidor is not None:
+            servidor.shutdown()
+        BUS.desadjuntar_loop()
+        planificador.usar_operaciones_en_memoria(None)
+        BUS.desuscribir_todo()
+        from escaneo_distribuido import COORDINADOR
+        COORDINADOR.detener()
+        grabacion.SESION.detener()
+        estado.persistir()
+        if acfg["activo"]:
+            try:
+                estado_caliente.guardar(acfg["ruta"])
+            except Exception as e:
+                print(f"❌ [SUP] Error guardando estado caliente: {e}", flush=True)
+        print("💾 [SUP] Snapshot final guardado.", flush=True)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("🛑 Interrumpido por usuario.", flush=True)
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+import diario_senales as DS
+
+
+def _fila(simbolo, decision, **extra):
+    fila = DS.nueva_fila(simbolo, "1m")
+    fila.update(decision=decision, **extra)
+    return fila
+
+
+def test_ida_y_vuelta(tmp_path):
+    diario = DS.DiarioSenales(directorio=str(tmp_path))
+    at = {"precio_actual": 101.5, "rsi": 55.0, "macd": 0.25, "ema_short": 101.0, "ema_long": 100.0,
+          "atr_pct": 0.4, "volumen_rel": 1.3, "fuerza": "Media", "patron": "Martillo",
+          "patron_direccion": 1, "confluencia_mtf": 0.667}
+    diario.registrar(_fila("BTCUSDT", DS.ACEPTADA, at=at, ia={"veredicto": "Sí", "confiabilidad": 72},
+                           override=True, conf=72.0, fuerza_conf="Fuerte", penalizacion=5.0, conf_final=67.0))
+    diario.registrar(_fila("ETHUSDT", DS.ANTIFLOOD))
+    assert diario.volcar() == 2
+    assert len(diario) == 0
+
+    filas = DS.leer(directorio=str(tmp_path))
+    assert len(filas) == 2
+    btc = DS.filtrar(filas, simbolo="btcusdt")[0]
+    assert btc["decision"] == DS.ACEPTADA
+    assert btc["precio"] == 101.5
+    assert btc["patron"] == b"Martillo"
+    assert btc["patron_dir"] == 1
+    assert btc["fuerza_at"] == DS.FUERZAS["Media"]
+    assert btc["ia_veredicto"] == 1
+    assert btc["override"]
+    assert btc["conf_final"] == np.float32(67.0)
+
+    eth = DS.filtrar(filas, decision="antiflood")[0]
+    assert eth["simbolo"] == b"ETHUSDT"
+    assert eth["ia_veredicto"] == -1
+    assert math.isnan(eth["rsi"])
+
+    assert DS.resumen_decisiones(filas) == {"aceptada": 1, "antiflood": 1}
+    assert DS.resumen_por_simbolo(filas) == {"BTCUSDT": {"aceptada": 1}, "ETHUSDT": {"antiflood": 1}}
+
+
+def test_volcados_sucesivos_se_acumulan(tmp_path):
+    diario = DS.DiarioSenales(directorio=str(tmp_path))
+    for ciclo in range(3):
+        for i in range(300):  # supera la capacidad inicial del buffer
+            diario.registrar(_fila(f"S{i}USDT", DS.VEREDICTO_NO))
+        diario.volcar()
+    filas = DS.leer(directorio=str(tmp_path))
+    assert len(filas) == 900
+    assert np.all(np.diff(filas["ts_ms"]) >= 0)
+
+
+def test_valores_no_numericos_no_cortan_el_registro(tmp_path):
+    diario = DS.DiarioSenales(directorio=str(tmp_path))
+    diario.registrar(_fila("BTCUSDT", DS.VEREDICTO_NO, at={"rsi": None, "patron_direccion": "?"},
+                           ia={"veredicto": "No", "confiabilidad": "alta"}))
+    diario.volcar()
+    fila = DS.leer(directorio=str(tmp_path))[0]
+    assert math.isnan(fila["rsi"]) and math.isnan(fila["ia_conf"])
+    assert fila["patron_dir"] == 0
+    assert fila["ia_veredicto"] == 0
+
+
+def test_registro_truncado_al_final_se_descarta(tmp_path):
+    diario = DS.DiarioSenales(directorio=str(tmp_path))
+    diario.registrar(_fila("BTCUSDT", DS.ACEPTADA))
+    diario.volcar()
+    ruta = next(tmp_path.iterdir())
+    with open(ruta, "ab") as f:
+        f.write(b"\x00" * (DS.ESQUEMA.itemsize // 2))
+    assert len(DS.leer(directorio=str(tmp_path))) == 1
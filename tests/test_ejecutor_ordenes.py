@@ -0,0 +1,141 @@
+import json
+import time
+from decimal import Decimal
+
+import pytest
+import requests
+
+import ejecutor_ordenes as EO
+
+
+def _respuesta(status=200, cuerpo=None):
+    r = requests.Response()
+    r.status_code = status
+    r._content = json.dumps(cuerpo if cuerpo is not None else {}).encode("utf-8")
+    return r
+
+
+def _info(step="0.001", min_qty="0.001", tick="0.01", min_notional="5"):
+    return {"symbols": [{"symbol": "BTCUSDT", "filters": [
+        {"filterType": "LOT_SIZE", "stepSize": step, "minQty": min_qty},
+        {"filterType": "PRICE_FILTER", "tickSize": tick},
+        {"filterType": "NOTIONAL", "minNotional": min_notional},
+    ]}]}
+
+
+def _fill(precio="100.00", qty="0.500"):
+    return {"orderId": 7, "fills": [{"price": precio, "qty": qty, "commission": "0"}]}
+
+
+class _GobernadorFalso:
+    # Responde exchangeInfo/time y las órdenes en el orden en que se encolan
+
+    def __init__(self, info=None, ordenes=()):
+        self.info = info or _info()
+        self.ordenes = list(ordenes)
+        self.llamadas = []
+        self.relojes = []
+
+    def get(self, ruta, params=None, **kw):
+        self.llamadas.append(ruta)
+        if ruta == "/api/v3/time":
+            return _respuesta(cuerpo={"serverTime": int(time.time() * 1000)})
+        return _respuesta(cuerpo=self.info)
+
+    def post(self, ruta, data=None, **kw):
+        self.llamadas.append(ruta)
+        return self.ordenes.pop(0)
+
+    def ajustar_reloj(self, offset):
+        self.relojes.append(offset)
+
+
+@pytest.fixture
+def ejecutor(monkeypatch, tmp_path):
+    def crear(**kw):
+        gob = _GobernadorFalso(**kw)
+        monkeypatch.setattr(EO, "GOBERNADOR", gob)
+        ecfg = EO.config_ejecucion({"ejecucion": {"ruta_metricas": str(tmp_path / "metricas.jsonl")}})
+        ej = EO.EjecutorOrdenes(ecfg)
+        ej._offset_ts = time.time()  # hora recién sincronizada: sin /time antes de cada orden
+        return ej, gob
+    return crear
+
+
+def test_cantidad_y_precio_se_cuantizan_hacia_abajo(ejecutor):
+    ej, _ = ejecutor()
+    prep = ej.preparar_orden("o1", "BTCUSDT", 50, 100.019)
+    # precio 100.019 → 100.01 (tick 0.01); 50 / 100.01 = 0.49995… → 0.499 (step 0.001)
+    assert prep["cantidad"] == "0.499"
+    assert Decimal(prep["cantidad"]) * Decimal("100.01") <= Decimal("50")
+
+
+def test_cantidad_sin_notacion_cientifica(ejecutor):
+    ej, _ = ejecutor(info=_info(step="0.00000100", min_qty="0.00000100", tick="0.01", min_notional="1"))
+    prep = ej.preparar_orden("o1", "BTCUSDT", 1.5, 60000)
+    assert prep["cantidad"] == "0.000025"
+
+
+def test_filtros_se_piden_una_vez(ejecutor):
+    ej, gob = ejecutor()
+    ej.preparar_orden("o1", "BTCUSDT", 50, 100)
+    ej.preparar_orden("o2", "BTCUSDT", 60, 100)
+    assert gob.llamadas.count("/api/v3/exchangeInfo") == 1
+
+
+def test_rechaza_cantidad_bajo_min_qty(ejecutor):
+    ej, _ = ejecutor(info=_info(step="0.001", min_qty="0.01", min_notional="0"))
+    with pytest.raises(EO.ErrorOrden, match="minQty"):
+        ej.preparar_orden("o1", "BTCUSDT", 0.5, 100)
+
+
+def test_rechaza_nocional_bajo_el_minimo(ejecutor):
+    ej, _ = ejecutor(info=_info(min_notional="10"))
+    with pytest.raises(EO.ErrorOrden, match="nocional"):
+        ej.preparar_orden("o1", "BTCUSDT", 9.99, 100)
+    assert "o1" not in ej._preparadas
+
+
+def test_simbolo_desconocido(ejecutor):
+    ej, _ = ejecutor(info={"symbols": []})
+    with pytest.raises(EO.ErrorOrden, match="desconocido"):
+        ej.preparar_orden("o1", "XXXUSDT", 50, 100)
+
+
+def test_ejecutar_confirmada_calcula_fill_y_slippage(ejecutor):
+    ej, gob = ejecutor(ordenes=[_respuesta(cuerpo=_fill("101.00", "0.499"))])
+    ej.preparar_orden("o1", "BTCUSDT", 50, 100)
+    res = ej.ejecutar_confirmada("o1")
+    assert res["cantidad"] == pytest.approx(0.499)
+    assert res["precio_medio"] == pytest.approx(101.0)
+    assert res["slippage_bps"] == pytest.approx(100.0)
+    assert gob.llamadas.count("/api/v3/order") == 1
+    with pytest.raises(EO.ErrorOrden, match="sin preparar"):
+        ej.ejecutar_confirmada("o1")
+
+
+def test_timestamp_fuera_de_ventana_resincroniza_y_reintenta_una_vez(ejecutor):
+    rechazo = _respuesta(400, {"code": EO.ERROR_TIMESTAMP, "msg": "Timestamp outside recvWindow"})
+    ej, gob = ejecutor(ordenes=[rechazo, _respuesta(cuerpo=_fill())])
+    ej.preparar_orden("o1", "BTCUSDT", 50, 100)
+    res = ej.ejecutar_confirmada("o1")
+    assert res["order_id"] == 7
+    assert gob.llamadas == ["/api/v3/exchangeInfo", "/api/v3/order", "/api/v3/time", "/api/v3/order"]
+    assert len(gob.relojes) == 1
+
+
+def test_segundo_rechazo_por_timestamp_no_reintenta_otra_vez(ejecutor):
+    rechazo = {"code": EO.ERROR_TIMESTAMP, "msg": "Timestamp outside recvWindow"}
+    ej, gob = ejecutor(ordenes=[_respuesta(400, rechazo), _respuesta(400, rechazo), _respuesta(cuerpo=_fill())])
+    ej.preparar_orden("o1", "BTCUSDT", 50, 100)
+    with pytest.raises(EO.ErrorOrden, match=str(EO.ERROR_TIMESTAMP)):
+        ej.ejecutar_confirmada("o1")
+    assert gob.llamadas.count("/api/v3/order") == 2
+
+
+def test_otro_rechazo_no_resincroniza(ejecutor):
+    ej, gob = ejecutor(ordenes=[_respuesta(400, {"code": -2010, "msg": "Account has insufficient balance"})])
+    ej.preparar_orden("o1", "BTCUSDT", 50, 100)
+    with pytest.raises(EO.ErrorOrden, match="-2010"):
+        ej.ejecutar_confirmada("o1")
+    assert "/api/v3/time" not in gob.llamadas
@@ -0,0 +1,41 @@
+from collections import Counter
+
+import escaneo_distribuido as DIST
+
+SIMBOLOS = [f"S{i:03d}USDT" for i in range(400)]
+
+
+def test_asignacion_estable_y_en_rango():
+    a = DIST.repartir(SIMBOLOS, 4)
+    assert a == DIST.repartir(list(reversed(SIMBOLOS)), 4)
+    assert set(a.values()) == {0, 1, 2, 3}
+
+
+def test_reparto_equilibrado():
+    carga = Counter(DIST.repartir(SIMBOLOS, 4).values())
+    assert min(carga.values()) > 0.7 * len(SIMBOLOS) / 4
+
+
+def test_agregar_un_worker_solo_mueve_simbolos_hacia_el_nuevo():
+    antes = DIST.repartir(SIMBOLOS, 4)
+    despues = DIST.repartir(SIMBOLOS, 5)
+    movidos = [s for s in SIMBOLOS if antes[s] != despues[s]]
+    assert movidos
+    assert all(despues[s] == 4 for s in movidos)
+    assert len(movidos) < 0.35 * len(SIMBOLOS)
+
+
+def test_quitar_un_worker_solo_mueve_sus_simbolos():
+    antes = DIST.repartir(SIMBOLOS, 5)
+    despues = DIST.repartir(SIMBOLOS, 4)
+    assert all(antes[s] == 4 for s in SIMBOLOS if antes[s] != despues[s])
+
+
+def test_cambiar_la_lista_no_mueve_a_los_demas():
+    antes = DIST.repartir(SIMBOLOS, 4)
+    despues = DIST.repartir(SIMBOLOS[:200] + ["NUEVOUSDT"], 4)
+    assert all(despues[s] == antes[s] for s in SIMBOLOS[:200])
+
+
+def test_un_solo_worker():
+    assert set(DIST.repartir(SIMBOLOS, 1).values()) == {0}
@@ -0,0 +1,140 @@
+import threading
+import time
+from email.utils import formatdate
+
+import requests
+
+import gobernador_peso as GP
+
+
+def _gobernador(**cfg):
+    return GP.GobernadorPeso(GP.config_gobernador({"gobernador_peso": cfg}))
+
+
+def _respuesta(status=200, usado=None, cuerpo=b"{}", **cabeceras):
+    r = requests.Response()
+    r.status_code = status
+    r._content = cuerpo
+    r.headers["Date"] = formatdate(time.time(), usegmt=True)
+    if usado is not None:
+        r.headers[GP.CABECERA_PESO] = str(usado)
+    r.headers.update(cabeceras)
+    return r
+
+
+class _GobernadorAuditado(GP.GobernadorPeso):
+    # Anota la prioridad de cada reserva en el momento en que se concede (dentro del lock)
+
+    def __init__(self, gcfg):
+        self.concedidas = []
+        super().__init__(gcfg)
+
+    def _pausa(self, peso, prioridad, ahora):
+        pausa = super()._pausa(peso, prioridad, ahora)
+        if pausa <= 0:
+            self.concedidas.append(prioridad)
+        return pausa
+
+
+def test_pesos_por_endpoint():
+    assert GP.peso_endpoint("/api/v3/klines", {"symbol": "BTCUSDT"}) == 2
+    assert GP.peso_endpoint("/api/v3/ticker/24hr") == 80
+    assert GP.peso_endpoint("/api/v3/ticker/24hr", {"symbol": "BTCUSDT"}) == 2
+    assert GP.peso_endpoint("/api/v3/ticker/price") == 4
+    assert GP.peso_endpoint("/api/v3/exchangeInfo") == 20
+    assert GP.peso_endpoint("/api/v3/desconocido") == 1
+
+
+def test_reservas_suman_al_minuto():
+    g = _gobernador()
+    g._reservar(2, GP.PRIORIDAD_ESCANEO)
+    g._reservar(4, GP.PRIORIDAD_POSICION)
+    res = g.resumen()
+    assert res["usado"] == 6 and res["propio"] == 6
+
+
+def test_orden_pasa_aunque_el_escaneo_este_frenado():
+    g = _gobernador(limite_peso_min=10, techo_escaneo_pct=50)
+    g._reservar(4, GP.PRIORIDAD_ESCANEO)
+    escaneo = threading.Thread(target=g._reservar, args=(2, GP.PRIORIDAD_ESCANEO), daemon=True)
+    escaneo.start()
+    time.sleep(0.1)
+    assert escaneo.is_alive()  # 4 + 2 supera el techo de escaneo (5)
+
+    inicio = time.time()
+    g._reservar(1, GP.PRIORIDAD_ORDEN)
+    assert time.time() - inicio < 0.5
+
+    g.configurar(GP.config_gobernador({}))  # más presupuesto: el escaneo sigue
+    escaneo.join(timeout=2)
+    assert not escaneo.is_alive()
+
+
+def test_atiende_por_prioridad():
+    g = _GobernadorAuditado(GP.config_gobernador({}))
+    g._bloqueado_hasta = g._reloj() + 0.3
+    hilos = []
+    for prioridad in (GP.PRIORIDAD_ESCANEO, GP.PRIORIDAD_POSICION, GP.PRIORIDAD_ESCANEO, GP.PRIORIDAD_ORDEN):
+        h = threading.Thread(target=g._reservar, args=(1, prioridad))
+        h.start()
+        hilos.append(h)
+        time.sleep(0.03)
+    for h in hilos:
+        h.join(timeout=2)
+    assert g.concedidas == [GP.PRIORIDAD_ORDEN, GP.PRIORIDAD_POSICION, GP.PRIORIDAD_ESCANEO, GP.PRIORIDAD_ESCANEO]
+
+
+def test_techo_de_escaneo_por_worker():
+    gcfg = GP.config_gobernador({"gobernador_peso": {"limite_peso_min": 100, "techo_escaneo_pct": 80}})
+    g = GP.GobernadorPeso(gcfg)
+    g.configurar(gcfg, participantes=4)
+    g._reservar(20, GP.PRIORIDAD_ESCANEO)  # 80 / 4 workers
+    bloqueado = threading.Thread(target=g._reservar, args=(1, GP.PRIORIDAD_ESCANEO), daemon=True)
+    bloqueado.start()
+    time.sleep(0.1)
+    assert bloqueado.is_alive()
+    inicio = time.time()
+    g._reservar(10, GP.PRIORIDAD_POSICION)  # las posiciones no tienen techo por worker
+    assert time.time() - inicio < 0.5
+
+
+def test_cabecera_de_peso_manda():
+    g = _gobernador()
+    g.observar(_respuesta(usado=1234))
+    assert g.resumen()["usado"] == 1234
+    g.observar(_respuesta(usado=10))  # mismo minuto: no baja
+    assert g.resumen()["usado"] == 1234
+
+
+def test_429_pausa_todas_las_prioridades():
+    g = _gobernador()
+    g.observar(_respuesta(status=429, **{"Retry-After": "0.3"}))
+    inicio = time.time()
+    g._reservar(1, GP.PRIORIDAD_ORDEN)
+    assert time.time() - inicio >= 0.25
+
+
+def test_get_identicos_en_vuelo_se_deduplican():
+    g = _gobernador()
+    llamadas = []
+
+    def get_lento(url, params=None, timeout=None):
+        llamadas.append(url)
+        time.sleep(0.2)
+        return _respuesta(usado=2, cuerpo=b'{"price": "1.0"}')
+
+    g._sesion.get = get_lento
+    respuestas = [None] * 4
+
+    def pedir(i):
+        respuestas[i] = g.get("/api/v3/ticker/price", {"symbol": "BTCUSDT"}, prioridad=GP.PRIORIDAD_POSICION)
+
+    hilos = [threading.Thread(target=pedir, args=(i,)) for i in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join(timeout=2)
+    assert len(llamadas) == 1
+    assert all(r.json() == {"price": "1.0"} for r in respuestas)
+    assert len({id(r) for r in respuestas}) == 4
+    assert g.resumen()["deduplicadas"] == 3
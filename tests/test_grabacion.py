@@ -0,0 +1,108 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from grabacion import ErrorGrabado, SesionGrabacion
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_reproduce_valores_y_errores_sin_llamar(tmp_path):
+    ruta = str(tmp_path / "s.jsonl.gz")
+    grabada = SesionGrabacion()
+    grabada.grabar(ruta, {"version": 0})
+    assert grabada.capturar("binance", "/precio", lambda: {"price": "1.5"}) == {"price": "1.5"}
+    with pytest.raises(ZeroDivisionError):
+        grabada.capturar("binance", "/falla", lambda: 1 / 0)
+    assert grabada.capturar("archivo", "set", lambda: {1, 2}) == {1, 2}  # no serializable: se devuelve igual
+    grabada.comparar("decision", "BTCUSDT", ["aceptada", 70.0])
+    grabada.detener()
+
+    replay = SesionGrabacion()
+    replay.reproducir(ruta)
+    assert replay.estado_inicial() == {"version": 0}
+    assert replay.capturar("binance", "/precio", lambda: pytest.fail("no debe llamar")) == {"price": "1.5"}
+    with pytest.raises(ErrorGrabado, match="ZeroDivisionError"):
+        replay.capturar("binance", "/falla", lambda: None)
+    with pytest.raises(ErrorGrabado, match="no grabado"):
+        replay.capturar("archivo", "set", lambda: None)
+    replay.comparar("decision", "BTCUSDT", ["descartada", 70.0])
+    assert replay.diferencias == 1
+    assert replay.pendientes() == 0
+
+
+_GRABAR = """
+import json, random, time
+import gobernador_peso as GP
+
+class _R:
+    status_code = 200
+    def __init__(self, d):
+        self._d = d
+        self.headers = {"X-MBX-USED-WEIGHT-1M": "10"}
+    def json(self):
+        return self._d
+    def raise_for_status(self):
+        pass
+
+class _S:
+    def get(self, url, params=None, **kw):
+        rnd = random.Random()
+        if "klines" in url:
+            ahora = int(time.time() // 60 * 60 * 1000)
+            p, velas = 100.0, []
+            for i in range(params["limit"]):
+                ot = ahora - (params["limit"] - 1 - i) * 60000
+                p *= 1 + rnd.uniform(-0.004, 0.0045)
+                velas.append([ot, p, p * 1.002, p * 0.998, p * 1.001, 10 + rnd.random(), ot + 59999, 0, 0, 0, 0, 0])
+            return _R(velas)
+        return _R({"symbol": params["symbol"], "price": str(rnd.uniform(90, 110))})
+
+GP.GOBERNADOR._sesion = _S()
+import exchange
+exchange.ExchangeBinance._orden_mercado = lambda self, s, l, c: {"fills": [{"price": "95.5"}]}
+import bot_integrado as B, grabacion as GR, trailing_manager as T
+B._enviar_por_telegram = lambda simbolo, payload: True
+GR.iniciar(json.load(open("config.json")))
+ops = [{"id": f"id{i}", "simbolo": s, "estado": "Confirmada", "precio_entrada": 100.0, "cantidad": 1,
+        "max_price": 100.0, "trailing_pct": 0.03, "sl": 95, "fecha": f"f{i}"}
+       for i, s in enumerate(["AAAUSDT", "BBBUSDT"] * 2)]
+for _ in range(2):
+    B.ejecutar_ciclo()
+    T.trailing_manager(list(ops))
+GR.SESION.detener()
+"""
+
+
+def test_reproducir_sesion_del_scanner_y_trailing(tmp_path):
+    with open(os.path.join(RAIZ, "config.json"), encoding="utf-8") as f:
+        cfg = json.load(f)
+    cfg.update(simbolos=["AAAUSDT", "BBBUSDT", "CCCUSDT"], min_confiabilidad_media=30)
+    cfg["grabacion"] = {"activo": True, "directorio": "sesiones"}
+    cfg["arranque"] = dict(cfg.get("arranque", {}), activo=False)
+    cfg["distribuido"] = dict(cfg.get("distribuido", {}), workers=0)
+    (tmp_path / "config.json").write_text(json.dumps(cfg), encoding="utf-8")
+    (tmp_path / "Dashboard").mkdir()
+    (tmp_path / "Dashboard" / "data.js").write_text("const operaciones = [];", encoding="utf-8")
+    (tmp_path / "grabar.py").write_text(_GRABAR, encoding="utf-8")
+    env = dict(os.environ, PYTHONPATH=RAIZ, USE_FAKE_IA="true")
+
+    subprocess.run([sys.executable, "grabar.py"], cwd=tmp_path, env=env, check=True,
+                   capture_output=True, timeout=120)
+    sesion, = (tmp_path / "sesiones").iterdir()
+
+    salida = subprocess.run(
+        [sys.executable, os.path.join(RAIZ, "grabacion.py"), "reproducir", str(sesion),
+         "--dir", str(tmp_path / "replay"), "--silencioso"],
+        cwd=tmp_path, env=env, check=True, capture_output=True, text=True, timeout=120,
+    ).stdout
+    linea = [l for l in salida.splitlines() if "[REPLAY] {" in l][-1]
+    resumen = json.loads(linea.split("[REPLAY] ", 1)[1])
+    assert resumen["divergencia"] is None
+    assert resumen["diferencias"] == 0
+    assert resumen["entradas_sin_usar"] == 0
+    assert resumen["scanner"]["n"] == 2
+    assert resumen["trailing"]["n"] == 2
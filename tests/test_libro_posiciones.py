@@ -0,0 +1,134 @@
+from libro_posiciones import LibroPosiciones
+
+
+def _op(id_op, simbolo="BTCUSDT", entrada=100.0, trailing_pct=0.05, sl=90.0, **extra):
+    return {"id": id_op, "simbolo": simbolo, "precio_entrada": entrada, "cantidad": 1.0,
+            "trailing_pct": trailing_pct, "sl": sl, "tp": 0.0, "estado": "Confirmada", **extra}
+
+
+def test_precio_sobre_todos_los_stops_no_dispara():
+    libro = LibroPosiciones()
+    libro.sincronizar([_op("a"), _op("b", sl=95.0)])
+    disparadas, subieron = libro.actualizar_precio("BTCUSDT", 99.0)
+    assert disparadas == []
+    assert subieron == []
+
+
+def test_trailing_sube_con_el_maximo_y_dispara_al_cruzarlo():
+    libro = LibroPosiciones()
+    libro.sincronizar([_op("a")])
+    _, subieron = libro.actualizar_precio("BTCUSDT", 120.0)
+    assert subieron == ["a"]
+    assert libro.valores("a")["stop_efectivo"] == 120.0 * 0.95
+    assert libro.actualizar_precio("BTCUSDT", 115.0)[0] == []
+    assert libro.actualizar_precio("BTCUSDT", 113.0)[0] == [("a", "Trailing")]
+
+
+def test_stop_loss_tiene_su_propio_motivo():
+    libro = LibroPosiciones()
+    libro.sincronizar([_op("a", trailing_pct=0.5)])
+    assert libro.actualizar_precio("BTCUSDT", 89.0)[0] == [("a", "SL")]
+
+
+def test_solo_salen_las_posiciones_cruzadas():
+    libro = LibroPosiciones()
+    libro.sincronizar([_op(f"p{i}", trailing_pct=0.5, sl=80.0 + i) for i in range(10)])
+    disparadas, _ = libro.actualizar_precio("BTCUSDT", 85.0)
+    assert sorted(i for i, _ in disparadas) == ["p5", "p6", "p7", "p8", "p9"]
+
+
+def test_reintentar_devuelve_la_posicion_al_heap():
+    libro = LibroPosiciones()
+    libro.sincronizar([_op("a")])
+    assert libro.actualizar_precio("BTCUSDT", 89.0)[0] == [("a", "SL")]
+    assert libro.actualizar_precio("BTCUSDT", 89.0)[0] == []
+    libro.reintentar("a")
+    assert libro.actualizar_precio("BTCUSDT", 89.0)[0] == [("a", "SL")]
+
+
+def test_simbolos_independientes():
+    libro = LibroPosiciones()
+    libro.sincronizar([_op("a"), _op("b", simbolo="ETHUSDT", entrada=10.0, sl=9.0)])
+    assert libro.actualizar_precio("ETHUSDT", 8.0)[0] == [("b", "SL")]
+    assert sorted(libro.simbolos()) == ["BTCUSDT", "ETHUSDT"]
+
+
+def test_sincronizar_aplica_ediciones_y_bajas():
+    libro = LibroPosiciones()
+    ops = [_op("a"), _op("b")]
+    libro.sincronizar(ops)
+    ops[0] = dict(ops[0], sl=99.0)
+    ops[1] = dict(ops[1], estado="Cerrada")
+    libro.sincronizar(ops)
+    assert "b" not in libro
+    assert libro.operaciones["a"]["sl"] == 99.0
+    assert libro.actualizar_precio("BTCUSDT", 98.0)[0] == [("a", "SL")]
+
+
+def test_cerrada_por_el_libro_no_vuelve_desde_una_lista_vieja():
+    libro = LibroPosiciones()
+    ops = [_op("a")]
+    libro.sincronizar(ops)
+    libro.cerrar("a")
+    libro.sincronizar(ops)
+    assert len(libro) == 0
+
+
+def test_compactar_mantiene_el_indice():
+    libro = LibroPosiciones()
+    libro.sincronizar([_op(f"p{i}", trailing_pct=0.5, sl=float(i)) for i in range(100)])
+    for i in range(70):
+        libro.retirar(f"p{i}")
+    assert len(libro) == 30
+    assert libro.valores("p99")["stop_efectivo"] == 99.0
+    disparadas, _ = libro.actualizar_precio("BTCUSDT", 97.5)
+    assert sorted(i for i, _ in disparadas) == ["p98", "p99"]
+
+
+def test_stop_sostenido_por_sl_no_se_duplica_al_subir_el_maximo():
+    libro = LibroPosiciones()
+    # Sólo "a" marca máximo: el heap se actualiza fila por fila, sin reconstruirse
+    otras = [_op(f"p{i}", trailing_pct=0.9, sl=50.0, max_price=200.0) for i in range(10)]
+    libro.sincronizar([_op("a", trailing_pct=0.5, sl=95.0)] + otras)
+    libro.actualizar_precio("BTCUSDT", 101.0)
+    assert libro.valores("a")["stop_efectivo"] == 95.0
+    disparadas, _ = libro.actualizar_precio("BTCUSDT", 94.0)
+    assert [d for d in disparadas if d[0] == "a"] == [("a", "SL")]
+
+
+def test_editar_tp_no_duplica_la_entrada_del_heap():
+    libro = LibroPosiciones()
+    ops = [_op("a", sl=95.0)]
+    libro.sincronizar(ops)
+    ops[0] = dict(ops[0], tp=130.0)
+    libro.sincronizar(ops)
+    assert libro.actualizar_precio("BTCUSDT", 94.0)[0] == [("a", "SL")]
+
+
+def test_instantanea_consistente_con_el_trailing_en_otro_hilo():
+    import threading
+
+    libro = LibroPosiciones()
+    ops = [_op(f"p{i}", trailing_pct=0.5, sl=float(i % 90)) for i in range(500)]
+    libro.sincronizar(ops)
+    fin = threading.Event()
+    errores = []
+
+    def capturar():
+        while not fin.is_set():
+            try:
+                for p in libro.instantanea():
+                    if p["stop_efectivo"] != max(p["sl"], p["max_price"] * 0.5):
+                        errores.append(p["id"])
+            except Exception as e:
+                errores.append(repr(e))
+
+    hilo = threading.Thread(target=capturar)
+    hilo.start()
+    for k in range(100):
+        for id_op, _ in libro.actualizar_precio("BTCUSDT", 40.0 + (k * 7) % 55)[0]:
+            libro.cerrar(id_op)  # cierra y compacta mientras el otro hilo lee
+        libro.sincronizar(ops)
+    fin.set()
+    hilo.join()
+    assert errores == []
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import patrones_velas as PV
+
+
+def _velas(*ohlc):
+    o, h, l, c = (np.array(x, dtype=float) for x in zip(*ohlc))
+    return o, h, l, c
+
+
+def _patrones_en_ultima(o, h, l, c):
+    m = PV.detectar(o, h, l, c)
+    return {PV.NOMBRES[p] for p in np.flatnonzero(m[:, 0, -1])}
+
+
+def test_envolvente_alcista():
+    o, h, l, c = _velas((10, 10.5, 9.5, 10), (10, 10.2, 8.9, 9), (8.8, 10.6, 8.7, 10.5))
+    assert "Envolvente alcista" in _patrones_en_ultima(o, h, l, c)
+
+
+def test_envolvente_bajista():
+    o, h, l, c = _velas((10, 10.5, 9.5, 10), (9, 10.1, 8.9, 10), (10.2, 10.3, 8.5, 8.7))
+    assert "Envolvente bajista" in _patrones_en_ultima(o, h, l, c)
+
+
+def test_doji():
+    o, h, l, c = _velas((10, 10.5, 9.5, 10.2), (10, 10.5, 9.5, 10.2), (10, 11, 9, 10.01))
+    assert _patrones_en_ultima(o, h, l, c) == {"Doji"}
+
+
+def test_primeras_velas_sin_historia_no_disparan_patrones_de_varias_velas():
+    o, h, l, c = _velas((10, 11, 9.9, 11),)
+    m = PV.detectar(o, h, l, c)
+    assert m.shape == (len(PV.PATRONES), 1, 1)
+    multi = [PV.NOMBRES.index(n) for n in ("Envolvente alcista", "Estrella de la mañana", "Tres soldados blancos")]
+    assert not m[multi].any()
+
+
+def test_lote_detecta_por_simbolo():
+    alcista = [(10, 10.5, 9.5, 10), (10, 10.2, 8.9, 9), (8.8, 10.6, 8.7, 10.5)]
+    bajista = [(10, 10.5, 9.5, 10), (9, 10.1, 8.9, 10), (10.2, 10.3, 8.5, 8.7)]
+    por_simbolo = [_velas(*alcista), _velas(*bajista)]
+    o, h, l, c = (np.vstack([s[i] for s in por_simbolo]) for i in range(4))
+    res = PV.patron_mas_fuerte_lote(o, h, l, c, ventana=1)
+    assert [r["patron"] for r in res] == ["Envolvente alcista", "Envolvente bajista"]
+    assert [r["direccion"] for r in res] == [1, -1]
+    assert res[0]["hace_velas"] == 0
+
+
+def test_patron_mas_fuerte_prefiere_el_mas_fuerte_en_la_ventana():
+    df = pd.DataFrame(
+        [(10, 10.5, 9.5, 10), (10, 10.2, 8.9, 9), (8.8, 10.6, 8.7, 10.5), (10.5, 11, 10, 10.51)],
+        columns=["open", "high", "low", "close"],
+    )
+    res = PV.patron_mas_fuerte(df, ventana=3)
+    assert res == {"patron": "Envolvente alcista", "direccion": 1, "hace_velas": 1}
+
+
+def test_sin_velas_suficientes():
+    df = pd.DataFrame([(10, 11, 9, 10.5)], columns=["open", "high", "low", "close"])
+    assert PV.patron_mas_fuerte(df)["patron"] == PV.SIN_PATRON
+
+
+def test_ventana_invalida():
+    o = np.ones(5)
+    with pytest.raises(ValueError):
+        PV.patron_mas_fuerte_lote(o, o, o, o, ventana=0)
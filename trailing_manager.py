@@ -2,16 +2,28 @@ import json
 import os
 import time
 import datetime
-from binance.client import Client
 from dotenv import load_dotenv
 
-load_dotenv()
+from bus_eventos import BUS, EVENTO_POSICION_ACTUALIZADA, EVENTO_POSICION_CERRADA
+from exchange import obtener_exchange
+from grabacion import SESION, iniciar as iniciar_grabacion
+from libro_posiciones import LibroPosiciones
+from utils import clave_operacion, seccion_config
 
-api_key = os.getenv("BINANCE_API_KEY")
-api_secret = os.getenv("BINANCE_API_SECRET")
-client = Client(api_key, api_secret)
+load_dotenv()
 
 RUTA_OPERACIONES = "Dashboard/data.js"
+VOLCADO_CADA_TICKS = 4  # en memoria: cada cuántos ticks se publican todas las posiciones
+
+LIBRO = LibroPosiciones()
+_ticks = 0
+
+def config_trailing(cfg):
+    raw = seccion_config(cfg, "trailing")
+    return {
+        # El simulador lo apaga al correr miles de posiciones
+        "log_seguimiento": bool(raw.get("log_seguimiento", True)),
+    }
 
 def leer_operaciones():
     with open(RUTA_OPERACIONES, "r", encoding="utf-8") as f:
@@ -25,69 +37,110 @@ def guardar_operaciones(operaciones):
         f.write(contenido)
 
 def obtener_precio_actual(simbolo):
-    ticker = client.get_symbol_ticker(symbol=simbolo)
-    return float(ticker["price"])
-
-def trailing_manager():
-    operaciones = leer_operaciones()
-    actualizadas = []
-    for op in operaciones:
-        if op["estado"] != "Confirmada":
-            actualizadas.append(op)
-            continue
-
-        simbolo = op["simbolo"]
-        entrada = float(op["precio_entrada"])
-        cantidad = float(op.get("cantidad", 0))
-        trailing_pct = float(op.get("trailing_pct", 0.03))
-        sl = float(op.get("sl", 0))
-        tp = float(op.get("tp", 0))
-        max_price = float(op.get("max_price", entrada))
-        trailing_stop = float(op.get("trailing_stop", entrada * (1 - trailing_pct)))
-
-        precio_actual = obtener_precio_actual(simbolo)
-        max_price = max(max_price, precio_actual)
-        nuevo_trailing = max_price * (1 - trailing_pct)
-
-        print(f"⏳ Seguimiento {simbolo}: precio={precio_actual:.4f} max={max_price:.4f} stop={nuevo_trailing:.4f}")
-
-        op["max_price"] = max_price
-        op["trailing_stop"] = nuevo_trailing
-        op["precio_actual"] = precio_actual
-
-        if not cantidad or float(cantidad) <= 0:
-            print(f"❌ No se puede vender {simbolo}: cantidad inválida ({cantidad})")
-            actualizadas.append(op)
+    return obtener_exchange().precio(simbolo)
+
+def _cerrar_posicion(id_op, motivo):
+    SESION.comparar("cierre", id_op, motivo)
+    op = LIBRO.volcar(id_op)
+    simbolo = op["simbolo"]
+    entrada = float(op["precio_entrada"])
+    cantidad = float(op.get("cantidad", 0))
+
+    if not cantidad or float(cantidad) <= 0:
+        print(f"❌ No se puede vender {simbolo}: cantidad inválida ({cantidad})")
+        LIBRO.reintentar(id_op)
+        return None
+
+    try:
+        orden = obtener_exchange().vender_mercado(simbolo, cantidad)
+        precio_venta = float(orden["fills"][0]["price"])
+        op["estado"] = "Cerrada"
+        op["venta"] = precio_venta
+        op["motivo_cierre"] = motivo
+        op["pyl_usdt"] = round((precio_venta - entrada) * cantidad, 4)
+        op["pyl_pct"] = round(((precio_venta / entrada) - 1) * 100, 2)
+        print(f"✅ Vendido {simbolo} a {precio_venta} — motivo: {motivo}")
+    except Exception as e:
+        print(f"❌ Error vendiendo {simbolo}: {str(e)}")
+        LIBRO.reintentar(id_op)
+        return None
+    LIBRO.cerrar(id_op)
+    BUS.publicar(EVENTO_POSICION_CERRADA, op)
+    return op
+
+def trailing_manager(operaciones=None, tcfg=None):
+    # Sin argumento: modo script, lee y reescribe data.js.
+    # Con lista (supervisor/simulador): trabaja en memoria y comunica cambios por el bus;
+    # sólo publica las posiciones cuyo stop subió o que se cerraron, y un volcado
+    # completo cada VOLCADO_CADA_TICKS llamadas para refrescar precio/PnL del dashboard.
+    global _ticks
+    tcfg = tcfg or config_trailing({})
+    en_memoria = operaciones is not None
+    SESION.marcar("trailing", en_memoria=en_memoria)
+    operaciones = SESION.capturar("entrada", "trailing_manager",
+                                  lambda: operaciones if en_memoria else leer_operaciones())
+    if not en_memoria:
+        # data.js es la fuente de verdad: el libro se reconstruye desde el archivo
+        LIBRO.limpiar()
+    LIBRO.sincronizar(operaciones)
+    _ticks += 1
+    volcado_completo = not en_memoria or _ticks % VOLCADO_CADA_TICKS == 0
+
+    cerradas = {}
+    for simbolo in LIBRO.simbolos():
+        try:
+            precio_actual = obtener_precio_actual(simbolo)
+        except Exception as e:
+            print(f"❌ Error obteniendo precio para {simbolo}: {e}")
             continue
+        disparadas, subieron = LIBRO.actualizar_precio(simbolo, precio_actual)
 
-        activar_venta = False
-        motivo = ""
-
-        if precio_actual <= sl:
-            activar_venta = True
-            motivo = "SL"
-        elif precio_actual <= nuevo_trailing:
-            activar_venta = True
-            motivo = "Trailing"
+        if tcfg["log_seguimiento"]:
+            print(f"⏳ Seguimiento {simbolo}: precio={precio_actual:.4f} stops_subidos={len(subieron)} disparados={len(disparadas)}")
 
-        if activar_venta:
+        if en_memoria and not volcado_completo:
+            for id_op in subieron:
+                BUS.publicar(EVENTO_POSICION_ACTUALIZADA, LIBRO.volcar(id_op))
+        for id_op, motivo in disparadas:
+            # Una posición con error no debe dejar sin revisar los stops del resto de símbolos
             try:
-                orden = client.order_market_sell(symbol=simbolo, quantity=cantidad)
-                precio_venta = float(orden["fills"][0]["price"])
-                op["estado"] = "Cerrada"
-                op["venta"] = precio_venta
-                op["estado"] = "Cerrada"
-                op["motivo_cierre"] = motivo
-                op["pyl_usdt"] = round((precio_venta - entrada) * cantidad, 4)
-                op["pyl_pct"] = round(((precio_venta / entrada) - 1) * 100, 2)
-                print(f"✅ Vendido {simbolo} a {precio_venta} — motivo: {motivo}")
+                op = _cerrar_posicion(id_op, motivo)
             except Exception as e:
-                print(f"❌ Error vendiendo {simbolo}: {str(e)}")
-        actualizadas.append(op)
+                print(f"❌ Error cerrando {id_op} ({motivo}): {e}")
+                if id_op in LIBRO:
+                    LIBRO.reintentar(id_op)
+                continue
+            if op is not None:
+                cerradas[id_op] = op
+
+    if volcado_completo:
+        for id_op in list(LIBRO.operaciones):
+            op = LIBRO.volcar(id_op)
+            if en_memoria:
+                BUS.publicar(EVENTO_POSICION_ACTUALIZADA, op)
+
+    if en_memoria:
+        return list(cerradas.values())
 
+    actualizadas = []
+    for op in operaciones:
+        id_op = clave_operacion(op)
+        actualizadas.append(cerradas.get(id_op) or LIBRO.operaciones.get(id_op) or op)
     guardar_operaciones(actualizadas)
+    return actualizadas
 
 if __name__ == "__main__":
-    while True:
-        trailing_manager()
-        time.sleep(15)
+    cfg = {}
+    try:
+        with open("config.json", "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        iniciar_grabacion(cfg)
+    except Exception as e:
+        print(f"⚠️ No se pudo iniciar la grabación de sesión: {e}")
+    tcfg = config_trailing(cfg)
+    try:
+        while True:
+            trailing_manager(tcfg=tcfg)
+            time.sleep(15)
+    finally:
+        SESION.detener()
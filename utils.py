@@ -1,14 +1,15 @@
 import os
 import json
 import time
+import tempfile
 import traceback
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 from pathlib import Path
 import requests
-from binance.client import Client
 from datetime import datetime
-import numpy as np
-import pandas as pd
+
+if TYPE_CHECKING:
+    import pandas as pd  # sólo para anotaciones: utils no carga pandas al importarse
 
 # -------------------------------
 # FUNCIONES DASHBOARD
@@ -43,7 +44,49 @@ def validar_y_reparar_dashboard():
         print(f"❌ data.js corrupto. Se reescribirá vacío. Error: {e}")
         ruta.write_text("const operaciones = [];", encoding="utf-8")
 
+def cargar_operaciones_dashboard() -> List[Dict[str, Any]]:
+    try:
+        ruta = Path("Dashboard/data.js")
+        if not ruta.exists():
+            return []
+        contenido = ruta.read_text(encoding="utf-8").strip()
+        inicio = contenido.find("[")
+        fin = contenido.rfind("]") + 1
+        if inicio == -1 or fin == 0:
+            return []
+        return json.loads(contenido[inicio:fin])
+    except Exception as e:
+        print(f"⚠️ Error leyendo operaciones de data.js: {e}")
+        return []
+
+def clave_operacion(op: Dict[str, Any]) -> str:
+    if op.get("id"):
+        return str(op["id"])
+    return f"{op.get('simbolo')}_{op.get('timestamp', op.get('precio_entrada'))}"
+
+def escribir_texto_atomico(ruta: str, contenido: str) -> None:
+    escribir_bytes_atomico(ruta, contenido.encode("utf-8"))
+
+def escribir_bytes_atomico(ruta: str, contenido: bytes) -> None:
+    # Escribe en un temporal del mismo directorio y reemplaza: nunca deja el archivo a medias
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=directorio)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(contenido)
+        os.replace(tmp, ruta)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
 def _append_operacion_dashboard(simbolo: str, payload: Dict[str, Any]):
+    from bus_eventos import BUS, EVENTO_ORDEN_CONFIRMADA
+    if BUS.activo():
+        # Con supervisor el estado vive en memoria; data.js se escribe como snapshot
+        BUS.publicar(EVENTO_ORDEN_CONFIRMADA, payload)
+        return
     try:
         ruta = Path("Dashboard/data.js")
         if not ruta.exists():
@@ -73,13 +116,22 @@ def _append_operacion_dashboard(simbolo: str, payload: Dict[str, Any]):
         print(f"❌ Error al escribir en dashboard: {e}")
 def obtener_precio_actual(simbolo: str) -> Optional[float]:
     try:
-        client = Client(os.getenv("BINANCE_API_KEY"), os.getenv("BINANCE_API_SECRET"))
-        precio = client.get_symbol_ticker(symbol=simbolo)["price"]
-        return float(precio)
+        from exchange import obtener_exchange
+        return obtener_exchange().precio(simbolo)
     except Exception as e:
         print(f"❌ Error obteniendo precio para {simbolo}: {e}")
         return None
 
+_UNIDADES_INTERVALO = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+def intervalo_a_segundos(intervalo: str) -> int:
+    # "1m" → 60, "15m" → 900, "1h" → 3600 (formato de intervalos de Binance)
+    intervalo = str(intervalo).strip()
+    unidad = intervalo[-1:]
+    if unidad not in _UNIDADES_INTERVALO or not intervalo[:-1].isdigit():
+        raise ValueError(f"Intervalo no soportado: {intervalo!r}")
+    return int(intervalo[:-1]) * _UNIDADES_INTERVALO[unidad]
+
 def redondear_qty(cantidad: float, step: float) -> float:
     precision = int(round(-1 * (step.as_integer_ratio()[1]).bit_length() / 3.321928094887362, 0))
     return round(cantidad - (cantidad % step), max(0, precision))
@@ -88,7 +140,12 @@ def cargar_config() -> Dict[str, Any]:
     with open("config.json", "r", encoding="utf-8") as f:
         return json.load(f)
 
-def calcular_rangos_tecnicos(df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, float]:
+def seccion_config(cfg: Dict[str, Any], nombre: str) -> Dict[str, Any]:
+    # Bloque `nombre` de config.json; {} si falta o no es un objeto (cada config_xxx pone sus defaults)
+    raw = cfg.get(nombre, {}) if isinstance(cfg, dict) else {}
+    return raw if isinstance(raw, dict) else {}
+
+def calcular_rangos_tecnicos(df: "pd.DataFrame", config: Dict[str, Any]) -> Dict[str, float]:
     rsi = df["rsi"].iloc[-1]
     macd = df["macd"].iloc[-1]
     atr_pct = df["atr_pct"].iloc[-1]
@@ -151,6 +208,13 @@ def log_debug(texto: str):
 def normalizar_confianza(conf: float) -> float:
     return round(float(conf), 2)
 
+def trailing_a_fraccion(trailing_pct: Optional[float]) -> Optional[float]:
+    # Señales y órdenes pendientes guardan el trailing en % (3 = 3%);
+    # trailing_manager/libro_posiciones lo usan como fracción (0.03)
+    if trailing_pct is None:
+        return None
+    return float(trailing_pct) / 100.0
+
 def calcular_trailing_stop(precio_entrada: float, porcentaje: float) -> float:
     return round(precio_entrada * (1 - porcentaje / 100), 6)
 
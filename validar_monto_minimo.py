@@ -8,18 +8,20 @@ ARCHIVO_ORDENES = Path("ordenes_pendientes.json")
 def calcular_monto_minimo(precio_actual: float, step: float = STEP_MIN) -> float:
     return round(precio_actual * step, 2)
 
-def validar_ordenes():
-    if not ARCHIVO_ORDENES.exists():
-        print("ℹ️ No hay archivo de órdenes pendientes.")
-        return
+def validar_ordenes(ordenes=None):
+    # Con `ordenes` (supervisor) valida el estado en memoria sin tocar el archivo
+    if ordenes is None:
+        if not ARCHIVO_ORDENES.exists():
+            print("ℹ️ No hay archivo de órdenes pendientes.")
+            return
 
-    try:
-        ordenes = json.loads(ARCHIVO_ORDENES.read_text(encoding="utf-8"))
-    except Exception as e:
-        print(f"❌ Error leyendo ordenes_pendientes.json: {e}")
-        return
+        try:
+            ordenes = json.loads(ARCHIVO_ORDENES.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"❌ Error leyendo ordenes_pendientes.json: {e}")
+            return
 
-    for orden_id, payload in ordenes.items():
+    for orden_id, payload in list(ordenes.items()):
         simbolo = payload.get("simbolo")
         monto = float(payload.get("monto", payload.get("monto_usdt", 0)))
         precio = float(payload.get("precio_actual", 0))